@@ -0,0 +1,115 @@
+import json
+import time
+import socket
+import asyncio
+import statistics
+from collections import deque
+from typing import Optional
+from PySide6.QtCore import QObject, QTimer
+from PySide6 import QtNetwork
+
+from globals import logger
+from API.Journal import mutation_journal, ENDPOINT_MISSING_CODES
+
+BATCH_ENDPOINT: str = 'save_action_history_batch'
+SINGLE_ENDPOINT: str = 'save_action_history'
+BATCH_SIZE: int = 50
+
+def get_host_address() -> str:
+    try:
+        return socket.gethostbyname(socket.gethostname())
+    except OSError:
+        return '127.0.0.1'
+
+class ActionHistoryUploader(QObject):
+    """
+    Play and stop records for save_action_history, queued in memory and sent in batches every flush_ms
+    (or as soon as BATCH_SIZE records are queued) through the mutation journal. The host address is resolved
+    once, in a worker thread, and stamped on the records when they are sent. Batches are journaled with
+    save_action_history as the fallback endpoint, so if the server has no batch endpoint the journal
+    sends the records one by one, also when the batch is replayed after a restart;
+    batches are then not tried again in this session.
+    """
+
+    def __init__(self, flush_ms: int = 2000, parent=None) -> None:
+        super().__init__(parent)
+        self.flush_ms: int = flush_ms
+        self.host_address: Optional[str] = None
+        self.queue: list[tuple[float, dict]] = []
+        self.is_batch_supported: bool = True
+        self.record_count: int = 0
+        self.batch_count: int = 0
+        self.single_count: int = 0
+        self.queue_max: int = 0
+        self.flush_latencies: deque[float] = deque(maxlen=100)
+        self.flush_timer = QTimer(self)
+        self.flush_timer.setSingleShot(True)
+        self.flush_timer.timeout.connect(self.flush)
+
+    async def resolve_host(self) -> None:
+        self.host_address = await asyncio.get_running_loop().run_in_executor(None, get_host_address)
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self.queue)
+
+    def add(self, record: dict) -> None:
+        self.queue.append((time.monotonic(), record))
+        self.record_count += 1
+        self.queue_max = max(self.queue_max, len(self.queue))
+        if len(self.queue) >= BATCH_SIZE:
+            self.flush()
+        elif not self.flush_timer.isActive():
+            self.flush_timer.start(self.flush_ms)
+
+    def flush(self, is_final: bool = False) -> None:
+        self.flush_timer.stop()
+        if self.host_address is None and self.queue:
+            if not is_final:
+                # Адрес ещё определяется в фоне, записи подождут следующей отправки
+                self.flush_timer.start(self.flush_ms)
+                return
+            # При закрытии ждать фоновое определение некогда, адрес определяется здесь же
+            self.host_address = get_host_address()
+        queue, self.queue = self.queue, []
+        for _, record in queue:
+            record['ipv4'] = self.host_address
+        if self.is_batch_supported and len(queue) > 1:
+            self.send_batch(queue)
+        else:
+            for item in queue:
+                self.send_single(item)
+
+    def send_batch(self, queue: list[tuple[float, dict]]) -> None:
+        self.batch_count += 1
+        body: bytes = json.dumps([record for _, record in queue], ensure_ascii=False).encode('utf-8')
+        mutation_journal.record(BATCH_ENDPOINT, body, callback=lambda reply: self.on_batch_reply(reply, queue), fallback_endpoint=SINGLE_ENDPOINT)
+
+    def send_single(self, item: tuple[float, dict]) -> None:
+        self.single_count += 1
+        body: bytes = json.dumps(item[1], ensure_ascii=False).encode('utf-8')
+        mutation_journal.record(SINGLE_ENDPOINT, body, callback=lambda reply: self.on_reply(reply, [item]))
+
+    def on_batch_reply(self, reply: QtNetwork.QNetworkReply, queue: list[tuple[float, dict]]) -> None:
+        status_code: Optional[int] = reply.attribute(QtNetwork.QNetworkRequest.Attribute.HttpStatusCodeAttribute)
+        if reply.error() != QtNetwork.QNetworkReply.NetworkError.NoError and status_code in ENDPOINT_MISSING_CODES:
+            # Записи пакета журнал уже отправляет по одной
+            logger.info(f"API не поддерживает {BATCH_ENDPOINT}, история действий отправляется по одной записи")
+            self.is_batch_supported = False
+            return
+        self.on_reply(reply, queue)
+
+    def on_reply(self, reply: QtNetwork.QNetworkReply, queue: list[tuple[float, dict]]) -> None:
+        if reply.error() == QtNetwork.QNetworkReply.NetworkError.NoError:
+            self.flush_latencies.append(time.monotonic() - min(queued_at for queued_at, _ in queue))
+
+    def get_statistics(self) -> dict[str, float]:
+        return {
+            'records': self.record_count,
+            'batches': self.batch_count,
+            'single': self.single_count,
+            'queue_depth': self.queue_depth,
+            'queue_max': self.queue_max,
+            'flush_latency_median_ms': round(statistics.median(self.flush_latencies) * 1000) if self.flush_latencies else None,
+            'flush_latency_max_ms': round(max(self.flush_latencies) * 1000) if self.flush_latencies else None,
+        }
@@ -0,0 +1,131 @@
+import asyncio
+from typing import Any, Callable, Optional
+from PySide6.QtCore import QObject, QUrl, QUrlQuery, QByteArray
+from PySide6 import QtNetwork
+
+from globals import settings, logger
+
+DEFAULT_TIMEOUT: int = 10_000
+ENDPOINT_TIMEOUTS: dict[str, int] = {
+    'get_scheduler': 15_000,
+    'get_audio_background_text': 15_000,
+    'get_scheduler_sound': 60_000,
+    'get_scheduler_background_sound': 60_000,
+    'save_action_history': 5_000,
+}
+# Аудиофайлы загружаются отдельным менеджером, чтобы не занимать соединения опроса расписания
+AUDIO_ENDPOINTS: set[str] = {'get_scheduler_sound', 'get_scheduler_background_sound'}
+POOL_SIZE: int = 2
+
+class APIClient(QObject):
+    """
+    Long-lived QNetworkAccessManager pool shared by all tables and dialogs.
+    Keep-alive connections stay open between requests; HTTP/2 is negotiated where the server offers it.
+    Replies are deleted after their callback returns.
+    """
+
+    def __init__(self, parent=None) -> None:
+        super().__init__(parent)
+        self.managers: list[QtNetwork.QNetworkAccessManager] = []
+        self.request_count: int = 0
+        self.new_connection_count: int = 0
+        self.http2_count: int = 0
+        self.timeout_count: int = 0
+        self.canceled_count: int = 0
+        self.error_count: int = 0
+
+    def get_manager(self, endpoint: str) -> QtNetwork.QNetworkAccessManager:
+        if not self.managers:
+            self.managers = [QtNetwork.QNetworkAccessManager(self) for _ in range(POOL_SIZE)]
+        return self.managers[endpoint in AUDIO_ENDPOINTS]
+
+    def create_request(self, endpoint: str, query: Optional[QUrlQuery] = None, is_json: bool = False) -> QtNetwork.QNetworkRequest:
+        url = QUrl(settings.api_url+endpoint)
+        if query and not query.isEmpty():
+            url.setQuery(query.query())
+        request = QtNetwork.QNetworkRequest(url)
+        if is_json:
+            request.setHeader(QtNetwork.QNetworkRequest.KnownHeaders.ContentTypeHeader, "application/json")
+        return request
+
+    async def fetch(self, request: QtNetwork.QNetworkRequest, handler: Callable[[QtNetwork.QNetworkReply], Any], data: Optional[QByteArray | bytes] = None) -> Any:
+        """
+        Awaitable request: the handler runs with the finished reply before it is deleted,
+        and its result is returned. Cancelling the awaiting task aborts the reply.
+        """
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+
+        def resolve(reply: QtNetwork.QNetworkReply) -> None:
+            if future.done():
+                return
+            try:
+                future.set_result(handler(reply))
+            except Exception as error:
+                future.set_exception(error)
+
+        reply: QtNetwork.QNetworkReply = self.send(request, resolve, data)
+        try:
+            return await future
+        except asyncio.CancelledError:
+            if reply.isRunning():
+                reply.setProperty('is_canceled', True)
+                reply.abort()
+            raise
+
+    def get(self, request: QtNetwork.QNetworkRequest, callback: Optional[Callable[[QtNetwork.QNetworkReply], None]] = None) -> QtNetwork.QNetworkReply:
+        return self.send(request, callback)
+
+    def post(self, request: QtNetwork.QNetworkRequest, data: QByteArray | bytes, callback: Optional[Callable[[QtNetwork.QNetworkReply], None]] = None) -> QtNetwork.QNetworkReply:
+        return self.send(request, callback, data)
+
+    def send(self, request: QtNetwork.QNetworkRequest, callback: Optional[Callable[[QtNetwork.QNetworkReply], None]] = None, data: Optional[QByteArray | bytes] = None) -> QtNetwork.QNetworkReply:
+        endpoint: str = request.url().path().rstrip('/').rsplit('/', 1)[-1]
+        if request.transferTimeout() == 0:
+            request.setTransferTimeout(ENDPOINT_TIMEOUTS.get(endpoint, DEFAULT_TIMEOUT))
+        request.setAttribute(QtNetwork.QNetworkRequest.Attribute.Http2AllowedAttribute, True)
+        manager: QtNetwork.QNetworkAccessManager = self.get_manager(endpoint)
+        reply: QtNetwork.QNetworkReply = manager.get(request) if data is None else manager.post(request, data)
+        self.request_count += 1
+        # Сигнал приходит только при открытии нового сокета, иначе запрос ушёл по существующему соединению
+        reply.socketStartedConnecting.connect(self.on_socket_started_connecting)
+        reply.finished.connect(lambda: self.on_finished(reply, endpoint, callback))
+        return reply
+
+    def on_socket_started_connecting(self) -> None:
+        self.new_connection_count += 1
+
+    def on_finished(self, reply: QtNetwork.QNetworkReply, endpoint: str, callback: Optional[Callable[[QtNetwork.QNetworkReply], None]]) -> None:
+        try:
+            if reply.attribute(QtNetwork.QNetworkRequest.Attribute.Http2WasUsedAttribute):
+                self.http2_count += 1
+            match reply.error():
+                case QtNetwork.QNetworkReply.NetworkError.NoError:
+                    pass
+                case QtNetwork.QNetworkReply.NetworkError.OperationCanceledError if reply.property('is_canceled'):
+                    self.canceled_count += 1
+                case QtNetwork.QNetworkReply.NetworkError.OperationCanceledError:
+                    self.timeout_count += 1
+                    logger.error(f"Превышено время ожидания ответа API {endpoint}: {reply.errorString()}")
+                case _:
+                    self.error_count += 1
+            if callback:
+                callback(reply)
+        finally:
+            reply.deleteLater()
+
+    @property
+    def reused_connection_count(self) -> int:
+        return max(self.request_count - self.new_connection_count, 0)
+
+    def get_statistics(self) -> dict[str, int]:
+        return {
+            'requests': self.request_count,
+            'new_connections': self.new_connection_count,
+            'reused_connections': self.reused_connection_count,
+            'http2': self.http2_count,
+            'timeouts': self.timeout_count,
+            'canceled': self.canceled_count,
+            'errors': self.error_count,
+        }
+
+api_client: APIClient = APIClient()
@@ -0,0 +1,71 @@
+from typing import Optional
+from PySide6.QtCore import QUrl, QUrlQuery, QByteArray
+from PySide6 import QtNetwork
+
+VERSION_HEADER: str = 'X-Schedule-Version'
+
+class ReplyValidators():
+    """Validators and data version of a reply, read before the reply is deleted."""
+
+    def __init__(self, reply: QtNetwork.QNetworkReply) -> None:
+        self.etag: Optional[QByteArray] = reply.rawHeader('ETag') or None
+        self.last_modified: Optional[QByteArray] = reply.rawHeader('Last-Modified') or None
+        self.version: Optional[str] = str(reply.rawHeader(VERSION_HEADER), 'utf-8') if reply.hasRawHeader(VERSION_HEADER) else None
+        self.is_delta: bool = QUrlQuery(reply.request().url()).hasQueryItem('since')
+
+class ConditionalFetch():
+    """
+    Validators (ETag, Last-Modified) and data version of one polled endpoint.
+    A 304 reply means the previous payload is still current and must not be parsed;
+    in delta mode the request carries since=<version> and the server answers only with changes.
+    """
+
+    def __init__(self, is_delta: bool = False) -> None:
+        self.is_delta: bool = is_delta
+        self.not_modified_count: int = 0
+        self.delta_count: int = 0
+        self.full_count: int = 0
+        self.reset()
+
+    def reset(self) -> None:
+        self.etag: Optional[QByteArray] = None
+        self.last_modified: Optional[QByteArray] = None
+        self.version: Optional[str] = None
+
+    def create_request(self, url: QUrl, query: Optional[QUrlQuery] = None) -> QtNetwork.QNetworkRequest:
+        query = QUrlQuery(query) if query else QUrlQuery()
+        if self.is_delta and self.version is not None:
+            query.addQueryItem('since', self.version)
+        url = QUrl(url)
+        url.setQuery(query.query())
+        request = QtNetwork.QNetworkRequest(url)
+        if self.etag:
+            request.setRawHeader(b'If-None-Match', self.etag)
+        if self.last_modified:
+            request.setRawHeader(b'If-Modified-Since', self.last_modified)
+        return request
+
+    def is_delta_request(self, reply: QtNetwork.QNetworkReply) -> bool:
+        return QUrlQuery(reply.request().url()).hasQueryItem('since')
+
+    def is_delta_rejected(self, reply: QtNetwork.QNetworkReply) -> bool:
+        status_code: Optional[int] = reply.attribute(QtNetwork.QNetworkRequest.Attribute.HttpStatusCodeAttribute)
+        return self.is_delta_request(reply) and status_code is not None and status_code >= 400
+
+    def is_not_modified(self, reply: QtNetwork.QNetworkReply) -> bool:
+        if reply.attribute(QtNetwork.QNetworkRequest.Attribute.HttpStatusCodeAttribute) == 304:
+            self.not_modified_count += 1
+            return True
+        return False
+
+    def remember(self, reply: QtNetwork.QNetworkReply | ReplyValidators, version: Optional[str] = None) -> None:
+        validators: ReplyValidators = reply if isinstance(reply, ReplyValidators) else ReplyValidators(reply)
+        self.etag = validators.etag
+        self.last_modified = validators.last_modified
+        if version is None:
+            version = validators.version
+        self.version = None if version is None else str(version)
+        if validators.is_delta:
+            self.delta_count += 1
+        else:
+            self.full_count += 1
@@ -0,0 +1,285 @@
+import os
+import json
+import uuid
+import asyncio
+import sqlite3
+from datetime import datetime
+from typing import Callable, Optional
+from PySide6.QtCore import QObject, QTimer, Signal
+from PySide6 import QtNetwork
+
+from globals import logger, root_directory
+from API.Client import api_client
+
+JOURNAL_FILE_NAME: str = 'journal.sqlite3'
+IDEMPOTENCY_HEADER: bytes = b'Idempotency-Key'
+BATCH_SIZE: int = 20
+RETRY_DELAYS_MS: tuple[int] = (1000, 2000, 5000, 10000, 30000)
+# Коды ответа, при которых запрос повторяется; остальные ошибки HTTP означают, что сервер изменение отклонил
+RETRY_STATUS_CODES: frozenset[int] = frozenset((408, 425, 429, 500, 502, 503, 504))
+# Коды ответа, по которым считается, что сервер не знает адрес; запись с запасным адресом уходит на него по элементам
+ENDPOINT_MISSING_CODES: frozenset[int] = frozenset((404, 405, 501))
+# Сколько раз повторяется запись, на которую сервер отвечает кодом из RETRY_STATUS_CODES; затем она откладывается
+# в rejected_mutations, чтобы не задерживать остальные. Ошибки сети попытками не считаются
+MAX_SERVER_ATTEMPTS: int = 10
+
+class JournalEntry():
+    """One recorded mutation waiting to be accepted by the API."""
+
+    def __init__(self, entry_id: int, idempotency_key: str, endpoint: str, row_key: Optional[str], body: bytes, attempts: int, fallback_endpoint: Optional[str] = None) -> None:
+        self.entry_id: int = entry_id
+        self.idempotency_key: str = idempotency_key
+        self.endpoint: str = endpoint
+        self.row_key: Optional[str] = row_key
+        self.body: bytes = body
+        self.attempts: int = attempts
+        self.fallback_endpoint: Optional[str] = fallback_endpoint
+        self.status_code: Optional[int] = None
+        self.is_rejected: bool = False
+
+class MutationJournal(QObject):
+    """
+    Write-behind journal of changes sent to the API, in SQLite (WAL). A change is written to the journal
+    before it is sent, so nothing is lost while the API is unreachable or the program is closed.
+    The replayer sends the journal in order in batches, each request with its idempotency key,
+    and deletes what the API has accepted; on a network error the batch is retried with a growing delay.
+    A newer change of the same row replaces an older one that has not been sent yet.
+    Entries of one row are sent one after another in the order they were recorded
+    and the rest of the row waits if one fails; different rows are sent in parallel.
+    An entry whose body is a JSON array may name a fallback endpoint: if the API does not know
+    the entry's endpoint, the array is journaled again as one entry per item for the fallback endpoint.
+    Entries the API rejects, or answers with a server error MAX_SERVER_ATTEMPTS times,
+    are moved aside to the rejected_mutations table.
+    """
+    error_signal: Signal = Signal(str)
+    # Пакет не отправлен и ждёт повтора: его записи можно заменить более новыми
+    retry_signal: Signal = Signal()
+
+    def __init__(self, file_path: str, parent=None) -> None:
+        super().__init__(parent)
+        self.file_path: str = file_path
+        self.connection: Optional[sqlite3.Connection] = None
+        self.callbacks: dict[int, Callable[[QtNetwork.QNetworkReply], None]] = {}
+        # Строки, у которых есть неотправленная запись: row_key -> id записи
+        self.pending_rows: dict[str, int] = {}
+        self.pending_count: int = 0
+        self.in_flight: set[int] = set()
+        self.is_replaying: bool = False
+        self.retry_attempt: int = 0
+        self.recorded_count: int = 0
+        self.sent_count: int = 0
+        self.superseded_count: int = 0
+        self.rejected_count: int = 0
+        self.retry_count: int = 0
+        self.retry_timer = QTimer(self)
+        self.retry_timer.setSingleShot(True)
+        self.retry_timer.timeout.connect(self.schedule_replay)
+
+    def open(self) -> None:
+        if self.connection is not None:
+            return
+        self.connection = sqlite3.connect(self.file_path)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self.connection.execute('''CREATE TABLE IF NOT EXISTS mutations (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            idempotency_key TEXT NOT NULL UNIQUE,
+            endpoint TEXT NOT NULL,
+            row_key TEXT,
+            body BLOB NOT NULL,
+            created_at TEXT NOT NULL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            fallback_endpoint TEXT
+        )''')
+        if 'fallback_endpoint' not in [column[1] for column in self.connection.execute('PRAGMA table_info(mutations)')]:
+            # Журнал, созданный до появления запасного адреса
+            self.connection.execute('ALTER TABLE mutations ADD COLUMN fallback_endpoint TEXT')
+        self.connection.execute('''CREATE TABLE IF NOT EXISTS rejected_mutations (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            idempotency_key TEXT NOT NULL,
+            endpoint TEXT NOT NULL,
+            row_key TEXT,
+            body BLOB NOT NULL,
+            created_at TEXT NOT NULL,
+            attempts INTEGER NOT NULL,
+            status_code INTEGER,
+            rejected_at TEXT NOT NULL
+        )''')
+        self.pending_count = self.connection.execute('SELECT COUNT(*) FROM mutations').fetchone()[0]
+        self.pending_rows = dict(self.connection.execute('SELECT row_key, MAX(id) FROM mutations WHERE row_key IS NOT NULL GROUP BY row_key').fetchall())
+        if self.pending_count:
+            logger.info(f"В журнале изменений {self.pending_count} неотправленных записей")
+
+    def start(self) -> None:
+        try:
+            self.open()
+        except sqlite3.Error as err:
+            logger.error(f"Не удалось открыть журнал изменений {self.file_path}: {err}")
+            return
+        self.schedule_replay()
+
+    def record(self, endpoint: str, body: bytes, row_key: Optional[str] = None, callback: Optional[Callable[[QtNetwork.QNetworkReply], None]] = None, fallback_endpoint: Optional[str] = None) -> str:
+        idempotency_key: str = str(uuid.uuid4())
+        if self.connection is None:
+            # Журнал недоступен: изменение отправляется сразу, как до его появления
+            request = api_client.create_request(endpoint, is_json=True)
+            request.setRawHeader(IDEMPOTENCY_HEADER, idempotency_key.encode())
+            api_client.post(request, body, lambda reply: self.on_direct_reply(reply, body, fallback_endpoint, callback))
+            return idempotency_key
+        with self.connection:
+            if row_key is not None and (previous_id := self.pending_rows.get(row_key)) is not None and previous_id not in self.in_flight:
+                self.connection.execute('DELETE FROM mutations WHERE id = ?', (previous_id,))
+                self.callbacks.pop(previous_id, None)
+                self.pending_count -= 1
+                self.superseded_count += 1
+            cursor: sqlite3.Cursor = self.connection.execute(
+                'INSERT INTO mutations (idempotency_key, endpoint, row_key, body, created_at, fallback_endpoint) VALUES (?, ?, ?, ?, ?, ?)',
+                (idempotency_key, endpoint, row_key, bytes(body), datetime.now().isoformat(timespec='seconds'), fallback_endpoint))
+        entry_id: int = cursor.lastrowid
+        if row_key is not None:
+            self.pending_rows[row_key] = entry_id
+        if callback is not None:
+            self.callbacks[entry_id] = callback
+        self.pending_count += 1
+        self.recorded_count += 1
+        if not self.retry_timer.isActive():
+            self.schedule_replay()
+        return idempotency_key
+
+    def is_pending(self, row_key: str) -> bool:
+        return row_key in self.pending_rows
+
+    def is_sending(self, row_key: str) -> bool:
+        # Без журнала запрос уходит сразу, и строка считается отправляемой до ответа
+        return self.connection is None or self.pending_rows.get(row_key) in self.in_flight
+
+    def has_pending(self, endpoint: str) -> bool:
+        return self.connection is not None and self.connection.execute('SELECT 1 FROM mutations WHERE endpoint = ? LIMIT 1', (endpoint,)).fetchone() is not None
+
+    def schedule_replay(self) -> None:
+        if not self.is_replaying and self.connection is not None:
+            self.is_replaying = True
+            asyncio.ensure_future(self.replay())
+
+    def get_batch(self) -> list[JournalEntry]:
+        rows = self.connection.execute('SELECT id, idempotency_key, endpoint, row_key, body, attempts, fallback_endpoint FROM mutations ORDER BY id LIMIT ?', (BATCH_SIZE,))
+        return [JournalEntry(*row) for row in rows]
+
+    @staticmethod
+    def group_by_row(batch: list[JournalEntry]) -> list[list[JournalEntry]]:
+        # Записи без строки ни с чем не упорядочиваются и отправляются каждая отдельно
+        chains: dict[str | int, list[JournalEntry]] = {}
+        for entry in batch:
+            chains.setdefault(entry.row_key if entry.row_key is not None else entry.entry_id, []).append(entry)
+        return list(chains.values())
+
+    async def replay(self) -> None:
+        try:
+            while batch := self.get_batch():
+                self.in_flight = {entry.entry_id for entry in batch}
+                results: list[tuple[list[JournalEntry], list[JournalEntry]]] = await asyncio.gather(*(self.send_in_order(chain) for chain in self.group_by_row(batch)))
+                done: list[JournalEntry] = [entry for chain_done, _ in results for entry in chain_done]
+                failed: list[JournalEntry] = [entry for _, chain_failed in results for entry in chain_failed]
+                # Если программа упадёт до удаления, записи уйдут повторно с теми же ключами идемпотентности
+                rejected_at: str = datetime.now().isoformat(timespec='seconds')
+                with self.connection:
+                    self.connection.executemany(
+                        '''INSERT INTO rejected_mutations (idempotency_key, endpoint, row_key, body, created_at, attempts, status_code, rejected_at)
+                        SELECT idempotency_key, endpoint, row_key, body, created_at, attempts + 1, ?, ? FROM mutations WHERE id = ?''',
+                        [(entry.status_code, rejected_at, entry.entry_id) for entry in done if entry.is_rejected])
+                    self.connection.executemany('DELETE FROM mutations WHERE id = ?', [(entry.entry_id,) for entry in done])
+                    self.connection.executemany('UPDATE mutations SET attempts = attempts + 1 WHERE id = ?', [(entry.entry_id,) for entry in failed if entry.status_code is not None])
+                self.pending_count -= len(done)
+                self.in_flight = set()
+                if failed:
+                    delay: int = RETRY_DELAYS_MS[min(self.retry_attempt, len(RETRY_DELAYS_MS)-1)]
+                    self.retry_attempt += 1
+                    self.retry_count += 1
+                    self.error_signal.emit(f"Нет связи с API, неотправленных изменений в журнале: {self.pending_count}, повтор через {delay // 1000} с")
+                    self.retry_timer.start(delay)
+                    self.retry_signal.emit()
+                    return
+                self.retry_attempt = 0
+        except sqlite3.Error as err:
+            logger.error(f"Ошибка журнала изменений: {err}")
+        finally:
+            self.in_flight = set()
+            self.is_replaying = False
+
+    async def send_in_order(self, chain: list[JournalEntry]) -> tuple[list[JournalEntry], list[JournalEntry]]:
+        # Изменения одной строки уходят по одному: следующее отправляется после ответа на предыдущее
+        for indx, entry in enumerate(chain):
+            if not await self.send(entry):
+                return chain[:indx], [entry]
+        return chain, []
+
+    async def send(self, entry: JournalEntry) -> bool:
+        request = api_client.create_request(entry.endpoint, is_json=True)
+        request.setRawHeader(IDEMPOTENCY_HEADER, entry.idempotency_key.encode())
+        return await api_client.fetch(request, lambda reply: self.on_reply(reply, entry), entry.body)
+
+    def on_reply(self, reply: QtNetwork.QNetworkReply, entry: JournalEntry) -> bool:
+        # True — запись обработана (принята или отклонена сервером), False — нужен повтор
+        status_code: Optional[int] = reply.attribute(QtNetwork.QNetworkRequest.Attribute.HttpStatusCodeAttribute)
+        entry.status_code = status_code
+        match reply.error():
+            case QtNetwork.QNetworkReply.NetworkError.NoError:
+                self.sent_count += 1
+            case _ if status_code in ENDPOINT_MISSING_CODES and entry.fallback_endpoint is not None:
+                self.split_to_fallback(entry)
+            case _ if status_code is not None and status_code not in RETRY_STATUS_CODES:
+                self.reject(entry, f"API отклонил изменение {entry.endpoint} ({status_code}): {reply.errorString()}")
+            case _ if status_code is not None and entry.attempts + 1 >= MAX_SERVER_ATTEMPTS:
+                self.reject(entry, f"API {entry.attempts + 1} раз ответил ошибкой на изменение {entry.endpoint} ({status_code}), запись отложена")
+            case _:
+                return False
+        if entry.row_key is not None and self.pending_rows.get(entry.row_key) == entry.entry_id:
+            del self.pending_rows[entry.row_key]
+        # Обработчик вызывается, пока ответ ещё не удалён
+        if (callback := self.callbacks.pop(entry.entry_id, None)) is not None:
+            callback(reply)
+        return True
+
+    def reject(self, entry: JournalEntry, error_message: str) -> None:
+        # Запись переносится в rejected_mutations при удалении из журнала
+        self.rejected_count += 1
+        entry.is_rejected = True
+        logger.error(error_message)
+
+    def split_to_fallback(self, entry: JournalEntry) -> None:
+        # Ключи элементов выводятся из ключа записи: если программа упадёт до удаления записи,
+        # повторное разбиение не добавит элементы второй раз, а уже отправленные сервер не применит повторно
+        items: list = json.loads(entry.body)
+        created_at: str = datetime.now().isoformat(timespec='seconds')
+        with self.connection:
+            cursor: sqlite3.Cursor = self.connection.executemany(
+                'INSERT OR IGNORE INTO mutations (idempotency_key, endpoint, row_key, body, created_at) VALUES (?, ?, ?, ?, ?)',
+                [(f"{entry.idempotency_key}:{indx}", entry.fallback_endpoint, None, json.dumps(item, ensure_ascii=False).encode('utf-8'), created_at) for indx, item in enumerate(items)])
+        self.pending_count += cursor.rowcount
+        logger.info(f"API не поддерживает {entry.endpoint}, {len(items)} элементов записи отправляются на {entry.fallback_endpoint}")
+
+    def on_direct_reply(self, reply: QtNetwork.QNetworkReply, body: bytes, fallback_endpoint: Optional[str], callback: Optional[Callable[[QtNetwork.QNetworkReply], None]]) -> None:
+        status_code: Optional[int] = reply.attribute(QtNetwork.QNetworkRequest.Attribute.HttpStatusCodeAttribute)
+        if fallback_endpoint is not None and reply.error() != QtNetwork.QNetworkReply.NetworkError.NoError and status_code in ENDPOINT_MISSING_CODES:
+            for item in json.loads(body):
+                self.record(fallback_endpoint, json.dumps(item, ensure_ascii=False).encode('utf-8'))
+        if callback is not None:
+            callback(reply)
+
+    def get_statistics(self) -> dict[str, int]:
+        return {
+            'recorded': self.recorded_count,
+            'sent': self.sent_count,
+            'superseded': self.superseded_count,
+            'rejected': self.rejected_count,
+            'retries': self.retry_count,
+            'pending': self.pending_count,
+        }
+
+    def close(self) -> None:
+        self.retry_timer.stop()
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+mutation_journal: MutationJournal = MutationJournal(os.path.join(root_directory, JOURNAL_FILE_NAME))
@@ -0,0 +1,42 @@
+import os
+import json
+from datetime import datetime
+from typing import Optional
+
+SNAPSHOT_FILE_NAME: str = 'snapshot.json'
+
+class Snapshot():
+    """
+    Last-known-good zones, terminals and schedule saved on disk, so the window can be drawn
+    at startup without waiting for the API. Live data replaces it once it arrives.
+    """
+
+    def __init__(self, file_path: str, default_zones: Optional[list[dict]] = None) -> None:
+        self.file_path: str = file_path
+        self.zones: list[dict] = default_zones or []
+        self.terminals: list[dict] = []
+        self.schedule: list[dict] = []
+        self.saved_at: Optional[str] = None
+        self.is_loaded: bool = False
+
+    def load(self) -> bool:
+        try:
+            with open(self.file_path, 'r', encoding='utf-8') as snapshot_file:
+                data: dict = json.load(snapshot_file)
+        except (OSError, ValueError):
+            return False
+        self.zones = data.get('zones') or self.zones
+        self.terminals = data.get('terminals') or []
+        self.schedule = data.get('schedule') or []
+        self.saved_at = data.get('saved_at')
+        self.is_loaded = True
+        return True
+
+    def save(self, zones: list[dict], terminals: list[dict], schedule: list[dict]) -> None:
+        self.zones, self.terminals, self.schedule = list(zones), list(terminals), list(schedule)
+        self.saved_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        temp_path: str = self.file_path+'.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as snapshot_file:
+            json.dump({'saved_at': self.saved_at, 'zones': self.zones, 'terminals': self.terminals, 'schedule': self.schedule}, snapshot_file, ensure_ascii=False)
+        # Замена целиком, чтобы при сбое во время записи остался предыдущий снимок
+        os.replace(temp_path, self.file_path)
@@ -0,0 +1,73 @@
+from time import monotonic
+from typing import Callable, Optional
+
+from PySide6.QtCore import QObject, QTimer
+
+class EditWriteBack(QObject):
+    """
+    Operator edits waiting to be saved, one entry per row. Edits of a row are merged until the table
+    has been quiet for the debounce window (or for at most MAX_DELAY_FACTOR windows of continuous editing),
+    then every pending row is sent in one pass with the row's state at that moment.
+    A row whose previous request is being sent right now stays pending, so requests for one row
+    never overtake each other; if is_sending says the request is no longer being sent (it waits
+    in the journal for a retry), the row is sent again and the journal replaces the older entry.
+    """
+    MAX_DELAY_FACTOR: int = 4
+
+    def __init__(self, send: Callable[[str], None], delay_ms: int = 400, parent=None, is_sending: Optional[Callable[[str], bool]] = None) -> None:
+        super().__init__(parent)
+        self.send: Callable[[str], None] = send
+        self.is_sending: Optional[Callable[[str], bool]] = is_sending
+        self.delay_ms: int = max(delay_ms, 0)
+        self.pending: dict[str, None] = {}
+        self.in_flight: set[str] = set()
+        self.first_edit_time: float = 0.
+        self.edit_count: int = 0
+        self.request_count: int = 0
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.flush)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.pending or key in self.in_flight
+
+    @property
+    def is_idle(self) -> bool:
+        return not self.pending and not self.in_flight
+
+    def mark(self, key: str) -> None:
+        self.edit_count += 1
+        if not self.pending:
+            self.first_edit_time = monotonic()
+        self.pending[key] = None
+        # Окно откладывается с каждой правкой, но не дольше MAX_DELAY_FACTOR окон от первой
+        remaining_ms: float = self.MAX_DELAY_FACTOR * self.delay_ms - (monotonic() - self.first_edit_time) * 1000
+        self.timer.start(int(max(min(self.delay_ms, remaining_ms), 0)))
+
+    def is_in_flight(self, key: str) -> bool:
+        return key in self.in_flight and (self.is_sending is None or self.is_sending(key))
+
+    def flush(self, is_final: bool = False) -> None:
+        # При закрытии программы отправляется всё: журнал сохранит правки и отправит их после предыдущих
+        self.timer.stop()
+        for key in [key for key in self.pending if is_final or not self.is_in_flight(key)]:
+            del self.pending[key]
+            self.in_flight.add(key)
+            self.request_count += 1
+            self.send(key)
+
+    def finish(self, key: str) -> None:
+        self.in_flight.discard(key)
+        if key in self.pending and not self.timer.isActive():
+            self.timer.start(self.delay_ms)
+
+    def is_pending(self, key: str) -> bool:
+        return key in self.pending
+
+    def get_statistics(self) -> dict[str, int]:
+        return {
+            'edits': self.edit_count,
+            'requests': self.request_count,
+            'saved': self.edit_count - self.request_count - len(self.pending),
+            'pending': len(self.pending),
+        }
@@ -0,0 +1,133 @@
+import os
+import json
+import time
+import hashlib
+from collections import OrderedDict
+from typing import Optional
+
+from globals import settings, logger, root_directory
+
+# Разделитель владельца и ключа в имени файла: owner@key.wav
+OWNER_SEPARATOR: str = '@'
+
+class AudioCache():
+    """
+    Synthesized announcements on disk, addressed by a hash of the fields the sound depends on.
+    Entries are evicted least-recently-used first once the cache exceeds its size limit,
+    and expire after max_age seconds in case the server changes its texts.
+    The row that owns an entry is a prefix of its file name, so invalidation by owner
+    also finds entries left from a previous run.
+    """
+
+    def __init__(self, directory: str, max_size: int, max_age: int, file_format: str) -> None:
+        self.directory: str = directory
+        self.max_size: int = max_size
+        self.max_age: int = max_age
+        self.file_format: str = file_format
+        self.entries: OrderedDict[str, tuple[int, float]] = OrderedDict()
+        self.owners: dict[str, set[str]] = {}
+        self.entry_owners: dict[str, str] = {}
+        self.size: int = 0
+        self.hit_count: int = 0
+        self.miss_count: int = 0
+        self.eviction_count: int = 0
+        os.makedirs(self.directory, exist_ok=True)
+        self.scan()
+
+    @staticmethod
+    def make_key(endpoint: str, fields: dict) -> str:
+        payload: str = json.dumps([endpoint, fields], sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get_path(self, key: str, owner: Optional[str] = None) -> str:
+        owner = owner if owner is not None else self.entry_owners.get(key)
+        return os.path.join(self.directory, (owner+OWNER_SEPARATOR if owner else '')+key+self.file_format)
+
+    def scan(self) -> None:
+        files: list[os.DirEntry] = [entry for entry in os.scandir(self.directory) if entry.is_file() and entry.name.endswith(self.file_format)]
+        for entry in sorted(files, key=lambda entry: entry.stat().st_mtime):
+            stat = entry.stat()
+            owner, _, key = entry.name[:-len(self.file_format)].rpartition(OWNER_SEPARATOR)
+            if key in self.entries:
+                # Тот же звук, сохранённый для другого владельца; остаётся более поздний
+                self.remove(key)
+            self.entries[key] = (stat.st_size, stat.st_mtime)
+            self.size += stat.st_size
+            if owner:
+                self.entry_owners[key] = owner
+                self.owners.setdefault(owner, set()).add(key)
+        for key in [key for key, (_, created) in self.entries.items() if self.is_expired(created)]:
+            self.remove(key)
+        self.evict()
+
+    def is_expired(self, created: float) -> bool:
+        return self.max_age > 0 and time.time() - created > self.max_age
+
+    def get(self, key: str) -> Optional[bytes]:
+        entry: Optional[tuple[int, float]] = self.entries.get(key)
+        if entry is not None and self.is_expired(entry[1]):
+            self.remove(key)
+            entry = None
+        if entry is None:
+            self.miss_count += 1
+            return None
+        try:
+            with open(self.get_path(key), 'rb') as sound_file:
+                data: bytes = sound_file.read()
+        except OSError:
+            self.remove(key)
+            self.miss_count += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hit_count += 1
+        return data
+
+    def put(self, key: str, data: bytes, owner: Optional[str] = None) -> None:
+        if not data or len(data) > self.max_size:
+            return
+        if key in self.entries and self.entry_owners.get(key) != owner:
+            self.remove(key)
+        temp_path: str = self.get_path(key, owner)+'.tmp'
+        try:
+            with open(temp_path, 'wb') as sound_file:
+                sound_file.write(data)
+            os.replace(temp_path, self.get_path(key, owner))
+        except OSError as err:
+            logger.error(f"Не удалось сохранить звук в кэш: {err}")
+            return
+        if key in self.entries:
+            self.size -= self.entries[key][0]
+        self.entries[key] = (len(data), time.time())
+        self.entries.move_to_end(key)
+        self.size += len(data)
+        if owner is not None:
+            self.entry_owners[key] = owner
+            self.owners.setdefault(owner, set()).add(key)
+        self.evict()
+
+    def invalidate(self, owner: str) -> None:
+        for key in self.owners.pop(owner, set()):
+            self.remove(key)
+
+    def remove(self, key: str) -> None:
+        if (entry := self.entries.pop(key, None)) is None:
+            return
+        self.size -= entry[0]
+        try:
+            os.unlink(self.get_path(key))
+        except OSError:
+            pass
+        if (owner := self.entry_owners.pop(key, None)) is not None and owner in self.owners:
+            self.owners[owner].discard(key)
+            if not self.owners[owner]:
+                del self.owners[owner]
+
+    def evict(self) -> None:
+        while self.size > self.max_size and self.entries:
+            self.remove(next(iter(self.entries)))
+            self.eviction_count += 1
+
+    def get_statistics_text(self) -> str:
+        return f"Кэш звука: {self.hit_count} попаданий, {self.miss_count} промахов, {self.size / 1_048_576:.1f} МБ"
+
+audio_cache: AudioCache = AudioCache(os.path.join(root_directory, 'cache', 'audio'), settings.audio_cache_size_mb * 1_048_576, settings.audio_cache_max_age_hours * 3600, settings.file_format)
@@ -0,0 +1,32 @@
+import io
+from typing import Optional
+
+import numpy as np
+import soundfile as sf
+
+from Audio.Resample import convert_frames
+
+class PreparedSound():
+    """Decoded announcement with its frames converted for the output kept next to it, one per output rate."""
+
+    def __init__(self, data: bytes, frames: np.ndarray, samplerate: int) -> None:
+        self.data: bytes = data
+        self.frames: np.ndarray = frames
+        self.samplerate: int = samplerate
+        self.converted: dict[int, np.ndarray] = {}
+
+    @property
+    def duration(self) -> float:
+        return len(self.frames) / self.samplerate
+
+    def get_frames(self, samplerate: int) -> np.ndarray:
+        if samplerate not in self.converted:
+            self.converted[samplerate] = convert_frames(self.frames, self.samplerate, samplerate)
+        return self.converted[samplerate]
+
+def decode_sound(data: bytes, output_samplerate: Optional[int] = None) -> PreparedSound:
+    frames, samplerate = sf.read(io.BytesIO(data), dtype='float32')
+    prepared = PreparedSound(data, frames, samplerate)
+    if output_samplerate is not None:
+        prepared.get_frames(output_samplerate)
+    return prepared
@@ -0,0 +1,186 @@
+import threading
+from typing import Optional
+
+import numpy as np
+import sounddevice as sd
+from PySide6.QtCore import QObject, QTimer, Signal
+
+from globals import logger
+from Audio.Stream import BLOCK_FRAMES
+
+DUCK_MODES: tuple[str] = ('duck', 'pause', 'off')
+REOPEN_DELAYS_MS: tuple[int] = (500, 1000, 2000, 5000, 10000)
+
+class AudioMixer(QObject):
+    """
+    One multichannel output stream shared by all announcements. Every voice is a mono source routed
+    to its own output channels; the voices are summed block by block in the output callback,
+    so announcements for disjoint zones play at the same time. The stream is opened once at startup
+    and plays silence when idle; if it stops or cannot be opened, it is reopened with a growing delay
+    and the voices continue from where they were. If the device refuses the channel count,
+    everything is played on channel 1.
+
+    Background voices are a lower-priority bus: while a schedule voice plays in one of their zones
+    they are ramped down to the duck gain, or to silence and paused in place, and ramped back up after it.
+    """
+
+    # Сигнал из потока звуковой карты о завершении потока вывода
+    stopped_signal: Signal = Signal()
+
+    def __init__(self, device: Optional[int], samplerate: int, channels: int, blocksize: int = 0, latency: str | float = 'low', duck_mode: str = 'duck', duck_db: float = 15, ramp_ms: int = 150, parent=None) -> None:
+        super().__init__(parent)
+        self.device: Optional[int] = device
+        self.samplerate: int = samplerate
+        self.requested_channels: int = channels
+        self.channels: int = channels
+        self.blocksize: int = blocksize
+        self.latency: str | float = latency
+        self.duck_mode: str = duck_mode if duck_mode in DUCK_MODES else 'duck'
+        self.duck_gain: float = 0. if self.duck_mode == 'pause' else 10 ** (-abs(duck_db) / 20)
+        # Изменение усиления за один кадр, полный переход 0..1 занимает ramp_ms
+        self.ramp_step: float = 1000 / (max(ramp_ms, 1) * samplerate)
+        self.output: Optional[sd.OutputStream] = None
+        # Список голосов заменяется целиком, поток звуковой карты читает его без блокировки
+        self.voices: tuple = ()
+        self.routes: dict = {}
+        self.gains: dict = {}
+        self.duck_count: int = 0
+        self.lock = threading.Lock()
+        self.block: np.ndarray = np.zeros(BLOCK_FRAMES, dtype='float32')
+        self.is_closing: bool = False
+        self.reopen_attempt: int = 0
+        self.reopen_count: int = 0
+        self.measured_latency: float = 0.
+        self.reopen_timer = QTimer(self)
+        self.reopen_timer.setSingleShot(True)
+        self.reopen_timer.timeout.connect(self.start)
+        self.stopped_signal.connect(self.on_stopped)
+
+    @property
+    def is_mono(self) -> bool:
+        return self.channels == 1
+
+    @property
+    def is_ducking(self) -> bool:
+        return self.duck_mode != 'off'
+
+    def open(self) -> None:
+        if self.output is not None:
+            return
+        try:
+            self.output = self.open_output(self.requested_channels)
+            self.channels = self.requested_channels
+        except sd.PortAudioError:
+            self.output = self.open_output(1)
+            self.channels = 1
+        with self.lock:
+            self.routes = {voice: self.get_route(voice.mapping) for voice in self.routes}
+        self.output.start()
+        logger.info(f"Звуковой вывод открыт: каналов {self.channels}, {self.samplerate} Гц, блок {self.output.blocksize or 'по выбору драйвера'}, задержка {self.output.latency * 1000:.0f} мс")
+
+    def open_output(self, channels: int) -> sd.OutputStream:
+        return sd.OutputStream(device=self.device, samplerate=self.samplerate, channels=channels, dtype='float32',
+            blocksize=self.blocksize, latency=self.latency, callback=self.callback, finished_callback=self.stopped_signal.emit)
+
+    def start(self) -> None:
+        try:
+            self.open()
+        except sd.PortAudioError as err:
+            self.output = None
+            delay: int = REOPEN_DELAYS_MS[min(self.reopen_attempt, len(REOPEN_DELAYS_MS)-1)]
+            self.reopen_attempt += 1
+            logger.error(f"Не удалось открыть звуковое устройство ({err}), повтор через {delay} мс")
+            self.reopen_timer.start(delay)
+            return
+        if self.reopen_attempt:
+            self.reopen_count += 1
+        self.reopen_attempt = 0
+
+    def on_stopped(self) -> None:
+        if self.is_closing or self.output is None or self.output.active:
+            return
+        logger.error("Поток звукового вывода остановлен, устройство будет открыто заново")
+        self.output.close(ignore_errors=True)
+        self.output = None
+        self.reopen_attempt = max(self.reopen_attempt, 1)
+        self.reopen_timer.start(REOPEN_DELAYS_MS[0])
+
+    def get_route(self, mapping: list[int]) -> np.ndarray:
+        return np.array(sorted({channel-1 for channel in mapping if 0 < channel <= self.channels}) or [0])
+
+    def add(self, voice) -> None:
+        if self.output is None and not self.reopen_timer.isActive():
+            self.open()
+        with self.lock:
+            self.routes[voice] = self.get_route(voice.mapping)
+            self.gains[voice] = 1.
+            self.voices = (*self.voices, voice)
+
+    def remove(self, voice) -> bool:
+        with self.lock:
+            if voice not in self.routes:
+                return False
+            del self.routes[voice]
+            del self.gains[voice]
+            self.voices = tuple(item for item in self.voices if item is not voice)
+            return True
+
+    def get_envelope(self, gain: float, target: float, frames: int) -> np.ndarray:
+        ramp: np.ndarray = gain + np.copysign(self.ramp_step, target - gain) * np.arange(1, frames+1)
+        return np.minimum(ramp, target) if target > gain else np.maximum(ramp, target)
+
+    def callback(self, outdata: np.ndarray, frames: int, time, status: sd.CallbackFlags) -> None:
+        self.measured_latency = time.outputBufferDacTime - time.currentTime
+        outdata.fill(0)
+        if len(self.block) < frames:
+            self.block = np.zeros(frames, dtype='float32')
+        block: np.ndarray = self.block[:frames]
+        voices: tuple = self.voices
+        busy_zones: set[int] = set().union(*(voice.zones for voice in voices if not voice.is_background)) if self.is_ducking else set()
+        finished: list = []
+        for voice in voices:
+            route: Optional[np.ndarray] = self.routes.get(voice)
+            if route is None:
+                continue
+            gain: float = self.gains.get(voice, 1.)
+            target: float = self.duck_gain if voice.is_background and not busy_zones.isdisjoint(voice.zones) else 1.
+            if gain == 0. and target == 0.:
+                # Приостановленное фоновое объявление не читает источник и продолжится с того же места
+                continue
+            if not voice.render(block):
+                finished.append(voice)
+            if gain != target:
+                if gain == 1.:
+                    self.duck_count += 1
+                envelope: np.ndarray = self.get_envelope(gain, target, frames)
+                block *= envelope
+                with self.lock:
+                    # Голос могли убрать из потока интерфейса, его усиление не должно вернуться в словарь
+                    if voice in self.routes:
+                        self.gains[voice] = float(envelope[-1])
+            elif gain != 1.:
+                block *= gain
+            outdata[:, route] += block[:, np.newaxis]
+        np.clip(outdata, -1., 1., out=outdata)
+        for voice in finished:
+            if self.remove(voice):
+                voice.drained_signal.emit()
+
+    def get_statistics(self) -> dict[str, float]:
+        return {
+            'reported_latency_ms': round(self.output.latency * 1000) if self.output is not None else None,
+            'measured_latency_ms': round(self.measured_latency * 1000),
+            'reopened': self.reopen_count,
+            'background_ducked': self.duck_count,
+        }
+
+    def close(self) -> None:
+        self.is_closing = True
+        self.reopen_timer.stop()
+        with self.lock:
+            self.voices = ()
+            self.routes.clear()
+            self.gains.clear()
+        if self.output is not None:
+            self.output.close(ignore_errors=True)
+            self.output = None
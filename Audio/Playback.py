@@ -0,0 +1,122 @@
+from enum import Enum
+from typing import Optional
+
+import numpy as np
+import sounddevice as sd
+from PySide6.QtCore import QObject, Signal
+
+from Audio.Mixer import AudioMixer
+from Audio.Resample import to_mono
+from Audio.Stream import AudioStream, RingBuffer
+
+class PlaybackState(Enum):
+    QUEUED = 'queued'
+    BUFFERING = 'buffering'
+    PLAYING = 'playing'
+    DONE = 'done'
+    FAILED = 'failed'
+
+class FrameSource():
+    """Already decoded frames, read by the output callback like a finished ring buffer."""
+
+    def __init__(self, frames: np.ndarray) -> None:
+        self.frames: np.ndarray = to_mono(frames)
+        self.position: int = 0
+        self.is_finished: bool = True
+
+    def available(self) -> int:
+        return len(self.frames) - self.position
+
+    def read_into(self, out: np.ndarray) -> int:
+        count: int = min(len(out), self.available())
+        out[:count] = self.frames[self.position:self.position+count]
+        self.position += count
+        return count
+
+class PlaybackSession(QObject):
+    """
+    One announcement as a voice of the shared mixer, routed to its zone channels and the listen channel.
+    The session is done as soon as the mixer has played its last frames.
+    State changes are emitted on the GUI thread: queued (accepted by the scheduler), buffering (streaming only),
+    playing, done, failed.
+    """
+    state_signal: Signal = Signal(PlaybackState)
+    error_signal: Signal = Signal(str)
+    # Сигнал из потока звуковой карты, обрабатывается в потоке интерфейса
+    drained_signal: Signal = Signal()
+
+    def __init__(self, mixer: AudioMixer, zones: list[int], listen_channel: int, is_background: bool = False, parent=None) -> None:
+        super().__init__(parent)
+        self.mixer: AudioMixer = mixer
+        self.zones: frozenset[int] = frozenset(zones)
+        self.mapping: list[int] = [*zones, listen_channel]
+        self.is_background: bool = is_background
+        self.state: PlaybackState = PlaybackState.QUEUED
+        self.source: Optional[FrameSource | RingBuffer] = None
+        self.stream: Optional[AudioStream] = None
+        self.is_started: bool = False
+        self.underrun_count: int = 0
+        self.drained_signal.connect(self.on_drained)
+
+    def set_state(self, state: PlaybackState) -> None:
+        self.state = state
+        self.state_signal.emit(state)
+
+    def is_active(self) -> bool:
+        return self.state not in (PlaybackState.DONE, PlaybackState.FAILED)
+
+    def play_frames(self, frames: np.ndarray) -> None:
+        if self.is_active():
+            self.source = FrameSource(frames)
+            self.start_output()
+
+    def play_stream(self, stream: AudioStream) -> None:
+        if not self.is_active():
+            stream.close()
+            return
+        self.stream = stream
+        stream.preroll_signal.connect(self.start_output)
+        stream.error_signal.connect(self.fail)
+        self.source = stream.open(self.mixer.samplerate)
+        self.set_state(PlaybackState.BUFFERING)
+
+    def start_output(self) -> None:
+        if not self.is_active() or self.is_started:
+            return
+        try:
+            self.mixer.add(self)
+        except sd.PortAudioError as err:
+            self.fail(f"Ошибка воспроизведения: {err}")
+            return
+        self.is_started = True
+        self.set_state(PlaybackState.PLAYING)
+
+    def render(self, block: np.ndarray) -> bool:
+        count: int = self.source.read_into(block)
+        block[count:] = 0
+        if count < len(block):
+            if self.source.is_finished and self.source.available() == 0:
+                return False
+            self.underrun_count += 1
+        return True
+
+    def on_drained(self) -> None:
+        if self.is_active():
+            self.release()
+            self.set_state(PlaybackState.DONE)
+
+    def fail(self, error_message: str) -> None:
+        if self.is_active():
+            self.release()
+            self.set_state(PlaybackState.FAILED)
+            self.error_signal.emit(error_message)
+
+    def stop(self) -> None:
+        if self.is_active():
+            self.release()
+            self.state = PlaybackState.DONE
+
+    def release(self) -> None:
+        if self.stream is not None:
+            self.stream.close()
+        self.mixer.remove(self)
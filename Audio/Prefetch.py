@@ -0,0 +1,117 @@
+import time
+import asyncio
+from datetime import datetime, timedelta
+from typing import Optional
+from PySide6 import QtNetwork
+
+from globals import settings, logger
+from API.Client import api_client
+from Audio.Cache import audio_cache
+from Audio.Decoder import PreparedSound, decode_sound
+
+class AudioPrefetcher():
+    """
+    Fetches and decodes the sounds of autoplay jobs due within the look-ahead window, one at a time,
+    so a due announcement starts from memory instead of waiting for synthesis.
+    A prepared sound is kept only while its key still matches the row.
+    """
+
+    def __init__(self, table, look_ahead_minutes: int) -> None:
+        self.table = table
+        self.look_ahead: timedelta = timedelta(minutes=look_ahead_minutes)
+        self.ready: dict[str, tuple[str, PreparedSound]] = {}
+        self.pending: list[str] = []
+        self.task: Optional[asyncio.Future] = None
+        self.prefetch_count: int = 0
+        self.start_count: int = 0
+        self.prefetched_start_count: int = 0
+        self.start_delay_total: float = 0.
+        self.start_delay_max: float = 0.
+        self.trigger_delay_total: float = 0.
+        self.trigger_delay_max: float = 0.
+
+    def get_upcoming(self) -> list[str]:
+        return self.table.autoplay_queue.due_before(datetime.now() + self.look_ahead)
+
+    def is_ready(self, schedule_id: str) -> bool:
+        entry: Optional[tuple[str, PreparedSound]] = self.ready.get(schedule_id)
+        data: Optional[dict] = self.table.data_origin.get(schedule_id)
+        return entry is not None and data is not None and entry[0] == self.table.make_sound_key(data)
+
+    def update(self) -> None:
+        if settings.autoplay != 1 or self.look_ahead <= timedelta(0):
+            self.ready.clear()
+            self.pending = []
+            return
+        upcoming: list[str] = self.get_upcoming()
+        for schedule_id in [schedule_id for schedule_id in self.ready if schedule_id not in upcoming]:
+            del self.ready[schedule_id]
+        self.pending = [schedule_id for schedule_id in upcoming if not self.is_ready(schedule_id)]
+        if self.pending and (self.task is None or self.task.done()):
+            self.task = asyncio.ensure_future(self.run())
+
+    async def run(self) -> None:
+        while self.pending:
+            schedule_id: str = self.pending.pop(0)
+            data: Optional[dict] = self.table.data_origin.get(schedule_id)
+            if data is None or self.is_ready(schedule_id) or self.table.sound_data_check(data) or not self.table.get_current_languages(data):
+                continue
+            sound_key: str = self.table.make_sound_key(data)
+            sound: Optional[bytes] = audio_cache.get(sound_key)
+            if sound is None:
+                request, body = self.table.create_sound_request(data, is_autoplay=True)
+                sound = await api_client.fetch(request, lambda reply: self.on_audio_file(reply, sound_key, schedule_id), body.toJson())
+            if not sound:
+                continue
+            try:
+                prepared: PreparedSound = await asyncio.get_running_loop().run_in_executor(None, decode_sound, sound, settings.device.get('samplerate'))
+            except (RuntimeError, ValueError) as err:
+                logger.error(f"Не удалось подготовить звук объявления {schedule_id}: {err}")
+                continue
+            self.ready[schedule_id] = (sound_key, prepared)
+            self.prefetch_count += 1
+
+    def on_audio_file(self, reply: QtNetwork.QNetworkReply, sound_key: str, schedule_id: str) -> Optional[bytes]:
+        match reply.error():
+            case QtNetwork.QNetworkReply.NetworkError.NoError:
+                sound: bytes = reply.readAll().data()
+                audio_cache.put(sound_key, sound, schedule_id)
+                return sound
+            case _:
+                logger.warning(f"Звук объявления {schedule_id} не получен заранее: {reply.errorString()}")
+                return None
+
+    def stop(self) -> None:
+        self.pending = []
+        if self.task is not None and not self.task.done():
+            self.task.cancel()
+
+    def take(self, schedule_id: str, sound_key: str) -> Optional[PreparedSound]:
+        entry: Optional[tuple[str, PreparedSound]] = self.ready.pop(schedule_id, None)
+        if entry is not None and entry[0] == sound_key:
+            return entry[1]
+        return None
+
+    def record_start(self, data: dict, is_prefetched: bool, trigger_time: float) -> None:
+        planned: datetime = datetime.strptime(data.get('job_datetime'), '%Y-%m-%d %H:%M')
+        start_delay: float = (datetime.now() - planned).total_seconds()
+        trigger_delay: float = time.perf_counter() - trigger_time
+        self.start_count += 1
+        self.prefetched_start_count += is_prefetched
+        self.start_delay_total += start_delay
+        self.start_delay_max = max(self.start_delay_max, start_delay)
+        self.trigger_delay_total += trigger_delay
+        self.trigger_delay_max = max(self.trigger_delay_max, trigger_delay)
+        logger.info(f"Автозапуск {data.get('schedule_id')}: по плану {planned:%H:%M}, фактически через {start_delay:.1f} с, от срабатывания до звука {trigger_delay*1000:.0f} мс ({('звук запрошен при запуске', 'звук подготовлен заранее')[is_prefetched]})")
+
+    def get_statistics(self) -> dict[str, float]:
+        count: int = max(self.start_count, 1)
+        return {
+            'prefetched': self.prefetch_count,
+            'autoplay_starts': self.start_count,
+            'started_from_prefetch': self.prefetched_start_count,
+            'average_start_delay_s': round(self.start_delay_total / count, 2),
+            'max_start_delay_s': round(self.start_delay_max, 2),
+            'average_trigger_to_sound_ms': round(self.trigger_delay_total / count * 1000),
+            'max_trigger_to_sound_ms': round(self.trigger_delay_max * 1000),
+        }
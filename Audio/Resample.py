@@ -0,0 +1,105 @@
+from math import gcd, ceil
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Число переходов через ноль sinc-фильтра с каждой стороны и параметр окна Кайзера
+ZERO_CROSSINGS: int = 16
+KAISER_BETA: float = 8.6
+ROLLOFF: float = 0.94
+
+def to_mono(frames: np.ndarray) -> np.ndarray:
+    if frames.ndim > 1:
+        return frames.mean(axis=1, dtype='float32') if frames.shape[1] > 1 else frames[:, 0]
+    return frames
+
+def design_filter(up: int, down: int) -> tuple[np.ndarray, int]:
+    """Windowed-sinc low-pass filter split into `up` phases; returns the phases (taps reversed) and the half length."""
+    factor: int = max(up, down)
+    half: int = ZERO_CROSSINGS * factor
+    taps: np.ndarray = np.arange(-half, half+1)
+    cutoff: float = ROLLOFF / factor
+    kernel: np.ndarray = cutoff * np.sinc(cutoff * taps) * np.kaiser(len(taps), KAISER_BETA) * up
+    length: int = ceil(len(kernel) / up)
+    kernel = np.pad(kernel, (0, length * up - len(kernel)))
+    # phases[p, k] = kernel[p + k*up], развёрнуто для скалярного произведения с окном входа
+    return np.ascontiguousarray(kernel.reshape(length, up).T[:, ::-1], dtype='float32'), half
+
+class Resampler():
+    """
+    Polyphase resampler by the rational factor target/source for mono float32 blocks.
+    Every output sample is the dot product of one filter phase with a window of the input;
+    outputs sharing a phase are computed together as one strided matrix-vector product,
+    so the Python loop runs over the phases only. Keeps its history between blocks, so the decoder
+    of a stream can feed it block by block; flush() returns the tail.
+    """
+
+    def __init__(self, source_rate: int, target_rate: int) -> None:
+        divisor: int = gcd(source_rate, target_rate)
+        self.up: int = target_rate // divisor
+        self.down: int = source_rate // divisor
+        self.phases, self.half = design_filter(self.up, self.down)
+        self.taps: int = self.phases.shape[1]
+        self.inverse_down: int = pow(self.down, -1, self.up) if self.up > 1 else 0
+        # Буфер входа начинается с индекса offset; перед началом сигнала нули
+        self.buffer: np.ndarray = np.zeros(self.taps - 1, dtype='float32')
+        self.offset: int = -(self.taps - 1)
+        self.input_count: int = 0
+        self.output_count: int = 0
+
+    @property
+    def is_identity(self) -> bool:
+        return self.up == self.down
+
+    def get_base(self, output_index: int) -> int:
+        return (output_index * self.down + self.half) // self.up
+
+    def process(self, block: np.ndarray) -> np.ndarray:
+        block = to_mono(block).astype('float32', copy=False)
+        if self.is_identity:
+            return block
+        self.input_count += len(block)
+        self.buffer = np.concatenate((self.buffer, block))
+        last: int = self.offset + len(self.buffer) - 1
+        # Выход n готов, когда получен вход с индексом get_base(n)
+        end: int = (last * self.up - self.half) // self.down + 1 if last * self.up >= self.half else 0
+        return self.render(max(end, self.output_count))
+
+    def flush(self) -> np.ndarray:
+        if self.is_identity:
+            return np.zeros(0, dtype='float32')
+        total: int = ceil(self.input_count * self.up / self.down)
+        tail: int = self.get_base(max(total - 1, 0)) - (self.offset + len(self.buffer) - 1)
+        if tail > 0:
+            self.buffer = np.concatenate((self.buffer, np.zeros(tail, dtype='float32')))
+        return self.render(max(total, self.output_count))
+
+    def render(self, end: int) -> np.ndarray:
+        start: int = self.output_count
+        count: int = end - start
+        output: np.ndarray = np.zeros(count, dtype='float32')
+        if count > 0:
+            windows: np.ndarray = sliding_window_view(self.buffer, self.taps)
+            first_phase: int = (start * self.down + self.half) % self.up
+            for phase in range(self.up):
+                # Первый выход с этой фазой; следующие идут через up выходов, их окна через down входов
+                first: int = start + ((phase - first_phase) * self.inverse_down) % self.up if self.up > 1 else start
+                if first >= end:
+                    continue
+                phase_count: int = (end - first + self.up - 1) // self.up
+                window_start: int = self.get_base(first) - self.taps + 1 - self.offset
+                output[first-start::self.up] = windows[window_start:window_start + phase_count * self.down:self.down] @ self.phases[phase]
+            self.output_count = end
+        # Вход, который больше не понадобится, отбрасывается
+        keep_from: int = self.get_base(self.output_count) - self.taps + 1 - self.offset
+        if keep_from > 0:
+            self.buffer = self.buffer[keep_from:]
+            self.offset += keep_from
+        return output
+
+def convert_frames(frames: np.ndarray, source_rate: int, target_rate: int) -> np.ndarray:
+    """Mono float32 frames at the output rate; the mixer routes them to the zone channels."""
+    resampler = Resampler(source_rate, target_rate)
+    if resampler.is_identity:
+        return np.ascontiguousarray(to_mono(frames), dtype='float32')
+    return np.concatenate((resampler.process(frames), resampler.flush()))
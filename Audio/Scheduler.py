@@ -0,0 +1,159 @@
+import heapq
+import itertools
+from enum import IntEnum
+from datetime import datetime
+from typing import Any, Optional
+from PySide6.QtCore import QObject, QTimer, Signal
+
+STALE_POLICIES: tuple[str] = ('play', 'skip')
+
+class PlaybackPriority(IntEnum):
+    MANUAL = 0
+    AUTOPLAY = 1
+    BACKGROUND = 2
+
+class PlaybackJob():
+    """One queued announcement and, once started, the state of its playback."""
+
+    def __init__(self, priority: PlaybackPriority, key: str, row_id: str, table: Any, buttons: Any, zones: list[int], is_exclusive: bool = False, planned: Optional[datetime] = None, deadline: Optional[datetime] = None) -> None:
+        self.priority: PlaybackPriority = priority
+        self.key: str = key
+        self.row_id: str = row_id
+        self.table = table
+        self.buttons = buttons
+        self.zones: list[int] = zones
+        # Объявление занимает всё устройство и не звучит одновременно с другими
+        self.is_exclusive: bool = is_exclusive
+        self.submitted: datetime = datetime.now()
+        self.planned: Optional[datetime] = planned
+        self.deadline: Optional[datetime] = deadline
+        self.is_canceled: bool = False
+        self.data: dict = {}
+        self.languages: list[int] = []
+        self.session = None
+        self.prepared_sound = None
+        self.sound_task: Optional[Any] = None
+        self.requested_time: Optional[float] = None
+
+    @property
+    def is_autoplay(self) -> bool:
+        return self.priority == PlaybackPriority.AUTOPLAY
+
+    @property
+    def is_background(self) -> bool:
+        return self.priority == PlaybackPriority.BACKGROUND
+
+    def is_stale(self) -> bool:
+        return self.deadline is not None and datetime.now() > self.deadline
+
+    def conflicts(self, other: 'PlaybackJob') -> bool:
+        return self.is_exclusive or other.is_exclusive or not set(self.zones).isdisjoint(other.zones)
+
+    def __repr__(self) -> str:
+        return f"PlaybackJob({self.priority.name}, {self.key})"
+
+class PlaybackScheduler(QObject):
+    """
+    Single playback queue for both tables: manual before autoplay before background,
+    then by planned time (autoplay) or submission time. A key that is queued or playing is not queued twice;
+    a higher priority submission replaces the queued one. Jobs past their deadline are skipped or played
+    according to the stale policy. Jobs for disjoint zones play at the same time; a waiting job keeps its zones
+    from being taken by jobs further down the queue. With ducking, background jobs do not hold back
+    schedule jobs in the same zones: the mixer lowers the background under them.
+    """
+    job_signal: Signal = Signal(PlaybackJob)
+    skipped_signal: Signal = Signal(PlaybackJob)
+
+    def __init__(self, stale_policy: str = 'play', is_ducking: bool = False, parent=None) -> None:
+        super().__init__(parent)
+        self.stale_policy: str = stale_policy if stale_policy in STALE_POLICIES else 'play'
+        self.is_ducking: bool = is_ducking
+        self.queue: list[tuple[int, datetime, int, PlaybackJob]] = []
+        self.jobs: dict[str, PlaybackJob] = {}
+        self.playing: dict[str, PlaybackJob] = {}
+        self.sequence = itertools.count()
+        self.is_start_pending: bool = False
+        self.submitted_count: int = 0
+        self.deduplicated_count: int = 0
+        self.skipped_count: int = 0
+        self.late_count: int = 0
+        self.started_count: int = 0
+        self.parallel_max: int = 0
+
+    def __len__(self) -> int:
+        return len(self.jobs)
+
+    def submit(self, job: PlaybackJob) -> bool:
+        self.submitted_count += 1
+        queued: Optional[PlaybackJob] = self.jobs.get(job.key)
+        if job.key in self.playing or (queued is not None and queued.priority <= job.priority):
+            self.deduplicated_count += 1
+            return False
+        if queued is not None:
+            queued.is_canceled = True
+        self.jobs[job.key] = job
+        heapq.heappush(self.queue, (job.priority, job.planned or job.submitted, next(self.sequence), job))
+        self.schedule_start()
+        return True
+
+    def cancel(self, key: str) -> None:
+        if (job := self.jobs.pop(key, None)) is not None:
+            job.is_canceled = True
+
+    def conflicts(self, job: PlaybackJob, other: PlaybackJob) -> bool:
+        if self.is_ducking and job.is_background != other.is_background:
+            return False
+        return job.conflicts(other)
+
+    def is_blocked(self, job: PlaybackJob) -> bool:
+        return any(self.conflicts(job, other) for other in self.playing.values())
+
+    def schedule_start(self) -> None:
+        # Следующее объявление запускается из цикла событий, а не внутри обработчика завершения предыдущего
+        if not self.is_start_pending and self.jobs:
+            self.is_start_pending = True
+            QTimer.singleShot(0, self.start_next)
+
+    def start_next(self) -> None:
+        self.is_start_pending = False
+        reserved: list[PlaybackJob] = list(self.playing.values())
+        waiting: list[tuple[int, datetime, int, PlaybackJob]] = []
+        while self.queue:
+            entry: tuple[int, datetime, int, PlaybackJob] = heapq.heappop(self.queue)
+            job: PlaybackJob = entry[-1]
+            if job.is_canceled:
+                continue
+            if job.is_stale() and self.stale_policy == 'skip':
+                del self.jobs[job.key]
+                self.skipped_count += 1
+                self.skipped_signal.emit(job)
+                continue
+            is_blocked: bool = any(self.conflicts(job, other) for other in reserved)
+            reserved.append(job)
+            if is_blocked:
+                waiting.append(entry)
+                continue
+            del self.jobs[job.key]
+            self.late_count += job.is_stale()
+            self.playing[job.key] = job
+            self.started_count += 1
+            self.parallel_max = max(self.parallel_max, len(self.playing))
+            self.job_signal.emit(job)
+        for entry in waiting:
+            heapq.heappush(self.queue, entry)
+
+    def finish(self, job: PlaybackJob) -> None:
+        if self.playing.get(job.key) is job:
+            del self.playing[job.key]
+        self.schedule_start()
+
+    def get_statistics(self) -> dict[str, int]:
+        return {
+            'submitted': self.submitted_count,
+            'started': self.started_count,
+            'deduplicated': self.deduplicated_count,
+            'skipped_stale': self.skipped_count,
+            'played_late': self.late_count,
+            'max_parallel': self.parallel_max,
+            'queued': len(self.jobs),
+        }
@@ -0,0 +1,215 @@
+import threading
+from typing import Optional
+
+import numpy as np
+import soundfile as sf
+from PySide6.QtCore import QObject, Signal
+from PySide6 import QtNetwork
+
+from Audio.Resample import Resampler
+
+RING_SECONDS: int = 10
+BLOCK_FRAMES: int = 2048
+ID3V1_TAG_SIZE: int = 128
+
+class StreamReader():
+    """
+    File-like view of a reply that is still downloading, read by libsndfile from the decoder thread.
+    Reads wait for the next chunk; a seek past the received data into the last 128 bytes of a file
+    of known length (the ID3v1 tag at the end of an MP3) gets zeros, read as "no tag",
+    instead of waiting for the whole file.
+    """
+
+    def __init__(self) -> None:
+        self.data: bytearray = bytearray()
+        self.position: int = 0
+        self.length: Optional[int] = None
+        self.is_finished: bool = False
+        self.is_closed: bool = False
+        self.condition = threading.Condition()
+
+    def feed(self, chunk: bytes) -> None:
+        with self.condition:
+            self.data += chunk
+            self.condition.notify_all()
+
+    def finish(self) -> None:
+        with self.condition:
+            self.is_finished = True
+            self.length = len(self.data)
+            self.condition.notify_all()
+
+    def close(self) -> None:
+        with self.condition:
+            self.is_closed = True
+            self.condition.notify_all()
+
+    def is_tag_probe(self) -> bool:
+        # Нулями отвечаем только на переход в хвост файла известного размера, любое другое чтение ждёт данных
+        return (not self.is_finished and self.length is not None and self.position > len(self.data)
+            and self.length - ID3V1_TAG_SIZE <= self.position < self.length)
+
+    def read(self, size: int = -1) -> bytes:
+        with self.condition:
+            if self.is_tag_probe() and size > 0:
+                size = min(size, self.length - self.position)
+                self.position += size
+                return bytes(size)
+            # Неполное чтение libsndfile считает концом блока и пропускает кадры, поэтому ждём весь запрошенный размер
+            end: int = self.length if size < 0 or self.length is None else self.position + size
+            while (end is None or end > len(self.data)) and not self.is_finished and not self.is_closed:
+                self.condition.wait()
+            chunk: bytes = bytes(self.data[self.position:end])
+            self.position += len(chunk)
+            return chunk
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        with self.condition:
+            match whence:
+                case 0:
+                    self.position = offset
+                case 1:
+                    self.position += offset
+                case 2:
+                    self.position = (self.length if self.length is not None else len(self.data)) + offset
+            return self.position
+
+    def tell(self) -> int:
+        return self.position
+
+class RingBuffer():
+    """Mono float32 frames passed from the decoder thread to the audio callback."""
+
+    def __init__(self, capacity: int) -> None:
+        self.buffer: np.ndarray = np.zeros(capacity, dtype='float32')
+        self.capacity: int = capacity
+        self.read_position: int = 0
+        self.size: int = 0
+        self.is_finished: bool = False
+        self.is_closed: bool = False
+        self.condition = threading.Condition()
+
+    def available(self) -> int:
+        return self.size
+
+    def write(self, frames: np.ndarray) -> bool:
+        offset: int = 0
+        while offset < len(frames):
+            with self.condition:
+                while self.size == self.capacity and not self.is_closed:
+                    self.condition.wait()
+                if self.is_closed:
+                    return False
+                write_position: int = (self.read_position + self.size) % self.capacity
+                count: int = min(len(frames) - offset, self.capacity - self.size, self.capacity - write_position)
+                self.buffer[write_position:write_position+count] = frames[offset:offset+count]
+                self.size += count
+                offset += count
+        return True
+
+    def read_into(self, out: np.ndarray) -> int:
+        with self.condition:
+            count: int = min(len(out), self.size)
+            first: int = min(count, self.capacity - self.read_position)
+            out[:first] = self.buffer[self.read_position:self.read_position+first]
+            out[first:count] = self.buffer[:count-first]
+            self.read_position = (self.read_position + count) % self.capacity
+            self.size -= count
+            self.condition.notify_all()
+            return count
+
+    def finish(self) -> None:
+        with self.condition:
+            self.is_finished = True
+
+    def close(self) -> None:
+        with self.condition:
+            self.is_closed = True
+            self.condition.notify_all()
+
+class AudioStream(QObject):
+    """
+    Decodes an announcement while its reply is still arriving: chunks from readyRead are decoded in a thread,
+    resampled to the output rate block by block into a ring buffer, and preroll_signal is emitted
+    once pre-roll is buffered or the sound is fully decoded.
+    Signals may come from the decoder thread and should be connected to QObject slots.
+    """
+    preroll_signal: Signal = Signal()
+    error_signal: Signal = Signal(str)
+
+    def __init__(self, preroll_ms: int, parent=None) -> None:
+        super().__init__(parent)
+        self.preroll_ms: int = preroll_ms
+        self.reader = StreamReader()
+        self.ring: Optional[RingBuffer] = None
+        self.decoder: Optional[threading.Thread] = None
+        self.samplerate: int = 0
+        self.is_prerolled: bool = False
+        self.is_closed: bool = False
+
+    def open(self, samplerate: int) -> RingBuffer:
+        self.samplerate = samplerate
+        self.ring = RingBuffer(samplerate * RING_SECONDS)
+        if self.reader.length is not None or self.reader.is_finished:
+            self.start_decoder()
+        return self.ring
+
+    def attach(self, reply: QtNetwork.QNetworkReply) -> None:
+        reply.readyRead.connect(lambda: self.on_ready_read(reply))
+
+    def on_ready_read(self, reply: QtNetwork.QNetworkReply) -> None:
+        if self.reader.length is None and (length := reply.header(QtNetwork.QNetworkRequest.KnownHeaders.ContentLengthHeader)):
+            self.reader.length = int(length)
+        self.reader.feed(reply.readAll().data())
+        # Без Content-Length декодер не знает размер файла и запускается после получения ответа целиком
+        if self.reader.length is not None:
+            self.start_decoder()
+
+    def on_reply_finished(self, reply: QtNetwork.QNetworkReply) -> Optional[bytes]:
+        if reply.error() != QtNetwork.QNetworkReply.NetworkError.NoError:
+            self.reader.close()
+            if not self.is_closed:
+                self.error_signal.emit(f"Ошибка воспроизведения: {reply.errorString()}")
+            return None
+        self.reader.feed(reply.readAll().data())
+        self.reader.finish()
+        if len(self.reader.data) == 0:
+            if not self.is_closed:
+                self.error_signal.emit("Ошибка воспроизведения: Файл не сформирован.")
+            return None
+        self.start_decoder()
+        return bytes(self.reader.data)
+
+    def start_decoder(self) -> None:
+        if self.decoder is None and self.ring is not None and not self.is_closed:
+            self.decoder = threading.Thread(target=self.decode, daemon=True)
+            self.decoder.start()
+
+    def decode(self) -> None:
+        preroll_frames: int = self.samplerate * self.preroll_ms // 1000
+        try:
+            with sf.SoundFile(self.reader) as sound_file:
+                resampler = Resampler(sound_file.samplerate, self.samplerate)
+                for block in sound_file.blocks(BLOCK_FRAMES, dtype='float32', always_2d=True):
+                    if not self.ring.write(resampler.process(block)):
+                        return
+                    if not self.is_prerolled and self.ring.available() >= preroll_frames:
+                        self.is_prerolled = True
+                        self.preroll_signal.emit()
+                if not self.ring.write(resampler.flush()):
+                    return
+        except (RuntimeError, ValueError) as err:
+            if not self.is_closed:
+                self.error_signal.emit(f"Ошибка воспроизведения: Не удалось прочитать звук ({err})")
+            return
+        finally:
+            self.ring.finish()
+        if not self.is_prerolled:
+            self.is_prerolled = True
+            self.preroll_signal.emit()
+
+    def close(self) -> None:
+        self.is_closed = True
+        self.reader.close()
+        if self.ring is not None:
+            self.ring.close()
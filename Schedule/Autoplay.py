@@ -0,0 +1,64 @@
+import heapq
+from datetime import datetime
+from typing import Optional
+
+class AutoplayQueue():
+    """
+    Autoplay jobs by pre-parsed job time, with a min-heap of the jobs that have not fired yet.
+    Removed or rescheduled jobs are skipped when they reach the top of the heap, so add and remove
+    are O(log n) and only the next due time is looked at. Fired jobs are remembered with their time
+    until they are forgotten, so a job removed and added again on refresh does not fire twice
+    unless its time changes.
+    """
+
+    def __init__(self) -> None:
+        self.heap: list[tuple[datetime, str]] = []
+        self.due_times: dict[str, datetime] = {}
+        self.fired: dict[str, datetime] = {}
+
+    def __len__(self) -> int:
+        return len(self.due_times)
+
+    def __contains__(self, schedule_id: str) -> bool:
+        return schedule_id in self.due_times
+
+    def add(self, schedule_id: str, due: datetime) -> None:
+        if self.due_times.get(schedule_id) == due or self.fired.get(schedule_id) == due:
+            return
+        self.due_times[schedule_id] = due
+        heapq.heappush(self.heap, (due, schedule_id))
+
+    def remove(self, schedule_id: str) -> None:
+        if self.due_times.pop(schedule_id, None) is not None and len(self.heap) > 2 * len(self.due_times) + 64:
+            # Устаревших записей в куче стало больше действующих
+            self.heap = [entry for entry in self.heap if self.is_valid(entry)]
+            heapq.heapify(self.heap)
+
+    def forget(self, schedule_id: str) -> None:
+        # Строка удалена из расписания
+        self.remove(schedule_id)
+        self.fired.pop(schedule_id, None)
+
+    def clear(self) -> None:
+        self.heap.clear()
+        self.due_times.clear()
+        self.fired.clear()
+
+    def is_valid(self, entry: tuple[datetime, str]) -> bool:
+        return self.due_times.get(entry[1]) == entry[0]
+
+    def next_due(self) -> Optional[datetime]:
+        while self.heap and not self.is_valid(self.heap[0]):
+            heapq.heappop(self.heap)
+        return self.heap[0][0] if self.heap else None
+
+    def pop_due(self, now: datetime) -> list[tuple[str, datetime]]:
+        due_jobs: list[tuple[str, datetime]] = []
+        while (due := self.next_due()) is not None and due <= now:
+            _, schedule_id = heapq.heappop(self.heap)
+            self.fired[schedule_id] = due
+            due_jobs.append((schedule_id, due))
+        return due_jobs
+
+    def due_before(self, deadline: datetime) -> list[str]:
+        return [schedule_id for due, schedule_id in sorted((due, schedule_id) for schedule_id, due in self.due_times.items() if due <= deadline)]
@@ -0,0 +1,73 @@
+from bisect import bisect_left
+from typing import Any, Callable, Optional
+
+class ScheduleDiff():
+    def __init__(self) -> None:
+        self.removed: list[str] = []
+        self.inserted: dict[str, dict] = {}
+        self.updated: dict[str, dict[str, Any]] = {}
+        self.is_reordered: bool = False
+
+    def is_empty(self) -> bool:
+        return not (self.removed or self.inserted or self.updated or self.is_reordered)
+
+    def __repr__(self) -> str:
+        return f"ScheduleDiff(removed={len(self.removed)}, inserted={len(self.inserted)}, updated={len(self.updated)}, is_reordered={self.is_reordered})"
+
+def diff_schedule(old_rows: list[dict], new_rows: list[dict], protected_fields: Optional[dict[str, set[str]]] = None, key: str = 'schedule_id') -> ScheduleDiff:
+    diff = ScheduleDiff()
+    protected_fields = protected_fields or {}
+    old_by_key: dict[str, dict] = {data.get(key): data for data in old_rows}
+    new_keys: set[str] = set()
+    for new_data in new_rows:
+        row_key = new_data.get(key)
+        new_keys.add(row_key)
+        old_data: Optional[dict] = old_by_key.get(row_key)
+        if old_data is None:
+            diff.inserted[row_key] = new_data
+            continue
+        if old_data == new_data:
+            continue
+        skip: set[str] = protected_fields.get(row_key, set())
+        changes = {field: new_data.get(field) for field in old_data.keys() | new_data.keys() if field not in skip and old_data.get(field) != new_data.get(field)}
+        if changes:
+            diff.updated[row_key] = changes
+    diff.removed = [row_key for row_key in old_by_key if row_key not in new_keys]
+    kept_old_order = [data.get(key) for data in old_rows if data.get(key) in new_keys]
+    kept_new_order = [data.get(key) for data in new_rows if data.get(key) in old_by_key]
+    diff.is_reordered = kept_old_order != kept_new_order
+    return diff
+
+def merge_delta(rows: list[dict], changed: list[dict], deleted: list[str], sort_key: Callable[[dict], Any], key: str = 'schedule_id') -> list[dict]:
+    # Неизменённые строки переиспользуются как есть, поэтому diff_schedule сравнивает только изменённые
+    changed_by_key: dict[str, dict] = {data.get(key): data for data in changed}
+    deleted_keys: set[str] = set(deleted)
+    merged: list[dict] = [changed_by_key.pop(data.get(key), data) for data in rows if data.get(key) not in deleted_keys]
+    merged.extend(data for row_key, data in changed_by_key.items() if row_key not in deleted_keys)
+    merged.sort(key=sort_key)
+    return merged
+
+def stable_keys(current_keys: list[str], new_keys: list[str]) -> set[str]:
+    # Строки из наибольшей возрастающей подпоследовательности остаются на месте, остальные перемещаются
+    position: dict[str, int] = {key: indx for indx, key in enumerate(current_keys)}
+    sequence: list[str] = [key for key in new_keys if key in position]
+    tails: list[int] = []
+    tails_indx: list[int] = []
+    previous: list[int] = [-1] * len(sequence)
+    for indx, key in enumerate(sequence):
+        value: int = position[key]
+        tail_indx: int = bisect_left(tails, value)
+        if tail_indx > 0:
+            previous[indx] = tails_indx[tail_indx-1]
+        if tail_indx == len(tails):
+            tails.append(value)
+            tails_indx.append(indx)
+        else:
+            tails[tail_indx] = value
+            tails_indx[tail_indx] = indx
+    result: set[str] = set()
+    indx: int = tails_indx[-1] if tails_indx else -1
+    while indx != -1:
+        result.add(sequence[indx])
+        indx = previous[indx]
+    return result
@@ -0,0 +1,78 @@
+import re
+import json
+import codecs
+from typing import Any, Callable, Iterator, Optional
+
+from Schedule.Diff import ScheduleDiff, diff_schedule, merge_delta, stable_keys
+
+# Ответ декодируется частями, чтобы поток не держал GIL на всё время декодирования
+DECODE_CHUNK_SIZE: int = 256 * 1024
+# Разобранные строки освобождаются частями по столько строк: удаление списка целиком тоже держит GIL
+RELEASE_CHUNK_SIZE: int = 256
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+def decode_payload(payload: bytes) -> str:
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    view = memoryview(payload)
+    chunks: list[str] = [decoder.decode(view[start:start+DECODE_CHUNK_SIZE]) for start in range(0, len(view), DECODE_CHUNK_SIZE)]
+    chunks.append(decoder.decode(b'', final=True))
+    return ''.join(chunks)
+
+def iter_json_array(text: str) -> Iterator[Any]:
+    # Массив разбирается по одному элементу: между элементами поток отпускает GIL и цикл событий не простаивает
+    decoder = json.JSONDecoder()
+    position: int = WHITESPACE.match(text).end()
+    if not text.startswith('[', position):
+        raise json.JSONDecodeError("Expecting '['", text, position)
+    position = WHITESPACE.match(text, position+1).end()
+    if text.startswith(']', position):
+        return
+    while True:
+        item, position = decoder.raw_decode(text, position)
+        yield item
+        position = WHITESPACE.match(text, position).end()
+        if text.startswith(']', position):
+            return
+        if not text.startswith(',', position):
+            raise json.JSONDecodeError("Expecting ',' delimiter", text, position)
+        position = WHITESPACE.match(text, position+1).end()
+
+def parse_schedule_payload(payload: bytes) -> list[dict] | dict:
+    text: str = decode_payload(payload)
+    if text.lstrip().startswith('['):
+        return list(iter_json_array(text))
+    # Изменения с версии (delta) невелики и разбираются целиком
+    return json.loads(text)
+
+class PreparedRefresh():
+    """
+    Schedule reply parsed in a worker thread, as a diff against the rows it was prepared from.
+    The parsed rows themselves are released in the worker; only the diff and, when rows are inserted
+    or moved, the new order of keys are kept. Valid only while the table is at the same revision.
+    """
+
+    def __init__(self, revision: int, diff: ScheduleDiff, order: Optional[list[str]] = None, stable: Optional[set[str]] = None, version: Optional[str] = None) -> None:
+        self.revision: int = revision
+        self.diff: ScheduleDiff = diff
+        self.order: Optional[list[str]] = order
+        self.stable: Optional[set[str]] = stable
+        self.version: Optional[str] = version
+
+def prepare_refresh(payload: bytes, rows: list[dict], revision: int, sort_key: Callable[[dict], Any], key: str = 'schedule_id') -> PreparedRefresh:
+    # Выполняется в фоновом потоке; rows — снимок списка строк таблицы, сами строки не изменяются
+    received: list[dict] | dict = parse_schedule_payload(payload) if payload else []
+    version: Optional[str] = None
+    if isinstance(received, dict):
+        version = received.get('version')
+        received = merge_delta(rows, received.get('changed', []), received.get('deleted', []), sort_key, key)
+    # Защищённые поля (правки оператора) исключаются из разницы при применении
+    diff: ScheduleDiff = diff_schedule(rows, received, key=key)
+    order: Optional[list[str]] = None
+    stable: Optional[set[str]] = None
+    if diff.inserted or diff.is_reordered:
+        removed: set[str] = set(diff.removed)
+        order = [data.get(key) for data in received]
+        stable = stable_keys([data.get(key) for data in rows if data.get(key) not in removed], order)
+    for stop in range(len(received), 0, -RELEASE_CHUNK_SIZE):
+        del received[max(stop-RELEASE_CHUNK_SIZE, 0):stop]
+    return PreparedRefresh(revision, diff, order, stable, version)
@@ -0,0 +1,59 @@
+import re
+from typing import Optional
+
+# Длина n-грамм индекса: запросы не длиннее ищутся одним словарём, длиннее — пересечением и проверкой
+NGRAM_SIZE: int = 3
+SEPARATORS = re.compile(r'[\s\-_./]+')
+
+def normalize_flight_number(flight_number: Optional[str]) -> str:
+    return SEPARATORS.sub('', flight_number or '').upper()
+
+class FlightNumberIndex():
+    """
+    Substring index of normalized flight numbers: every substring up to NGRAM_SIZE characters
+    points to the schedule_ids containing it. A short query is one lookup; a longer one intersects
+    the sets of its n-grams, smallest first, and checks the few candidates left.
+    """
+
+    def __init__(self) -> None:
+        self.numbers: dict[str, str] = {}
+        self.ngrams: dict[str, set[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self.numbers)
+
+    def get_ngrams(self, number: str) -> set[str]:
+        return {number[start:start+size] for size in range(1, NGRAM_SIZE+1) for start in range(len(number)-size+1)}
+
+    def add(self, schedule_id: str, flight_number: Optional[str]) -> None:
+        number: str = normalize_flight_number(flight_number)
+        if self.numbers.get(schedule_id) == number:
+            return
+        self.remove(schedule_id)
+        self.numbers[schedule_id] = number
+        for ngram in self.get_ngrams(number):
+            self.ngrams.setdefault(ngram, set()).add(schedule_id)
+
+    def remove(self, schedule_id: str) -> None:
+        number: Optional[str] = self.numbers.pop(schedule_id, None)
+        if number is None:
+            return
+        for ngram in self.get_ngrams(number):
+            schedule_ids: set[str] = self.ngrams.get(ngram, set())
+            schedule_ids.discard(schedule_id)
+            if not schedule_ids:
+                self.ngrams.pop(ngram, None)
+
+    def clear(self) -> None:
+        self.numbers.clear()
+        self.ngrams.clear()
+
+    def search(self, text: str) -> set[str]:
+        query: str = normalize_flight_number(text)
+        if not query:
+            return set()
+        if len(query) <= NGRAM_SIZE:
+            return set(self.ngrams.get(query, ()))
+        postings: list[set[str]] = sorted((self.ngrams.get(query[start:start+NGRAM_SIZE], set()) for start in range(len(query)-NGRAM_SIZE+1)), key=len)
+        candidates: set[str] = postings[0].intersection(*postings[1:])
+        return {schedule_id for schedule_id in candidates if query in self.numbers[schedule_id]}
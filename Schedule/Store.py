@@ -0,0 +1,109 @@
+from typing import Iterator, Optional
+
+from Schedule.Search import FlightNumberIndex
+
+class ScheduleStore():
+    """
+    Rows of the schedule with hash indexes by schedule_id, (flight_id, audio_text_id),
+    flight_id and row position, and a substring index of flight numbers. Lookups are O(1);
+    insert and pop renumber the rows from the changed position to the end,
+    move only the rows between the two positions.
+    """
+
+    def __init__(self, rows: Optional[list[dict]] = None) -> None:
+        self.reset(rows or [])
+
+    def reset(self, rows: list[dict]) -> None:
+        self.rows: list[dict] = list(rows)
+        self.by_schedule_id: dict[str, dict] = {}
+        self.by_flight_audio: dict[tuple[int, int], dict] = {}
+        self.by_flight: dict[int, dict[str, dict]] = {}
+        self.positions: dict[str, int] = {}
+        self.flight_numbers: FlightNumberIndex = FlightNumberIndex()
+        for row_indx, data in enumerate(self.rows):
+            self.add_to_indexes(data)
+            self.positions[data.get('schedule_id')] = row_indx
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __iter__(self) -> Iterator[dict]:
+        return iter(self.rows)
+
+    def __getitem__(self, row_indx: int) -> dict:
+        return self.rows[row_indx]
+
+    def __bool__(self) -> bool:
+        return bool(self.rows)
+
+    def add_to_indexes(self, data: dict) -> None:
+        self.by_schedule_id[data.get('schedule_id')] = data
+        self.add_to_flight_indexes(data)
+        self.flight_numbers.add(data.get('schedule_id'), data.get('flight_number_full'))
+
+    def add_to_flight_indexes(self, data: dict) -> None:
+        self.by_flight_audio[(data.get('flight_id'), data.get('audio_text_id'))] = data
+        self.by_flight.setdefault(data.get('flight_id'), {})[data.get('schedule_id')] = data
+
+    def remove_from_indexes(self, data: dict) -> None:
+        self.by_schedule_id.pop(data.get('schedule_id'), None)
+        self.remove_from_flight_indexes(data)
+        self.positions.pop(data.get('schedule_id'), None)
+        self.flight_numbers.remove(data.get('schedule_id'))
+
+    def remove_from_flight_indexes(self, data: dict) -> None:
+        if self.by_flight_audio.get((data.get('flight_id'), data.get('audio_text_id'))) is data:
+            del self.by_flight_audio[(data.get('flight_id'), data.get('audio_text_id'))]
+        flight_rows: dict[str, dict] = self.by_flight.get(data.get('flight_id'), {})
+        flight_rows.pop(data.get('schedule_id'), None)
+        if not flight_rows:
+            self.by_flight.pop(data.get('flight_id'), None)
+
+    def renumber(self, start: int, stop: int) -> None:
+        for row_indx in range(start, min(stop, len(self.rows))):
+            self.positions[self.rows[row_indx].get('schedule_id')] = row_indx
+
+    def insert(self, row_indx: int, data: dict) -> None:
+        self.rows.insert(row_indx, data)
+        self.add_to_indexes(data)
+        self.renumber(row_indx, len(self.rows))
+
+    def append(self, data: dict) -> None:
+        self.insert(len(self.rows), data)
+
+    def pop(self, row_indx: int) -> dict:
+        data: dict = self.rows.pop(row_indx)
+        self.remove_from_indexes(data)
+        self.renumber(row_indx, len(self.rows))
+        return data
+
+    def move(self, source_indx: int, target_indx: int) -> None:
+        self.rows.insert(target_indx, self.rows.pop(source_indx))
+        self.renumber(min(source_indx, target_indx), max(source_indx, target_indx)+1)
+
+    def update(self, schedule_id: str, changes: dict) -> None:
+        data: dict = self.by_schedule_id[schedule_id]
+        is_flight_key_changed: bool = 'flight_id' in changes or 'audio_text_id' in changes
+        if is_flight_key_changed:
+            # Индексы по рейсу ищут строку по старым значениям, поэтому она убирается из них до изменения
+            self.remove_from_flight_indexes(data)
+        data.update(changes)
+        if is_flight_key_changed:
+            self.add_to_flight_indexes(data)
+        if 'flight_number_full' in changes:
+            self.flight_numbers.add(schedule_id, data.get('flight_number_full'))
+
+    def get(self, schedule_id: str) -> Optional[dict]:
+        return self.by_schedule_id.get(schedule_id)
+
+    def find(self, flight_id: int, audio_text_id: int) -> Optional[dict]:
+        return self.by_flight_audio.get((flight_id, audio_text_id))
+
+    def flight_rows(self, flight_id: int) -> list[dict]:
+        return list(self.by_flight.get(flight_id, {}).values())
+
+    def position(self, schedule_id: str) -> Optional[int]:
+        return self.positions.get(schedule_id)
+
+    def search_flight_number(self, text: str) -> list[int]:
+        return sorted(map(self.positions.__getitem__, self.flight_numbers.search(text)))
@@ -1,13 +1,14 @@
 import json
 
 from PySide6.QtWidgets import QVBoxLayout, QGridLayout, QLabel, QDialog, QComboBox, QGroupBox, QTimeEdit, QLineEdit, QScrollArea
-from PySide6.QtCore import Qt, Slot, QUrl, QJsonDocument, Signal, QTime
+from PySide6.QtCore import Qt, Slot, QJsonDocument, Signal, QTime
 from PySide6.QtGui import QIcon, QStandardItemModel, QStandardItem, QIntValidator
 from PySide6 import QtNetwork
 
-from globals import settings, logger
+from globals import logger
+from API.Client import api_client
 from .AudioTextTable import AudioTextTable
-from .Font import RobotoFont
+from .Font import fonts
 from .MessageDialog import MessageDialog
 from .SpeakerButton import SpeakerButton
 
@@ -61,27 +62,26 @@ class AudioTextDialog(QDialog):
         self.audio_text_table.selectionModel().selectionChanged.connect(self.display_audio_text_info)
         self.audio_text_table.setFixedHeight(640)
 
-        font = RobotoFont()
-        self.flight_label.setFont(font.get_font())
-        self.flight_combobox.setFont(font.get_font())
-        self.audio_text_reason_combobox.setFont(font.get_font())
-        self.terminal_combobox.setFont(font.get_font())
-        self.boarding_gate.setFont(font.get_font())
-        self.event_time.setFont(font.get_font())
-        self.aerodrome_combobox.setFont(font.get_font())
-        self.audio_text_table.setFont(font.get_font())
+        self.flight_label.setFont(fonts.get_font())
+        self.flight_combobox.setFont(fonts.get_font())
+        self.audio_text_reason_combobox.setFont(fonts.get_font())
+        self.terminal_combobox.setFont(fonts.get_font())
+        self.boarding_gate.setFont(fonts.get_font())
+        self.event_time.setFont(fonts.get_font())
+        self.aerodrome_combobox.setFont(fonts.get_font())
+        self.audio_text_table.setFont(fonts.get_font())
 
         self.flight_info_layout = QVBoxLayout()
         self.flight_info_layout.addWidget(QLabel(f"Время рейса:"))
-        self.flight_info_layout.itemAt(0).widget().setFont(font.get_font())
+        self.flight_info_layout.itemAt(0).widget().setFont(fonts.get_font())
         self.flight_info_layout.addWidget(QLabel(f"Направление:"))
-        self.flight_info_layout.itemAt(1).widget().setFont(font.get_font())
+        self.flight_info_layout.itemAt(1).widget().setFont(fonts.get_font())
         self.flight_info_layout.addWidget(QLabel(f"Маршрут:"))
-        self.flight_info_layout.itemAt(2).widget().setFont(font.get_font())
+        self.flight_info_layout.itemAt(2).widget().setFont(fonts.get_font())
         self.flight_info_layout.addWidget(QLabel(f"Терминал:"))
-        self.flight_info_layout.itemAt(3).widget().setFont(font.get_font())
+        self.flight_info_layout.itemAt(3).widget().setFont(fonts.get_font())
         self.flight_info_layout.addWidget(QLabel(f"Выходы:"))
-        self.flight_info_layout.itemAt(4).widget().setFont(font.get_font())
+        self.flight_info_layout.itemAt(4).widget().setFont(fonts.get_font())
 
         self.flight_info_groupbox = QGroupBox()
         self.flight_info_groupbox.setTitle('Информация о рейсе')
@@ -90,7 +90,7 @@ class AudioTextDialog(QDialog):
         self.audio_text_info_layout = QVBoxLayout()
         label = QLabel()
         label.setWordWrap(True)
-        label.setFont(font.get_font())
+        label.setFont(fonts.get_font())
         label.setFixedWidth(300)
         label.setAlignment(Qt.AlignmentFlag.AlignJustify)
         scroll_area = QScrollArea()
@@ -133,11 +133,7 @@ class AudioTextDialog(QDialog):
 
     async def get_flights_from_API(self, flight_id: int = None) -> None:
         self.current_flight_id = flight_id
-        url_file = QUrl(settings.api_url+'get_flights')
-        request = QtNetwork.QNetworkRequest(url_file)
-        self.API_manager = QtNetwork.QNetworkAccessManager()
-        self.API_manager.get(request)
-        self.API_manager.finished.connect(self.refresh_flight_list)
+        await api_client.fetch(api_client.create_request('get_flights'), self.refresh_flight_list)
 
     def refresh_flight_list(self, result: QtNetwork.QNetworkReply) -> None:
         match result.error():
@@ -161,11 +157,7 @@ class AudioTextDialog(QDialog):
                 logger.error(error_message)
 
     async def get_audio_text_from_API(self) -> None:
-        url_file = QUrl(settings.api_url+'get_audio_text')
-        request = QtNetwork.QNetworkRequest(url_file)
-        self.API_audio_text_manager = QtNetwork.QNetworkAccessManager()
-        self.API_audio_text_manager.get(request)
-        self.API_audio_text_manager.finished.connect(self.refresh_audio_text_table)
+        await api_client.fetch(api_client.create_request('get_audio_text'), self.refresh_audio_text_table)
 
     def refresh_audio_text_table(self, result: QtNetwork.QNetworkReply) -> None:
         match result.error():
@@ -199,11 +191,7 @@ class AudioTextDialog(QDialog):
                 return True
 
     async def get_audio_text_reasons_from_API(self) -> None:
-        url_file = QUrl(settings.api_url+'get_audio_text_reasons')
-        request = QtNetwork.QNetworkRequest(url_file)
-        self.API_audio_text_reason_manager = QtNetwork.QNetworkAccessManager()
-        self.API_audio_text_reason_manager.get(request)
-        self.API_audio_text_reason_manager.finished.connect(self.refresh_audio_text_reasons_list)
+        await api_client.fetch(api_client.create_request('get_audio_text_reasons'), self.refresh_audio_text_reasons_list)
 
     def refresh_audio_text_reasons_list(self, result: QtNetwork.QNetworkReply) -> None:
         match result.error():
@@ -226,11 +214,7 @@ class AudioTextDialog(QDialog):
                 logger.error(error_message)
 
     async def get_terminal_from_API(self) -> None:
-        url_file = QUrl(settings.api_url+'get_terminals')
-        request = QtNetwork.QNetworkRequest(url_file)
-        self.terminal_manager = QtNetwork.QNetworkAccessManager()
-        self.terminal_manager.get(request)
-        self.terminal_manager.finished.connect(self.refresh_terminal_list)
+        await api_client.fetch(api_client.create_request('get_terminals'), self.refresh_terminal_list)
 
     def refresh_terminal_list(self, result: QtNetwork.QNetworkReply) -> None:
         match result.error():
@@ -253,11 +237,7 @@ class AudioTextDialog(QDialog):
                 logger.error(error_message)
 
     async def get_aerodrome_from_API(self) -> None:
-        url_file = QUrl(settings.api_url+'get_aerodromes')
-        request = QtNetwork.QNetworkRequest(url_file)
-        self.aerodrome_manager = QtNetwork.QNetworkAccessManager()
-        self.aerodrome_manager.get(request)
-        self.aerodrome_manager.finished.connect(self.refresh_aerodrome_list)
+        await api_client.fetch(api_client.create_request('get_aerodromes'), self.refresh_aerodrome_list)
 
     def refresh_aerodrome_list(self, result: QtNetwork.QNetworkReply) -> None:
         match result.error():
@@ -337,8 +317,11 @@ class AudioTextDialog(QDialog):
             self.aerodrome_combobox.setHidden(True)
 
     def open_message_dialog(self, message: str) -> None:
+        # Окно открывается без вложенного цикла событий: сообщение часто показывается из задачи asyncio,
+        # и пока exec() не вернулся, остальные задачи qasync не смогли бы продолжиться
         self.message_dialog: MessageDialog = MessageDialog(self, message)
-        self.message_dialog.exec()
+        self.message_dialog.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose)
+        self.message_dialog.open()
 
     def append_audio_text_to_schedule(self) -> None:
         reason_id: int = None
@@ -395,7 +378,6 @@ class AudioTextDialog(QDialog):
                 return
             aerodrome_id = aerodrome_data.get('id')
         
-        url_file = QUrl(settings.api_url+'append_audio_text_to_schedule')
         self.body = {
             'flight_id': flight_id,
             'audio_text_id': audio_text_id,
@@ -406,11 +388,8 @@ class AudioTextDialog(QDialog):
             'aerodrome_id': aerodrome_id,
             'autoplay_is_canceled': True
         }
-        request = QtNetwork.QNetworkRequest(url_file)
-        request.setHeader(QtNetwork.QNetworkRequest.KnownHeaders.ContentTypeHeader, "application/json")
-        self.API_post = QtNetwork.QNetworkAccessManager()
-        self.API_post.post(request, QJsonDocument(self.body).toJson())
-        self.API_post.finished.connect(self.after_append)
+        request = api_client.create_request('append_audio_text_to_schedule', is_json=True)
+        api_client.post(request, QJsonDocument(self.body).toJson(), self.after_append)
 
     def after_append(self, result: QtNetwork.QNetworkReply) -> None:
         match result.error():
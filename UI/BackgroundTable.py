@@ -1,31 +1,37 @@
 import json
 import asyncio
+from typing import Optional
 
 from PySide6.QtWidgets import QTableWidget, QHeaderView, QAbstractItemView, QWidget, QHBoxLayout, QTableWidgetItem, QCheckBox
 from PySide6.QtCore import Qt, QUrl, QUrlQuery, QTimer, QJsonDocument, Signal
 from PySide6 import QtNetwork
 
-from globals import root_directory, settings, logger, TableCheckbox
-from .Font import RobotoFont
+from globals import settings, logger, TableCheckbox
+from API.Client import api_client
+from API.ConditionalFetch import ConditionalFetch
+from API.Journal import mutation_journal
+from API.WriteBack import EditWriteBack
+from Audio.Cache import audio_cache
+from Audio.Scheduler import PlaybackJob
+from Audio.Stream import AudioStream
+from .Font import fonts
 
 
 class BackgroundTable(QTableWidget):
     current_audio_id: str = None
     current_data: dict = {}
-    play_signal: Signal = Signal(QtNetwork.QNetworkReply)
+    play_signal: Signal = Signal(PlaybackJob, bytes)
+    stream_signal: Signal = Signal(PlaybackJob, AudioStream)
     stop_signal: Signal = Signal(tuple)
-    error_signal: Signal = Signal(str)
+    error_signal: Signal = Signal(PlaybackJob, str)
 
     def __init__(self, header: tuple[str], zones: dict, parent=None) -> None:
         self.header: tuple[str] = header
         self.zones: dict = zones
         self.col_count: int = len(self.header)
         self.row_count: int = 0
-        self.is_autoplay: bool = False
         super().__init__(self.row_count, self.col_count, parent)
 
-        self.font: RobotoFont = RobotoFont()
-
         self.setAlternatingRowColors(True)
         self.setMaximumWidth(500)
         self.verticalHeader().setHidden(True)
@@ -47,27 +53,40 @@ class BackgroundTable(QTableWidget):
         self.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
         self.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
 
+        self.data_origin: list[dict] = []
+
         self.timer = QTimer()
         self.timer.setInterval(settings.background_schedule_update_time*1000)
-        self.timer.timeout.connect(lambda: asyncio.run(self.get_background_data_from_API()))
+        self.timer.timeout.connect(lambda: asyncio.ensure_future(self.get_background_data_from_API()))
+        self.conditional_fetch = ConditionalFetch()
+        self.write_back = EditWriteBack(self.send_schedule_update, settings.edit_write_delay_ms, self, lambda row_id: mutation_journal.is_sending(f"background:{row_id}"))
+        mutation_journal.retry_signal.connect(self.write_back.flush)
 
         from UI.SpeakerStatusBar import speaker_status_bar
         self.speaker_status_bar = speaker_status_bar
 
     async def get_background_data_from_API(self) -> None:
         self.timer.stop()
+        if not self.write_back.is_idle or mutation_journal.has_pending('update_schedule_background'):
+            # Таблица перестраивается из ответа целиком, поэтому сначала должны сохраниться правки оператора
+            self.timer.start()
+            return
         url_file = QUrl(settings.api_url+'get_audio_background_text')
-        request = QtNetwork.QNetworkRequest(url_file)
-        self.API_bg_manager = QtNetwork.QNetworkAccessManager()
-        self.API_bg_manager.get(request)
-        self.API_bg_manager.finished.connect(self.refresh_background_table)
+        request = self.conditional_fetch.create_request(url_file)
+        await api_client.fetch(request, self.refresh_background_table)
 
     def refresh_background_table(self, result: QtNetwork.QNetworkReply) -> None:
         match result.error():
+            case QtNetwork.QNetworkReply.NetworkError.NoError if self.conditional_fetch.is_not_modified(result):
+                pass
+
             case QtNetwork.QNetworkReply.NetworkError.NoError:
+                self.conditional_fetch.remember(result)
                 self.background_data = []
                 bytes_string = result.readAll()
+                previous_data: dict[int, dict] = {data.get('audio_text_id'): data for data in self.data_origin}
                 self.data_origin: list[dict] = json.loads(str(bytes_string, 'utf-8'))
+                self.invalidate_changed_audio(previous_data)
                 for data in self.data_origin:
                     self.background_data.append((str(data.get('audio_text_id')), data.get('name'),
                         data.get('languages').get('RUS').get('display'),
@@ -106,7 +125,7 @@ class BackgroundTable(QTableWidget):
                                     self.setCellWidget(row_indx, col_indx, widget)
                                 else:
                                     element = QTableWidgetItem(item)
-                                    element.setFont(self.font.get_font())
+                                    element.setFont(fonts.get_font())
                                     self.setItem(row_indx, col_indx, element)
                                 self.resizeRowToContents(row_indx)
                 info_message = "Фоновые объявления обновлены"
@@ -119,6 +138,14 @@ class BackgroundTable(QTableWidget):
 
         self.timer.start()
 
+    def invalidate_changed_audio(self, previous_data: dict[int, dict]) -> None:
+        # Текст объявления могли изменить или удалить на сервере, а ключ кэша его не содержит
+        received_data: dict[int, dict] = {data.get('audio_text_id'): data for data in self.data_origin}
+        for audio_text_id, data in previous_data.items():
+            current: Optional[dict] = received_data.get(audio_text_id)
+            if current is None or {**current, 'zones_list': None} != {**data, 'zones_list': None}:
+                audio_cache.invalidate(f"background_{audio_text_id}")
+
     def get_current_row_id(self) -> str:
         try:
             row_id = self.item(self.currentRow(), 0).text()
@@ -126,28 +153,40 @@ class BackgroundTable(QTableWidget):
             return None
         return row_id
 
-    def get_current_languages(self) -> list[int]:
+    def find_row(self, row_id: str) -> Optional[int]:
+        for row in range(self.rowCount()):
+            if (item := self.item(row, 0)) and item.text() == row_id:
+                return row
+        return None
+
+    def select_row_id(self, row_id: str) -> bool:
+        if (row := self.find_row(row_id)) is None:
+            return False
+        self.selectRow(row)
+        return True
+
+    def get_current_languages(self, row: Optional[int] = None) -> list[int]:
         current_languages: list[int] = []
-        row: int = self.currentRow()
+        row = self.currentRow() if row is None else row
         for i in range(2, 5):
             cell = self.cellWidget(row,i)
             if cell and cell.findChild(QCheckBox).checkState() == Qt.CheckState.Checked:
                 current_languages.append(i-1)
         return current_languages
 
-    def get_current_zones(self) -> list[int]:
+    def get_current_zones(self, row: Optional[int] = None) -> list[int]:
         current_zones: list[int] = []
-        row: int = self.currentRow()
+        row = self.currentRow() if row is None else row
         for i in range(self.col_count - len(self.zones), self.col_count):
             checkbox: QCheckBox = self.cellWidget(row,i).findChild(QCheckBox)
             if checkbox.checkState() == Qt.CheckState.Checked:
                 current_zones.append(i-4)
         return current_zones
 
-    def get_current_terminal(self) -> None:
+    def get_current_terminal(self, data: Optional[dict] = None) -> None:
         return None
 
-    def get_current_boarding_gates(self) -> None:
+    def get_current_boarding_gates(self, data: Optional[dict] = None) -> None:
         return None
 
     def get_current_row_data(self, row_id: str) -> dict:
@@ -182,52 +221,80 @@ class BackgroundTable(QTableWidget):
                 self.current_data = self.data_origin[0]
             self.selectRow(0)
 
-    async def get_audio_file(self) -> None:
-        row_id = self.get_current_row_id()
-        if row_id is None:
+    async def get_audio_file(self, job: PlaybackJob) -> None:
+        row: Optional[int] = self.find_row(job.row_id)
+        if row is None:
             error_message: str = "Ошибка воспроизведения: Необходимо выбрать объявление"
-            self.error_signal.emit(error_message)
+            self.error_signal.emit(job, error_message)
             return
 
-        self.current_data = self.get_current_row_data(row_id)
-        self.current_sound_file = root_directory+'/'+settings.file_name
-        self.current_audio_id = self.current_data.get('audio_text_id')
+        job.data = self.current_data = self.get_current_row_data(job.row_id)
+        self.current_audio_id = job.data.get('audio_text_id')
 
-        if len(self.get_current_languages()) == 0:
+        job.languages = self.get_current_languages(row)
+        if len(job.languages) == 0:
             error_message: str = "Ошибка воспроизведения: Необходимо выбрать хотя бы один язык для воспроизведения"
-            self.error_signal.emit(error_message)
+            self.error_signal.emit(job, error_message)
             return
 
         self.timer.stop()
 
-        url_file = QUrl(settings.api_url+'get_scheduler_background_sound')
+        sound_key: str = audio_cache.make_key('get_scheduler_background_sound', {
+            'audio_text_id': job.data.get('audio_text_id'),
+            'name': job.data.get('name'),
+            'languages': job.languages
+        })
+        if (sound := audio_cache.get(sound_key)) is not None:
+            self.speaker_status_bar.setAudioCacheText(audio_cache.get_statistics_text())
+            self.play_signal.emit(job, sound)
+            return
+
         query = QUrlQuery()
-        query.addQueryItem('audio_text_id', str(self.current_data.get('audio_text_id')))
-        url_file.setQuery(query.query())
-
-        request = QtNetwork.QNetworkRequest(url_file)
-        self.API_manager = QtNetwork.QNetworkAccessManager()
-        request.setHeader(QtNetwork.QNetworkRequest.KnownHeaders.ContentTypeHeader, "application/json")
-        body = QJsonDocument({'languages': self.get_current_languages(), 'zones': self.get_current_zones()})
-
-        reply = self.API_manager.post(request, body.toJson())
-        self.API_manager.finished.connect(lambda: self.play_signal.emit(reply))
-
-    def update_schedule(self, is_deleted: bool = None) -> None:
-        self.current_data = self.get_current_row_data(self.get_current_row_id())
-        url_file = QUrl(settings.api_url+'update_schedule_background')
-        request = QtNetwork.QNetworkRequest(url_file)
-        request.setHeader(QtNetwork.QNetworkRequest.KnownHeaders.ContentTypeHeader, "application/json")
-        self.API_post = QtNetwork.QNetworkAccessManager()
+        query.addQueryItem('audio_text_id', str(job.data.get('audio_text_id')))
+        request = api_client.create_request('get_scheduler_background_sound', query, is_json=True)
+        body = QJsonDocument({'languages': job.languages, 'zones': job.zones})
+
+        if settings.audio_streaming == 1:
+            stream = AudioStream(settings.audio_stream_preroll_ms)
+            reply = api_client.send(request, lambda reply: self.on_audio_stream(reply, stream, sound_key, job.key), body.toJson())
+            stream.attach(reply)
+            self.stream_signal.emit(job, stream)
+            return
+        await api_client.fetch(request, lambda reply: self.on_audio_file(reply, job, sound_key), body.toJson())
+
+    def on_audio_file(self, reply: QtNetwork.QNetworkReply, job: PlaybackJob, sound_key: str) -> None:
+        sound: bytes = reply.readAll().data()
+        if reply.error() == QtNetwork.QNetworkReply.NetworkError.NoError:
+            audio_cache.put(sound_key, sound, job.key)
+        self.speaker_status_bar.setAudioCacheText(audio_cache.get_statistics_text())
+        self.play_signal.emit(job, sound)
+
+    def on_audio_stream(self, reply: QtNetwork.QNetworkReply, stream: AudioStream, sound_key: str, owner: str) -> None:
+        if (sound := stream.on_reply_finished(reply)) is not None:
+            audio_cache.put(sound_key, sound, owner)
+        self.speaker_status_bar.setAudioCacheText(audio_cache.get_statistics_text())
+
+    def update_schedule(self, row_id: Optional[str] = None) -> None:
+        row_id = row_id or self.get_current_row_id()
+        if row_id is not None:
+            self.write_back.mark(row_id)
+
+    def send_schedule_update(self, row_id: str) -> None:
+        # Состояние флажков читается в момент отправки и несёт все правки строки, накопленные за окно
+        if (row := self.find_row(row_id)) is None:
+            self.write_back.finish(row_id)
+            return
+        data: dict = self.get_current_row_data(row_id)
         body = QJsonDocument({
-            'audio_text_id': self.current_data.get('audio_text_id'),
-            'languages': self.get_current_languages(), 
-            'zones': self.get_current_zones()
+            'audio_text_id': data.get('audio_text_id'),
+            'languages': self.get_current_languages(row),
+            'zones': self.get_current_zones(row)
         })
-        self.API_post.post(request, body.toJson())
-        self.API_post.finished.connect(self.after_update_schedule)
+        mutation_journal.record('update_schedule_background', body.toJson().data(), f"background:{row_id}", lambda result: self.after_update_schedule(result, row_id))
 
-    def after_update_schedule(self, result: QtNetwork.QNetworkReply) -> None:
+    def after_update_schedule(self, result: QtNetwork.QNetworkReply, row_id: Optional[str] = None) -> None:
+        if row_id:
+            self.write_back.finish(row_id)
         match result.error():
             case QtNetwork.QNetworkReply.NetworkError.NoError:
                 logger.info(f"Данные сохранены")
@@ -238,6 +305,7 @@ class BackgroundTable(QTableWidget):
 
     def delete_schedule(self) -> None:
         audio_text_id: int = self.current_data.get('audio_text_id')
+        audio_cache.invalidate(f"background_{audio_text_id}")
         for row in reversed(range(self.model().rowCount())):
             indx = self.model().index(row, 0)
             if indx.data():
@@ -250,4 +318,4 @@ class BackgroundTable(QTableWidget):
     def on_checkbox_state_change(self) -> None:
         row, column = map(int, self.sender().objectName().split('_'))
         self.selectRow(row)
-        self.update_schedule()
+        self.update_schedule(self.item(row, 0).text())
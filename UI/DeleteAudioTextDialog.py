@@ -1,14 +1,15 @@
 from PySide6.QtWidgets import QGridLayout, QLabel, QDialog, QCheckBox
-from PySide6.QtCore import Qt, QUrl, QUrlQuery, QJsonDocument, Signal
+from PySide6.QtCore import Qt, QUrlQuery, QJsonDocument, Signal
 from PySide6.QtGui import QIcon
 from PySide6 import QtNetwork
 
-from globals import settings
-from .Font import RobotoFont
+from API.Client import api_client
+from Schedule.Store import ScheduleStore
+from .Font import fonts
 from .SpeakerButton import SpeakerButton
 
 class DeleteAudioTextDialog(QDialog):
-    data: list[dict] = None
+    data: ScheduleStore = None
     delete_all_audio: bool = None
     delete_signal: Signal = Signal(QtNetwork.QNetworkReply)
     
@@ -18,12 +19,11 @@ class DeleteAudioTextDialog(QDialog):
         self.setWindowTitle("Удаление объявлений")
         self.setWindowIcon(QIcon("icons/app/icon.png"))
         self.setFixedSize(450, 200)
-        font = RobotoFont()
 
         self.layout: QGridLayout = QGridLayout(self)
 
         self.message_label: QLabel = QLabel()
-        self.message_label.setFont(font.get_font())
+        self.message_label.setFont(fonts.get_font())
         self.message_label.setWordWrap(True)
         self.message_label.setAlignment(Qt.AlignmentFlag.AlignJustify)
 
@@ -56,22 +56,16 @@ class DeleteAudioTextDialog(QDialog):
     def delete_audio_from_schedule(self) -> None:
         flight_id: int = self.flight.get('flight_id')
         if self.delete_all_audio:
-            flight_list: list = list(filter(lambda d: flight_id == d.get('flight_id'), self.data))
-            audio_text_id_list: list = [f.get('audio_text_id') for f in flight_list]
+            audio_text_id_list: list = [f.get('audio_text_id') for f in self.data.flight_rows(flight_id)]
         else:
             audio_text_id_list: list = [self.flight.get('audio_text_id')]
         audio_text_id_list = ','.join(map(str, audio_text_id_list))
         self.btn_message_delete.setDisabled(True)
-        url_file = QUrl(settings.api_url+'delete_schedule')
         query = QUrlQuery()
         query.addQueryItem('flight_id', str(flight_id))
         query.addQueryItem('audio_text_id_list', audio_text_id_list)
-        url_file.setQuery(query.query())
-        request = QtNetwork.QNetworkRequest(url_file)
-        request.setHeader(QtNetwork.QNetworkRequest.KnownHeaders.ContentTypeHeader, "application/json")
-        self.API_post = QtNetwork.QNetworkAccessManager()
-        self.API_post.post(request, QJsonDocument().toJson())
-        self.API_post.finished.connect(self.delete_signal.emit)
+        request = api_client.create_request('delete_schedule', query, is_json=True)
+        api_client.post(request, QJsonDocument().toJson(), self.delete_signal.emit)
     
     def closeEvent(self, event) -> None:
         self.delete_signal.emit(None)
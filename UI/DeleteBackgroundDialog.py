@@ -1,10 +1,10 @@
 from PySide6.QtWidgets import QGridLayout, QLabel, QDialog
-from PySide6.QtCore import Qt, QUrl, QUrlQuery, QJsonDocument, Signal
+from PySide6.QtCore import Qt, QUrlQuery, QJsonDocument, Signal
 from PySide6.QtGui import QIcon
 from PySide6 import QtNetwork
 
-from globals import settings, logger
-from .Font import RobotoFont
+from API.Client import api_client
+from .Font import fonts
 from .SpeakerButton import SpeakerButton
 
 class DeleteBackgroundDialog(QDialog):
@@ -17,12 +17,11 @@ class DeleteBackgroundDialog(QDialog):
         self.setWindowTitle("Удаление фоновых объявлений")
         self.setWindowIcon(QIcon("icons/app/icon.png"))
         self.setFixedSize(450, 200)
-        font = RobotoFont()
 
         self.layout: QGridLayout = QGridLayout(self)
 
         self.message_label: QLabel = QLabel()
-        self.message_label.setFont(font.get_font())
+        self.message_label.setFont(fonts.get_font())
         self.message_label.setWordWrap(True)
         self.message_label.setAlignment(Qt.AlignmentFlag.AlignJustify)
 
@@ -44,15 +43,10 @@ class DeleteBackgroundDialog(QDialog):
     def delete_audio_from_schedule(self) -> None:
         audio_text_id: str = str(self.audio.get('audio_text_id'))
         self.btn_message_delete.setDisabled(True)
-        url_file = QUrl(settings.api_url+'delete_audio_text')
         query = QUrlQuery()
         query.addQueryItem('audio_text_id', audio_text_id)
-        url_file.setQuery(query.query())
-        request = QtNetwork.QNetworkRequest(url_file)
-        request.setHeader(QtNetwork.QNetworkRequest.KnownHeaders.ContentTypeHeader, "application/json")
-        self.API_post = QtNetwork.QNetworkAccessManager()
-        self.API_post.post(request, QJsonDocument().toJson())
-        self.API_post.finished.connect(self.delete_signal.emit)
+        request = api_client.create_request('delete_audio_text', query, is_json=True)
+        api_client.post(request, QJsonDocument().toJson(), self.delete_signal.emit)
     
     def closeEvent(self, event):
         self.delete_signal.emit(None)
@@ -1,21 +1,36 @@
 import os
 from PySide6.QtCore import QDir
-from PySide6.QtGui import QFontDatabase
+from PySide6.QtGui import QFont, QFontDatabase
 
-class RobotoFont(QFontDatabase):
-    def __init__(self):
-        super().__init__()
+FONT_FAMILY: str = 'Roboto'
+FONT_DIRECTORY: str = os.fspath('fonts/Roboto')
+FONT_FILES: tuple[str] = ('Roboto-Regular.ttf', 'Roboto-Medium.ttf', 'Roboto-Bold.ttf')
 
-        self.load_font_from_dir(os.fspath('fonts/Roboto'))
-        self.styles("Roboto")
+class RobotoFont():
+    """
+    Process-wide font registry: the TTF files are registered once, on first use,
+    and QFont objects are cached by (size, style).
+    """
+    families: set[str] = set()
+    fonts: dict[tuple[int, str], QFont] = {}
+    is_loaded: bool = False
 
-    @staticmethod
-    def load_font_from_dir(directory):
-        families = set()
-        for fi in QDir(directory).entryInfoList(["*.ttf"]):
-            _id = QFontDatabase.addApplicationFont(fi.absoluteFilePath())
-            families |= set(QFontDatabase.applicationFontFamilies(_id))
-        return families
+    @classmethod
+    def load_fonts(cls, directory: str = FONT_DIRECTORY) -> set[str]:
+        if not cls.is_loaded:
+            font_dir = QDir(directory)
+            for file_name in FONT_FILES:
+                _id = QFontDatabase.addApplicationFont(font_dir.absoluteFilePath(file_name))
+                cls.families |= set(QFontDatabase.applicationFontFamilies(_id))
+            cls.is_loaded = True
+        return cls.families
 
-    def get_font(self, size: int=11):
-        return self.font("Roboto", "Regular", size)
+    def get_font(self, size: int=11, style: str='Regular') -> QFont:
+        font: QFont = self.fonts.get((size, style))
+        if font is None:
+            self.load_fonts()
+            font = QFontDatabase.font(FONT_FAMILY, style, size)
+            self.fonts[(size, style)] = font
+        return font
+
+fonts: RobotoFont = RobotoFont()
@@ -1,23 +1,27 @@
 import json
+import time
 import asyncio
-import requests
-import os
-import socket
-from datetime import datetime
-
-import sounddevice as sd
-import soundfile as sf
-from math import ceil
+from datetime import datetime, timedelta
+
 from functools import partial
+import numpy as np
 from typing import Optional
 
-from PySide6.QtWidgets import QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QPushButton, QAbstractItemView, QCheckBox, QFrame
-from PySide6.QtCore import Qt, QTimer, QUrl, QUrlQuery, QSaveFile, QIODevice, QJsonDocument, QSize, Signal
+from PySide6.QtWidgets import QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QPushButton, QCheckBox, QFrame
+from PySide6.QtCore import Qt, QTimer, QSize, Signal
 from PySide6.QtGui import QIcon
 from PySide6 import QtNetwork
 
-from globals import settings, interface, logger, exit_program_bcs_err
-from .Font import RobotoFont
+from globals import settings, interface, logger, snapshot
+from API.Client import api_client
+from API.ActionHistory import ActionHistoryUploader
+from API.Journal import mutation_journal
+from Audio.Decoder import PreparedSound, decode_sound
+from Audio.Stream import AudioStream
+from Audio.Mixer import AudioMixer
+from Audio.Playback import PlaybackSession, PlaybackState
+from Audio.Scheduler import PlaybackScheduler, PlaybackJob, PlaybackPriority
+from .Font import fonts
 from .ScheduleTable import ScheduleTable
 from .BackgroundTable import BackgroundTable
 from .PlayerButtonLayout import PlayerButtonLayout
@@ -29,11 +33,15 @@ from .ScheduleZoneLayout import ScheduleZoneLayout
 
 class LineEdit(QLineEdit):
     enter_pressed_signal: Signal = Signal()
+    shift_enter_pressed_signal: Signal = Signal()
     empty_text_signal: Signal = Signal()
 
     def keyPressEvent(self, event) -> None:
         if event.key() in (Qt.Key.Key_Return, Qt.Key.Key_Enter):
-            self.enter_pressed_signal.emit()
+            if event.modifiers() & Qt.KeyboardModifier.ShiftModifier:
+                self.shift_enter_pressed_signal.emit()
+            else:
+                self.enter_pressed_signal.emit()
             return
         super().keyPressEvent(event)
 
@@ -47,22 +55,15 @@ class SpeakerApplication(QMainWindow):
         super().__init__()
         self.user_uuid = 'e8c1c5d1-dfa5-4252-ad97-5d3d222794e1'
 
-        font = RobotoFont()
-
         logger.info(f'Начало загрузки формы приложения')
         
-        try:
-            zones_request = requests.get(settings.api_url+'get_zones')
-        except requests.exceptions.ConnectionError as err:
-            error_message: str = "Ошибка подключения к API:\n{1!r}".format(type(err).__name__, err.args)
-            logger.error(error_message)
-            self.open_message_dialog(error_message)
-            exit_program_bcs_err()
-        else:
-            self.zones: list[dict] = zones_request.json()
-
+        self.zones: list[dict] = snapshot.zones
 
-        self.play_finish_timer = QTimer()
+        self.session_count: int = 0
+        self.scheduler = PlaybackScheduler(settings.playback_stale_policy, settings.background_duck_mode in ('duck', 'pause'), self)
+        self.scheduler.job_signal.connect(lambda job: asyncio.ensure_future(self.play_job(job)))
+        self.scheduler.skipped_signal.connect(self.on_job_skipped)
+        self.underrun_count: int = 0
         self.device_id = interface.system_device.get(settings.device.get('name'))
         # if self.device_id is None:
         #     error_message = "Аудио устройство не обнаружено"
@@ -71,6 +72,10 @@ class SpeakerApplication(QMainWindow):
         #     exit_program_bcs_err()
 
         self.samplerate = settings.device.get('samplerate')
+        self.mixer = AudioMixer(self.device_id, self.samplerate, max(len(self.zones), settings.listen_channel), settings.audio_blocksize, settings.audio_latency,
+            settings.background_duck_mode, settings.background_duck_db, settings.background_duck_ramp_ms, self)
+        # Устройство открывается один раз при запуске, объявления начинаются без открытия потока
+        self.mixer.start()
 
         self.setWindowTitle("Speaker 2.0")
         self.setWindowIcon(QIcon("../resources/icons/app/icon.png"))
@@ -91,7 +96,12 @@ class SpeakerApplication(QMainWindow):
         self.flight_number_filter = LineEdit()
         self.flight_number_filter.setPlaceholderText('Поиск по номеру рейса...')
         self.flight_number_filter.setFixedSize(220, 34)
-        self.flight_number_filter.setFont(font.get_font(12))
+        self.flight_number_filter.setFont(fonts.get_font(12))
+        self.flight_number_filter.setToolTip('Enter — следующий рейс, Shift+Enter — предыдущий')
+
+        self.flight_number_match_label = QLabel()
+        self.flight_number_match_label.setFixedWidth(60)
+        self.flight_number_match_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
 
         self.flight_number_search_btn = QPushButton()
         self.flight_number_search_btn.setIcon(QIcon('../resources/icons/buttons/search.png'))
@@ -109,6 +119,8 @@ class SpeakerApplication(QMainWindow):
         self.flight_number_search_btn.clicked.connect(self.start_flight_searching)
         self.flight_number_search_cancel_btn.clicked.connect(self.stop_flight_searching)
         self.flight_number_filter.enter_pressed_signal.connect(self.flight_number_search_btn.click)
+        self.flight_number_filter.shift_enter_pressed_signal.connect(lambda: self.start_flight_searching(is_backward=True))
+        self.flight_number_filter.textChanged.connect(self.search_flight_number)
         self.flight_number_filter.empty_text_signal.connect(self.flight_number_search_cancel_btn.click)
         
         self.schedule_label = QLabel()
@@ -122,16 +134,19 @@ class SpeakerApplication(QMainWindow):
         self.schedule_header_layout.addWidget(self.flight_number_filter)
         self.schedule_header_layout.addWidget(self.flight_number_search_btn)
         self.schedule_header_layout.addWidget(self.flight_number_search_cancel_btn)
+        self.schedule_header_layout.addWidget(self.flight_number_match_label)
         self.schedule_header_layout.addWidget(self.time_label)
         self.schedule_header_layout.addWidget(self.schedule_label)
 
         self.schedule_table = ScheduleTable(self.schedule_header, self.zones)
         self.schedule_table.selectionModel().selectionChanged.connect(self.schedule_table.set_active_schedule_id)
+        self.schedule_table.selectionModel().selectionChanged.connect(self.show_flight_match_count)
+        self.schedule_table.search_model.matches_changed_signal.connect(self.show_flight_match_count)
 
         self.schedule_button_layout = PlayerButtonLayout()
         self.schedule_button_layout.btn_sound_create.clicked.connect(self.open_audio_text_dialog)
-        self.schedule_button_layout.btn_sound_play.clicked.connect(lambda: asyncio.run(self.start_playing(self.schedule_table, self.schedule_button_layout)))
-        self.schedule_button_layout.btn_sound_stop.clicked.connect(lambda: self.stop_play(self.schedule_table, self.schedule_button_layout, True))
+        self.schedule_button_layout.btn_sound_play.clicked.connect(lambda: self.start_playing(self.schedule_table, self.schedule_button_layout))
+        self.schedule_button_layout.btn_sound_stop.clicked.connect(lambda: self.stop_table(self.schedule_table))
         self.schedule_button_layout.btn_sound_delete.clicked.connect(partial(self.open_delete_audio_text_dialog, self.schedule_table))
 
         self.autoplay_checkbox = QCheckBox('Автовоспроизведение')
@@ -172,8 +187,8 @@ class SpeakerApplication(QMainWindow):
         self.background_button_layout = PlayerButtonLayout()
         # self.background_button_layout.btn_sound_create.clicked.connect(self.open_audio_text_dialog)
         self.background_button_layout.btn_sound_create.setHidden(True)
-        self.background_button_layout.btn_sound_play.clicked.connect(lambda: asyncio.run(self.start_playing(self.background_table, self.background_button_layout)))
-        self.background_button_layout.btn_sound_stop.clicked.connect(lambda: self.stop_play(self.background_table, self.background_button_layout, True))
+        self.background_button_layout.btn_sound_play.clicked.connect(lambda: self.start_playing(self.background_table, self.background_button_layout))
+        self.background_button_layout.btn_sound_stop.clicked.connect(lambda: self.stop_table(self.background_table))
         self.background_button_layout.btn_sound_delete.clicked.connect(partial(self.open_delete_audio_text_dialog, self.background_table))
 
         self.background_manipulation_layout = QHBoxLayout()
@@ -186,23 +201,31 @@ class SpeakerApplication(QMainWindow):
         self.layout.addLayout(self.schedule_layout)
         self.layout.addLayout(self.background_layout)
 
-        self.time_label.setFont(font.get_font(14))
-        self.schedule_label.setFont(font.get_font(18))
-        self.background_label.setFont(font.get_font(18))
+        self.time_label.setFont(fonts.get_font(14))
+        self.schedule_label.setFont(fonts.get_font(18))
+        self.background_label.setFont(fonts.get_font(18))
         
-        self.schedule_table.play_signal.connect(lambda data, table = self.schedule_table, buttons = self.schedule_button_layout: self.save_sound_file(table, buttons, data))
+        self.schedule_table.play_signal.connect(self.prepare_sound)
         self.schedule_table.stop_signal.connect(self.get_stop_signal)
-        self.schedule_table.error_signal.connect(lambda data, table = self.schedule_table, buttons = self.schedule_button_layout: self.get_error(table, buttons, data))
-        self.schedule_table.autoplay_signal.connect(lambda: asyncio.run(self.start_playing(self.schedule_table, self.schedule_button_layout)))
-        self.background_table.play_signal.connect(lambda data, table = self.background_table, buttons = self.background_button_layout: self.save_sound_file(table, buttons, data))
+        # Ошибки проверки приходят изнутри задачи play_job; обработчик выполняется уже после неё
+        self.schedule_table.error_signal.connect(self.get_error, Qt.ConnectionType.QueuedConnection)
+        self.schedule_table.stream_signal.connect(self.play_stream)
+        self.schedule_table.autoplay_signal.connect(self.start_autoplay)
+        self.background_table.play_signal.connect(self.prepare_sound)
+        self.background_table.stream_signal.connect(self.play_stream)
         self.background_table.stop_signal.connect(self.get_stop_signal)
-        self.background_table.error_signal.connect(lambda data, table = self.background_table, buttons = self.background_button_layout: self.get_error(table, buttons, data))
+        self.background_table.error_signal.connect(self.get_error, Qt.ConnectionType.QueuedConnection)
 
         from .SpeakerStatusBar import speaker_status_bar
         self.speaker_status_bar = speaker_status_bar
         self.setStatusBar(speaker_status_bar)
         self.statusBar().setStyleSheet("font-size: 16px")
 
+        mutation_journal.error_signal.connect(self.on_journal_error)
+        mutation_journal.start()
+        self.action_history = ActionHistoryUploader(settings.action_history_flush_ms, self)
+        asyncio.ensure_future(self.action_history.resolve_host())
+
         self.current_time_timer = QTimer()
         self.current_time_timer.setInterval(.8*1000)
         self.current_time_timer.timeout.connect(lambda: self.time_label.setText(datetime.now().strftime('%d.%m.%Y %H:%M')))
@@ -210,13 +233,18 @@ class SpeakerApplication(QMainWindow):
         
         self.autoplay_checkbox.setChecked(settings.autoplay)
 
+        self.schedule_table.terminal_model.set_terminals(snapshot.terminals)
+        if snapshot.schedule:
+            self.schedule_table.load_snapshot(snapshot.schedule)
+            self.speaker_status_bar.setStatusBarText(text=f"Данные на {snapshot.saved_at}, идёт обновление...")
+
         self.schedule_table.setFocus()
     
     def set_autoplay(self) -> None:
         self.schedule_table.autoplay_timer.stop()
         if self.sender().checkState() == Qt.CheckState.Checked:
             settings.autoplay = 1
-            self.schedule_table.autoplay_timer.start()
+            self.schedule_table.start_autoplay_timer()
             info_message = "Автоматический запуск объявлений включен"
         else:
             settings.autoplay = 0
@@ -224,131 +252,188 @@ class SpeakerApplication(QMainWindow):
         settings.save_to_json()
         self.speaker_status_bar.setStatusBarText(text=info_message)
 
-    def set_play_buttons_disabled(self, disabled: bool = False):
-        if disabled:
-            self.schedule_button_layout.btn_sound_play.setDisabled(True)
-            self.background_button_layout.btn_sound_play.setDisabled(True)
+    def search_flight_number(self, flight_number: str) -> None:
+        self.schedule_table.search_flight_number(flight_number)
+        self.flight_number_search_btn.setHidden(bool(flight_number))
+        self.flight_number_search_cancel_btn.setVisible(bool(flight_number))
+        self.show_flight_match_count()
+
+    def show_flight_match_count(self) -> None:
+        search_model = self.schedule_table.search_model
+        if not search_model.search_text:
+            self.flight_number_match_label.setText('')
+        elif match_number := search_model.match_number(self.schedule_table.currentRow()):
+            self.flight_number_match_label.setText(f"{match_number}/{search_model.match_count}")
         else:
-            self.schedule_button_layout.btn_sound_play.setEnabled(True)
-            self.background_button_layout.btn_sound_play.setEnabled(True)
-
-    def start_flight_searching(self) -> None:
-        flight_number: str = self.flight_number_filter.text()
-        self.flight_number_search_btn.setHidden(True)
-        self.flight_number_search_cancel_btn.setVisible(True)
-        find_count: int = 0
-        for row_indx in range(self.schedule_table.rowCount()):
-            flight_item: QLabel = self.schedule_table.cellWidget(row_indx, 2)
-            if flight_number in flight_item.text():
-                if find_count == 0:
-                    current_index = self.schedule_table.model().index(row_indx, 2)
-                    self.schedule_table.selectRow(row_indx)
-                    self.schedule_table.scrollTo(current_index, QAbstractItemView.ScrollHint.PositionAtTop)
-                find_count += 1
-        if find_count == 0:
+            self.flight_number_match_label.setText(f"{search_model.match_count}")
+
+    def start_flight_searching(self, is_backward: bool = False) -> None:
+        if not self.flight_number_filter.text():
+            return
+        if self.schedule_table.select_flight_match(is_backward) is None:
             error_message: str = "Рейс не найден."
             self.open_message_dialog(error_message)
             return
-        self.schedule_table.setFocus()
+        self.show_flight_match_count()
 
     def stop_flight_searching(self) -> None:
         self.flight_number_filter.setText('')
-        self.flight_number_search_btn.setVisible(True)
-        self.flight_number_search_cancel_btn.setHidden(True)
 
-    async def start_playing(self, table: ScheduleTable | BackgroundTable, buttons: PlayerButtonLayout):
-        self.set_play_buttons_disabled(True)
+    def get_job_zones(self, table: ScheduleTable | BackgroundTable, data: Optional[dict] = None) -> list[int]:
+        return table.get_current_zones(data) if table is self.schedule_table else table.get_current_zones()
+
+    def is_exclusive_playback(self) -> bool:
+        return settings.playback_parallel_zones != 1 or self.mixer.is_mono
+
+    def start_playing(self, table: ScheduleTable | BackgroundTable, buttons: PlayerButtonLayout) -> None:
+        row_id: Optional[str] = table.get_current_row_id()
+        if row_id is None:
+            error_message: str = "Ошибка воспроизведения: Необходимо выбрать объявление"
+            table.speaker_status_bar.setStatusBarText(text=error_message, is_error=True)
+            self.open_message_dialog(error_message)
+            return
+        zones: list[int] = self.get_job_zones(table)
+        if table is self.schedule_table:
+            job = PlaybackJob(PlaybackPriority.MANUAL, row_id, row_id, table, buttons, zones, self.is_exclusive_playback())
+        else:
+            job = PlaybackJob(PlaybackPriority.BACKGROUND, f"background_{row_id}", row_id, table, buttons, zones, self.is_exclusive_playback())
+        self.submit_job(job)
+
+    def start_autoplay(self, schedule_id: str, job_datetime: datetime) -> None:
+        deadline: Optional[datetime] = job_datetime + timedelta(seconds=settings.playback_stale_seconds) if settings.playback_stale_seconds > 0 else None
+        zones: list[int] = self.get_job_zones(self.schedule_table, self.schedule_table.data_origin.get(schedule_id))
+        self.submit_job(PlaybackJob(PlaybackPriority.AUTOPLAY, schedule_id, schedule_id, self.schedule_table, self.schedule_button_layout, zones, self.is_exclusive_playback(), job_datetime, deadline))
+
+    def submit_job(self, job: PlaybackJob) -> None:
+        # Сеанс создаётся при постановке в очередь, чтобы о состоянии задания сообщал и он, пока задание ждёт своей очереди
+        job.session = PlaybackSession(self.mixer, job.zones, settings.listen_channel, job.is_background)
+        job.session.state_signal.connect(lambda state: self.on_playback_state(job, state))
+        job.session.error_signal.connect(lambda error_message: self.get_error(job, error_message))
+        if not self.scheduler.submit(job):
+            return
+        job.session.set_state(PlaybackState.QUEUED)
+        if self.scheduler.is_blocked(job):
+            self.speaker_status_bar.setStatusBarText(text=f"Объявление поставлено в очередь, ожидают воспроизведения: {len(self.scheduler)}")
+
+    def on_job_skipped(self, job: PlaybackJob) -> None:
+        job.table.remove_from_autoplay(job.row_id)
+        warning_message: str = f"Объявление {job.row_id} пропущено: запланировано на {job.planned:%H:%M}, срок воспроизведения истёк"
+        self.speaker_status_bar.setStatusBarText(text=warning_message, is_error=True)
+
+    def get_playing_jobs(self, table: ScheduleTable | BackgroundTable) -> list[PlaybackJob]:
+        return [job for job in self.scheduler.playing.values() if job.table is table]
+
+    async def play_job(self, job: PlaybackJob) -> None:
+        table, buttons = job.table, job.buttons
+        if not table.select_row_id(job.row_id):
+            logger.warning(f"Объявление {job.row_id} не найдено в таблице, воспроизведение пропущено")
+            self.scheduler.finish(job)
+            return
         buttons.btn_sound_play.setHidden(True)
         buttons.btn_sound_stop.setVisible(True)
-        buttons.btn_sound_stop.setDisabled(True)
-        self.schedule_table.autoplay_timer.stop()
-        await table.get_audio_file()
+        if len(self.get_playing_jobs(table)) == 1:
+            buttons.btn_sound_stop.setDisabled(True)
+        job.requested_time = time.perf_counter()
+        await table.get_audio_file(job)
     
-    def get_error(self, table: ScheduleTable | BackgroundTable, buttons: PlayerButtonLayout, error_message: str) -> None:
-        table.speaker_status_bar.setStatusBarText(text=error_message, is_error=True)
+    def get_error(self, job: PlaybackJob, error_message: str) -> None:
+        job.table.speaker_status_bar.setStatusBarText(text=error_message, is_error=True)
         self.open_message_dialog(error_message)
-        self.stop_play(table, buttons, is_error=True)
+        self.stop_play(job, is_error=True)
 
     def get_stop_signal(self, reply):
         print('stop play', reply)
 
-    def save_sound_file(self, table: ScheduleTable | BackgroundTable, buttons: PlayerButtonLayout, data: QtNetwork.QNetworkReply):
-        buttons.btn_sound_stop.setEnabled(True)
-        self.file = QSaveFile(table.current_sound_file)
-        data = data.readAll()
+    def prepare_sound(self, job: PlaybackJob, data: bytes) -> None:
+        job.buttons.btn_sound_stop.setEnabled(True)
         if len(data) == 0:
-            self.get_error(table, buttons, "Ошибка воспроизведения: Файл не сформирован.")
+            self.get_error(job, "Ошибка воспроизведения: Файл не сформирован.")
+            return
+        job.sound_task = asyncio.ensure_future(self.decode_and_play(job, data))
+
+    async def decode_and_play(self, job: PlaybackJob, data: bytes) -> None:
+        prepared: Optional[PreparedSound] = job.prepared_sound
+        try:
+            # Декодирование и приведение к частоте вывода в отдельном потоке, интерфейс в это время не блокируется
+            if prepared is None:
+                prepared = await asyncio.get_running_loop().run_in_executor(None, decode_sound, data, self.mixer.samplerate)
+            frames: np.ndarray = await asyncio.get_running_loop().run_in_executor(None, prepared.get_frames, self.mixer.samplerate)
+        except (RuntimeError, ValueError) as err:
+            self.get_error(job, f"Ошибка воспроизведения: Не удалось прочитать звук ({err})")
             return
-        self.file.open(QIODevice.OpenModeFlag.WriteOnly)
-        self.file.write(data)
-        self.file.commit()
-        self.play_sound(table, buttons)
-
-    def save_action_history(self, user_uuid: str, table: ScheduleTable | BackgroundTable, action_code: int) -> None:
-        url_file = QUrl(settings.api_url+'save_action_history')
-        query = QUrlQuery()
-        url_file.setQuery(query.query())
-        body = QJsonDocument({
+        self.play_sound(job, frames)
+
+    def on_journal_error(self, error_message: str) -> None:
+        self.speaker_status_bar.setStatusBarText(text=error_message, is_error=True)
+
+    def save_action_history(self, user_uuid: str, job: PlaybackJob, action_code: int) -> None:
+        self.action_history.add({
             'user_id': user_uuid,
-            'flight_id': table.current_data.get('flight_id'),
-            'audio_text_id': table.current_data.get('audio_text_id'),
-            'languages': ','.join(map(str, table.get_current_languages())),
-            'zones': ','.join(map(str, table.get_current_zones())),
-            'terminal': table.get_current_terminal(),
-            'boarding_gates': table.get_current_boarding_gates(),
+            'flight_id': job.data.get('flight_id'),
+            'audio_text_id': job.data.get('audio_text_id'),
+            'languages': ','.join(map(str, job.languages)),
+            'zones': ','.join(map(str, job.zones)),
+            'terminal': job.table.get_current_terminal(job.data),
+            'boarding_gates': job.table.get_current_boarding_gates(job.data),
             'action_code': action_code,
-            'ipv4': socket.gethostbyname(socket.gethostname()),
-            'is_autoplay': table.is_autoplay
+            'is_autoplay': job.is_autoplay
         })
-        request = QtNetwork.QNetworkRequest(url_file)
-        request.setHeader(QtNetwork.QNetworkRequest.KnownHeaders.ContentTypeHeader, "application/json")
-        self.API_history = QtNetwork.QNetworkAccessManager()
-        self.API_history.post(request, body.toJson())
 
-    def play_sound(self, table: ScheduleTable | BackgroundTable, buttons: PlayerButtonLayout) -> None:
-        table.setDisabled(True)
-        buttons.btn_sound_delete.setDisabled(True)
-
-        file_info = sf.info(table.current_sound_file)
-        duration = ceil(file_info.duration) * 1_000 + 500
-        
-        data, _ = sf.read(table.current_sound_file)
-        sd.default.device = self.device_id
-        sd.default.samplerate = self.samplerate
-        try:
-            sd.play(data, mapping=[*table.get_current_zones(), settings.listen_channel])
-        except sd.PortAudioError as err:
-            sd.play(data, mapping=[1])
-
-        self.save_action_history(user_uuid=self.user_uuid, table=table, action_code=1)
-
-        self.play_finish_timer.setInterval(duration)
-        self.play_finish_timer.timeout.connect(lambda: self.stop_play(table, buttons))
-        self.play_finish_timer.start()
-
-    def stop_play(self, table: ScheduleTable | BackgroundTable, buttons: PlayerButtonLayout, is_manual_pressed: bool = False, is_error: bool = False) -> None:
-        sd.stop()
-        if table.current_sound_file and os.path.isfile(table.current_sound_file):
-            try:
-                os.unlink(table.current_sound_file)
-            except PermissionError:
-                pass
-        self.set_play_buttons_disabled(False)
-        table.setEnabled(True)
-        buttons.btn_sound_delete.setEnabled(True)
-        table.timer.start()
-        if settings.autoplay and self.schedule_table.autoplay_timer:
-            self.schedule_table.autoplay_timer.start()
-        self.play_finish_timer.stop()
-        buttons.btn_sound_play.setVisible(True)
-        buttons.btn_sound_stop.setHidden(True)
+    def play_sound(self, job: PlaybackJob, frames: np.ndarray) -> None:
+        job.table.setDisabled(True)
+        job.buttons.btn_sound_delete.setDisabled(True)
+        job.session.play_frames(frames)
+
+    def play_stream(self, job: PlaybackJob, stream: AudioStream) -> None:
+        job.buttons.btn_sound_stop.setEnabled(True)
+        job.table.setDisabled(True)
+        job.buttons.btn_sound_delete.setDisabled(True)
+        job.session.play_stream(stream)
+
+    def on_playback_state(self, job: PlaybackJob, state: PlaybackState) -> None:
+        match state:
+            case PlaybackState.PLAYING:
+                self.on_play_started(job)
+            case PlaybackState.DONE:
+                self.session_count += 1
+                self.underrun_count += job.session.underrun_count
+                if job.session.underrun_count:
+                    logger.warning(f"Недогрузок буфера при потоковом воспроизведении: {job.session.underrun_count}")
+                self.stop_play(job)
+
+    def on_play_started(self, job: PlaybackJob) -> None:
+        logger.info(f"От запуска до начала воспроизведения {(time.perf_counter() - job.requested_time) * 1000:.0f} мс")
+        if job.is_autoplay:
+            job.table.prefetcher.record_start(job.data, job.prepared_sound is not None, job.requested_time)
+        job.prepared_sound = None
+        self.save_action_history(user_uuid=self.user_uuid, job=job, action_code=1)
+
+    def stop_table(self, table: ScheduleTable | BackgroundTable) -> None:
+        for job in self.get_playing_jobs(table):
+            self.stop_play(job, is_manual_pressed=True)
+
+    def stop_play(self, job: PlaybackJob, is_manual_pressed: bool = False, is_error: bool = False) -> None:
+        if self.scheduler.playing.get(job.key) is not job:
+            return
+        table, buttons = job.table, job.buttons
+        if job.session is not None:
+            job.session.stop()
+        if job.sound_task is not None and not job.sound_task.done():
+            job.sound_task.cancel()
+        self.scheduler.finish(job)
+        if not self.get_playing_jobs(table):
+            table.setEnabled(True)
+            buttons.btn_sound_delete.setEnabled(True)
+            table.timer.start()
+            buttons.btn_sound_play.setVisible(True)
+            buttons.btn_sound_stop.setHidden(True)
+        self.schedule_table.start_autoplay_timer()
         if is_manual_pressed:
-            self.save_action_history(user_uuid=self.user_uuid, table=table, action_code=0)
-            self.schedule_table.set_schedule_autoplay_is_canceled()
-        elif is_error is False and table.__class__.__name__ == 'ScheduleTable':
-            table.set_mark_in_cell(table.currentRow(), 1)
-            table.set_schedule_is_played()
-        table.is_autoplay = False
+            self.save_action_history(user_uuid=self.user_uuid, job=job, action_code=0)
+            if table is self.schedule_table and job.data:
+                table.set_schedule_autoplay_is_canceled(job.data)
+        elif is_error is False and table is self.schedule_table:
+            table.set_schedule_is_played(job.data)
 
     def open_audio_text_dialog(self) -> None:
         self.schedule_table.timer.stop()
@@ -356,25 +441,28 @@ class SpeakerApplication(QMainWindow):
         flight_id, _ = map(int, self.schedule_table.get_current_row_id().split('_'))
         self.audio_text_dialog = AudioTextDialog(self)
         self.audio_text_dialog.flight_combobox_model.clear()
-        asyncio.run(self.audio_text_dialog.get_flights_from_API(flight_id))
-        asyncio.run(self.audio_text_dialog.get_audio_text_from_API())
-        asyncio.run(self.audio_text_dialog.get_audio_text_reasons_from_API())
-        asyncio.run(self.audio_text_dialog.get_terminal_from_API())
-        asyncio.run(self.audio_text_dialog.get_aerodrome_from_API())
+        # Справочники диалога загружаются параллельно, незавершённые запросы отменяются при закрытии
+        loading = asyncio.gather(
+            self.audio_text_dialog.get_flights_from_API(flight_id),
+            self.audio_text_dialog.get_audio_text_from_API(),
+            self.audio_text_dialog.get_audio_text_reasons_from_API(),
+            self.audio_text_dialog.get_terminal_from_API(),
+            self.audio_text_dialog.get_aerodrome_from_API()
+        )
         self.audio_text_dialog.audio_text_info_layout.itemAt(0).widget().widget().setText('')
         self.audio_text_dialog.append_signal.connect(self.schedule_table_after_append)
         self.audio_text_dialog.exec()
+        loading.cancel()
 
     def schedule_table_after_append(self, reply: tuple = None):
         if reply:
             reply_code, reply_message, reply_body = reply
             if reply_code in [200]:
                 self.schedule_table.current_schedule_id = f"{reply_body.get('flight_id')}_{reply_body.get('audio_text_id')}"
-                asyncio.run(self.schedule_table.get_scheduler_data_from_API(flight_id=reply_body.get('flight_id'), audio_text_id=reply_body.get('audio_text_id')))
+                asyncio.ensure_future(self.schedule_table.get_scheduler_data_from_API(flight_id=reply_body.get('flight_id'), audio_text_id=reply_body.get('audio_text_id')))
             self.open_message_dialog(reply_message)
         self.schedule_table.timer.start()
-        if settings.autoplay:
-            self.schedule_table.autoplay_timer.start()
+        self.schedule_table.start_autoplay_timer()
 
     def open_delete_audio_text_dialog(self, table: ScheduleTable | BackgroundTable) -> None:
         match table.__class__.__name__:
@@ -420,22 +508,70 @@ class SpeakerApplication(QMainWindow):
                     self.open_message_dialog(error_message)
 
         table.timer.start()
-        if settings.autoplay and table.autoplay_timer:
-            table.autoplay_timer.start()
+        if table.autoplay_timer:
+            table.start_autoplay_timer()
         self.delete_audio_text_dialog.destroy()
     
-    async def get_terminal_data_from_API(self) -> None:
-        url_file = QUrl(settings.api_url+'get_terminals')
-        request = QtNetwork.QNetworkRequest(url_file)
-        self.API_manager = QtNetwork.QNetworkAccessManager()
-        self.API_manager.get(request)
-        self.API_manager.finished.connect(self.set_terminals)
-
-    def set_terminals(self, terminals: QtNetwork.QNetworkReply) -> None:
-        bytes_string = terminals.readAll()
-        self.schedule_table.terminals = json.loads(str(bytes_string, 'utf-8'))
-        asyncio.run(self.schedule_table.get_scheduler_data_from_API())
+    async def bootstrap(self) -> None:
+        zones, terminals, _ = await asyncio.gather(
+            api_client.fetch(api_client.create_request('get_zones'), self.read_list),
+            api_client.fetch(api_client.create_request('get_terminals'), self.read_list),
+            self.schedule_table.get_scheduler_data_from_API()
+        )
+        if terminals is not None:
+            self.schedule_table.terminal_model.set_terminals(terminals)
+        if zones is not None:
+            self.set_zones(zones)
+        if zones is not None and terminals is not None:
+            self.save_snapshot(zones, terminals)
+
+    def read_list(self, reply: QtNetwork.QNetworkReply) -> Optional[list[dict]]:
+        match reply.error():
+            case QtNetwork.QNetworkReply.NetworkError.NoError:
+                return json.loads(str(reply.readAll(), 'utf-8'))
+            case _:
+                logger.error(f"Ошибка подключения к API: {reply.errorString()}")
+                return None
+
+    def set_zones(self, zones: list[dict]) -> None:
+        if zones == self.zones:
+            return
+        if [zone.get('id') for zone in zones] == [zone.get('id') for zone in self.zones]:
+            self.zones[:] = zones
+            self.zones_layout.set_zones(self.zones)
+            return
+        # Зоны определяют набор столбцов таблиц, поэтому новый состав применяется после перезапуска
+        error_message: str = "Список зон изменился. Перезапустите приложение"
+        logger.warning(error_message)
+        self.speaker_status_bar.setStatusBarText(text=error_message, is_error=True)
+
+    def save_snapshot(self, zones: Optional[list[dict]] = None, terminals: Optional[list[dict]] = None) -> None:
+        try:
+            snapshot.save(zones or self.zones, terminals or self.schedule_table.terminal_model.terminals, list(self.schedule_table.data_origin))
+        except OSError as err:
+            logger.error(f"Не удалось сохранить снимок данных: {err}")
 
     def open_message_dialog(self, message: str) -> None:
+        # Окно открывается без вложенного цикла событий: сообщение часто показывается из задачи asyncio,
+        # и пока exec() не вернулся, остальные задачи qasync не смогли бы продолжиться
         self.message_dialog: MessageDialog = MessageDialog(self, message)
-        self.message_dialog.exec()
+        self.message_dialog.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose)
+        self.message_dialog.open()
+
+    def closeEvent(self, event) -> None:
+        self.schedule_table.write_back.flush(is_final=True)
+        self.background_table.write_back.flush(is_final=True)
+        self.action_history.flush(is_final=True)
+        self.save_snapshot()
+        self.schedule_table.prefetcher.stop()
+        logger.info(f"Статистика запросов к API: {api_client.get_statistics()}")
+        logger.info(f"Статистика автозапуска: {self.schedule_table.prefetcher.get_statistics()}")
+        logger.info(f"Сохранение правок: расписание {self.schedule_table.write_back.get_statistics()}, фоновые {self.background_table.write_back.get_statistics()}")
+        logger.info(f"Очередь воспроизведения: {self.scheduler.get_statistics()}")
+        logger.info(f"Воспроизведение: {self.session_count} объявлений, недогрузок буфера {self.underrun_count}")
+        logger.info(f"Звуковой вывод: {self.mixer.get_statistics()}")
+        logger.info(f"История действий: {self.action_history.get_statistics()}")
+        logger.info(f"Журнал изменений: {mutation_journal.get_statistics()}")
+        self.mixer.close()
+        mutation_journal.close()
+        super().closeEvent(event)
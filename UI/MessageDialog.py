@@ -3,7 +3,7 @@ from PySide6.QtCore import Qt
 from PySide6.QtGui import QIcon
 
 from .SpeakerButton import SpeakerButton
-from .Font import RobotoFont
+from .Font import fonts
 
 class MessageDialog(QDialog):
     def __init__(self, parent, message) -> None:
@@ -13,12 +13,11 @@ class MessageDialog(QDialog):
         self.setWindowIcon(QIcon("icons/app/icon.png"))
         self.setMinimumSize(350, 100)
         self.setMaximumSize(600, 300)
-        font = RobotoFont()
 
         self.layout: QGridLayout = QGridLayout(self)
 
         self.message_label = QLabel(message)
-        self.message_label.setFont(font.get_font())
+        self.message_label.setFont(fonts.get_font())
         self.message_label.setWordWrap(True)
 
         self.btn_message_close = SpeakerButton(text='Закрыть')
@@ -0,0 +1,138 @@
+from PySide6.QtWidgets import QStyledItemDelegate, QStyleOptionViewItem, QStyleOptionComboBox, QStyle, QApplication, QComboBox, QLineEdit, QTimeEdit, QWidget
+from PySide6.QtCore import Qt, QEvent, QRect, QTime, QTimer, QModelIndex, QAbstractItemModel, QRegularExpression
+from PySide6.QtGui import QColor, QPalette, QPainter, QWheelEvent, QRegularExpressionValidator
+
+from .Font import fonts
+
+class ComboBox(QComboBox):
+    def wheelEvent(self, event: QWheelEvent) -> None:
+        if event.type() == QEvent.Type.Wheel:
+            event.ignore()
+
+class ScheduleItemDelegate(QStyledItemDelegate):
+    disabled_color: QColor = QColor(174, 175, 178)
+
+    def initStyleOption(self, option: QStyleOptionViewItem, index: QModelIndex) -> None:
+        super().initStyleOption(option, index)
+        if not option.state & QStyle.StateFlag.State_Enabled:
+            option.palette.setColor(QPalette.ColorRole.Text, self.disabled_color)
+
+    def widget_style(self, option: QStyleOptionViewItem) -> QStyle:
+        return option.widget.style() if option.widget else QApplication.style()
+
+class CheckboxDelegate(ScheduleItemDelegate):
+    indicator_size: int = 20
+
+    def indicator_rect(self, rect: QRect) -> QRect:
+        indicator = QRect(0, 0, self.indicator_size, self.indicator_size)
+        indicator.moveCenter(rect.center())
+        return indicator
+
+    def paint(self, painter: QPainter, option: QStyleOptionViewItem, index: QModelIndex) -> None:
+        option = QStyleOptionViewItem(option)
+        self.initStyleOption(option, index)
+        check_state = option.checkState
+        has_check_indicator: bool = bool(option.features & QStyleOptionViewItem.ViewItemFeature.HasCheckIndicator)
+        option.features &= ~QStyleOptionViewItem.ViewItemFeature.HasCheckIndicator
+        option.text = ''
+        style: QStyle = self.widget_style(option)
+        style.drawControl(QStyle.ControlElement.CE_ItemViewItem, option, painter, option.widget)
+        if not has_check_indicator:
+            return
+        option.rect = self.indicator_rect(option.rect)
+        option.state &= ~(QStyle.StateFlag.State_On | QStyle.StateFlag.State_Off | QStyle.StateFlag.State_Selected)
+        option.state |= (QStyle.StateFlag.State_Off, QStyle.StateFlag.State_On)[check_state == Qt.CheckState.Checked]
+        style.drawPrimitive(QStyle.PrimitiveElement.PE_IndicatorItemViewItemCheck, option, painter, option.widget)
+
+    def editorEvent(self, event: QEvent, model: QAbstractItemModel, option: QStyleOptionViewItem, index: QModelIndex) -> bool:
+        flags = index.flags()
+        if not flags & Qt.ItemFlag.ItemIsUserCheckable or not flags & Qt.ItemFlag.ItemIsEnabled:
+            return False
+        match event.type():
+            case QEvent.Type.MouseButtonRelease:
+                if event.button() != Qt.MouseButton.LeftButton or not option.rect.contains(event.position().toPoint()):
+                    return False
+            case QEvent.Type.MouseButtonDblClick:
+                return True
+            case QEvent.Type.KeyPress:
+                if event.key() not in (Qt.Key.Key_Space, Qt.Key.Key_Select):
+                    return False
+            case _:
+                return False
+        is_checked: bool = index.data(Qt.ItemDataRole.CheckStateRole) == Qt.CheckState.Checked
+        return model.setData(index, (Qt.CheckState.Checked, Qt.CheckState.Unchecked)[is_checked], Qt.ItemDataRole.CheckStateRole)
+
+class TerminalDelegate(ScheduleItemDelegate):
+    def __init__(self, parent) -> None:
+        super().__init__(parent)
+        self.table = parent
+
+    def paint(self, painter: QPainter, option: QStyleOptionViewItem, index: QModelIndex) -> None:
+        super().paint(painter, option, index)
+        combobox_option = QStyleOptionComboBox()
+        combobox_option.rect = QRect(0, 0, min(50, option.rect.width()), min(26, option.rect.height()))
+        combobox_option.rect.moveCenter(option.rect.center())
+        combobox_option.state = option.state & QStyle.StateFlag.State_Enabled
+        combobox_option.currentText = index.data() or ''
+        combobox_option.palette = option.palette
+        style: QStyle = self.widget_style(option)
+        style.drawComplexControl(QStyle.ComplexControl.CC_ComboBox, combobox_option, painter, option.widget)
+        style.drawControl(QStyle.ControlElement.CE_ComboBoxLabel, combobox_option, painter, option.widget)
+
+    def displayText(self, value, locale) -> str:
+        return ''
+
+    def createEditor(self, parent: QWidget, option: QStyleOptionViewItem, index: QModelIndex) -> ComboBox:
+        combobox = ComboBox(parent)
+        combobox.setFont(fonts.get_font(10))
+        combobox.setCursor(Qt.CursorShape.PointingHandCursor)
+        combobox.setModel(self.table.terminal_model)
+        combobox.activated.connect(lambda: self.commit_and_close(combobox))
+        QTimer.singleShot(0, combobox.showPopup)
+        return combobox
+
+    def commit_and_close(self, editor: ComboBox) -> None:
+        self.commitData.emit(editor)
+        self.closeEditor.emit(editor)
+
+    def setEditorData(self, editor: ComboBox, index: QModelIndex) -> None:
+        editor.setCurrentIndex(self.table.terminal_model.index_of(index.data()))
+
+    def setModelData(self, editor: ComboBox, model: QAbstractItemModel, index: QModelIndex) -> None:
+        if editor.currentIndex() >= 0:
+            model.setData(index, editor.currentText(), Qt.ItemDataRole.EditRole)
+
+    def updateEditorGeometry(self, editor: ComboBox, option: QStyleOptionViewItem, index: QModelIndex) -> None:
+        rect = QRect(0, 0, min(50, option.rect.width()), min(26, option.rect.height()))
+        rect.moveCenter(option.rect.center())
+        editor.setGeometry(rect)
+
+class BoardingGateDelegate(ScheduleItemDelegate):
+    def createEditor(self, parent: QWidget, option: QStyleOptionViewItem, index: QModelIndex) -> QLineEdit:
+        line_edit = QLineEdit(parent)
+        line_edit.setFont(fonts.get_font(10))
+        line_edit.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        line_edit.setObjectName('boarding_gate_editor')
+        line_edit.setValidator(QRegularExpressionValidator(QRegularExpression(r'^(\d+(,\d*)*)?$'), line_edit))
+        return line_edit
+
+    def setEditorData(self, editor: QLineEdit, index: QModelIndex) -> None:
+        editor.setText(index.data() or '')
+
+    def setModelData(self, editor: QLineEdit, model: QAbstractItemModel, index: QModelIndex) -> None:
+        model.setData(index, editor.text().strip(','), Qt.ItemDataRole.EditRole)
+
+class EventTimeDelegate(ScheduleItemDelegate):
+    def createEditor(self, parent: QWidget, option: QStyleOptionViewItem, index: QModelIndex) -> QTimeEdit:
+        time_edit = QTimeEdit(parent)
+        time_edit.setDisplayFormat('HH:mm')
+        time_edit.setFont(fonts.get_font(12))
+        return time_edit
+
+    def setEditorData(self, editor: QTimeEdit, index: QModelIndex) -> None:
+        if event_time := index.data():
+            hours, minutes = list(map(int, event_time.split(':')))[:2]
+            editor.setTime(QTime(hours, minutes))
+
+    def setModelData(self, editor: QTimeEdit, model: QAbstractItemModel, index: QModelIndex) -> None:
+        model.setData(index, editor.time().toString('HH:mm'), Qt.ItemDataRole.EditRole)
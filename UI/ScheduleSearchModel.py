@@ -0,0 +1,82 @@
+from bisect import bisect_left, bisect_right
+from typing import Any, Optional
+
+from PySide6.QtCore import Qt, QIdentityProxyModel, QModelIndex, Signal
+from PySide6.QtGui import QColor
+
+from .ScheduleTableModel import ScheduleTableModel
+
+class ScheduleSearchModel(QIdentityProxyModel):
+    """
+    The schedule as the table sees it, with the rows matching the flight number search highlighted.
+    Rows map one to one onto the source model, so row numbers stay valid for the rest of the table code.
+    Matches come from the flight number index of the schedule store and are looked up again
+    whenever the rows change; only the rows whose highlight changed are repainted.
+    """
+    matches_changed_signal: Signal = Signal(int)
+
+    def __init__(self, source: ScheduleTableModel, parent=None) -> None:
+        super().__init__(parent)
+        self.setSourceModel(source)
+        self.search_text: str = ''
+        self.match_rows: list[int] = []
+        self.match_row_set: set[int] = set()
+        self.match_color = QColor(255, 236, 140)
+
+        source.modelReset.connect(self.refresh)
+        source.rowsInserted.connect(self.refresh)
+        source.rowsRemoved.connect(self.refresh)
+        source.rowsMoved.connect(self.refresh)
+        source.dataChanged.connect(self.on_source_data_changed)
+
+    @property
+    def match_count(self) -> int:
+        return len(self.match_rows)
+
+    def set_search_text(self, text: str) -> int:
+        if text != self.search_text:
+            self.search_text = text
+            self.refresh()
+        return self.match_count
+
+    def refresh(self) -> None:
+        rows: list[int] = self.sourceModel().rows.search_flight_number(self.search_text) if self.search_text else []
+        if rows == self.match_rows:
+            return
+        previous: set[int] = self.match_row_set
+        self.match_rows = rows
+        self.match_row_set = set(rows)
+        row_count: int = self.rowCount()
+        changed: set[int] = {row_indx for row_indx in previous ^ self.match_row_set if row_indx < row_count}
+        if changed:
+            # Одно событие на диапазон изменившихся строк, перерисовывается только видимая часть
+            self.dataChanged.emit(self.index(min(changed), 0), self.index(max(changed), self.columnCount()-1), [Qt.ItemDataRole.BackgroundRole])
+        self.matches_changed_signal.emit(self.match_count)
+
+    def on_source_data_changed(self, top_left: QModelIndex, bottom_right: QModelIndex, roles: Optional[list[int]] = None) -> None:
+        if self.search_text and top_left.column() <= 2 <= bottom_right.column():
+            self.refresh()
+
+    def is_match(self, row_indx: int) -> bool:
+        return row_indx in self.match_row_set
+
+    def next_match(self, row_indx: int) -> Optional[int]:
+        if not self.match_rows:
+            return None
+        position: int = bisect_right(self.match_rows, row_indx)
+        return self.match_rows[position % len(self.match_rows)]
+
+    def previous_match(self, row_indx: int) -> Optional[int]:
+        if not self.match_rows:
+            return None
+        position: int = bisect_left(self.match_rows, row_indx) - 1
+        return self.match_rows[position % len(self.match_rows)]
+
+    def match_number(self, row_indx: int) -> int:
+        return bisect_left(self.match_rows, row_indx) + 1 if self.is_match(row_indx) else 0
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole) -> Any:
+        # Первый столбец сохраняет свою заливку: она показывает, проиграно ли объявление
+        if role == Qt.ItemDataRole.BackgroundRole and index.column() != 1 and self.is_match(index.row()):
+            return self.match_color
+        return super().data(index, role)
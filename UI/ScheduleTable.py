@@ -1,76 +1,81 @@
 import json
 import asyncio
+from math import ceil
+from bisect import bisect_right
 from datetime import datetime
 
 from typing import Optional
-from PySide6.QtWidgets import QTableWidget, QHeaderView, QAbstractItemView, QWidget, QCheckBox, QHBoxLayout, QTextEdit, QComboBox, QLabel, QTimeEdit
-from PySide6.QtCore import Qt, QUrl, QTimer, QUrl, QUrlQuery, QJsonDocument, Signal, QEvent, QTime
-from PySide6.QtGui import QStandardItem, QStandardItemModel, QWheelEvent, QKeyEvent
+from PySide6.QtWidgets import QTableView, QHeaderView, QAbstractItemView
+from PySide6.QtCore import Qt, QUrl, QTimer, QUrlQuery, QJsonDocument, Signal
 from PySide6 import QtNetwork
 
-from globals import root_directory, settings, logger, TableCheckbox
-from .Font import RobotoFont
-
-class ComboBox(QComboBox):
-    def wheelEvent(self, event: QWheelEvent) -> None:
-        if event.type() == QEvent.Type.Wheel:
-            event.ignore()
-
-class TextEdit(QTextEdit):
-    enter_pressed_signal: Signal = Signal()
-
-    def keyPressEvent(self, event: QKeyEvent) -> None:
-        if event.key() in (Qt.Key.Key_Return, Qt.Key.Key_Enter):
-            self.enter_pressed_signal.emit()
-            return
-        super().keyPressEvent(event)
-
-class TimeEdit(QTimeEdit):
-    enter_pressed_signal: Signal = Signal()
-    
-    def __init__(self, parent=None) -> None:
-        super().__init__(parent)
-        self.setFixedWidth(70)
-        self.setStyleSheet("""
-            TimeEdit {
-                font-size: 14px;
-                min-height: 28px;
-                max-height: 28px;
-            }
-        """)
-
-    def keyPressEvent(self, event: QKeyEvent) -> None:
-        if event.key() in (Qt.Key.Key_Return, Qt.Key.Key_Enter):
-            self.enter_pressed_signal.emit()
-            return
-        super().keyPressEvent(event)
-
-class ScheduleTable(QTableWidget):
-    terminals: list[dict]
+from globals import settings, logger
+from .Font import fonts
+from API.Client import api_client
+from API.ConditionalFetch import ConditionalFetch, ReplyValidators
+from API.Journal import mutation_journal
+from API.WriteBack import EditWriteBack
+from Audio.Cache import audio_cache
+from Audio.Prefetch import AudioPrefetcher
+from Audio.Scheduler import PlaybackJob
+from Audio.Stream import AudioStream
+from Schedule.Autoplay import AutoplayQueue
+from Schedule.Diff import ScheduleDiff
+from Schedule.Refresh import PreparedRefresh, prepare_refresh
+from Schedule.Store import ScheduleStore
+from .ScheduleSearchModel import ScheduleSearchModel
+from .ScheduleTableModel import ScheduleTableModel, schedule_sort_key, EDITABLE_FIELDS, LANGUAGE_COLUMNS, TERMINAL_COLUMN, BOARDING_GATE_COLUMN, EVENT_TIME_COLUMN, ZONE_FIRST_COLUMN
+from .TerminalModel import TerminalModel
+from .ScheduleDelegates import ScheduleItemDelegate, CheckboxDelegate, TerminalDelegate, BoardingGateDelegate, EventTimeDelegate
+
+# Поля строки, от которых зависит синтезированный звук; зоны влияют только на маршрутизацию
+SOUND_FIELDS: frozenset[str] = frozenset(('flight_id', 'audio_text_id', 'flight_number_full', 'direction_id', 'path', 'plan_flight_time', 'public_flight_time', 'event_time', 'audio_text', 'audio_text_description', 'terminal', 'boarding_gates'))
+# Таймер автозапуска взводится не дальше минуты вперёд, чтобы перевод системных часов не откладывал запуск
+AUTOPLAY_TIMER_MAX_MS: int = 60000
+# Поля строки, которые определяют постановку на автозапуск; при изменении других полей строка не переставляется
+AUTOPLAY_FIELDS: frozenset[str] = frozenset(('job_id', 'job_time', 'job_datetime', 'job_is_fact', 'is_played', 'autoplay_is_canceled'))
+# Сколько раз обновление готовится в фоне заново, если строки таблицы успели измениться; затем — в потоке интерфейса
+REFRESH_PREPARE_ATTEMPTS: int = 3
+
+class ScheduleTable(QTableView):
     current_schedule_id: str = None
     current_data: dict = {}
-    current_sound_file: str = None
-    play_signal: Signal = Signal(QtNetwork.QNetworkReply)
+    play_signal: Signal = Signal(PlaybackJob, bytes)
+    stream_signal: Signal = Signal(PlaybackJob, AudioStream)
     stop_signal: Signal = Signal(tuple)
-    error_signal: Signal = Signal(str)
-    autoplay_signal: Signal = Signal()
-    autoplay_files: dict = []
-    is_autoplay: bool = False
+    error_signal: Signal = Signal(PlaybackJob, str)
+    autoplay_signal: Signal = Signal(str, datetime)
+    autoplay_files: dict = {}
 
     def __init__(self, header: tuple[str], zones: dict, parent=None) -> None:
         self.header: tuple[str] = header
         self.zones: dict = zones
         self.col_count: int = len(self.header)
-        self.row_count: int = 0
-        super().__init__(self.row_count, self.col_count, parent)
+        super().__init__(parent)
 
-        self.font: RobotoFont = RobotoFont()
+        self.table_model = ScheduleTableModel(self.header, self.zones, self)
+        self.table_model.row_edited_signal.connect(self.on_row_edited)
+        self.search_model = ScheduleSearchModel(self.table_model, self)
+        self.setModel(self.search_model)
+        self.terminal_model = TerminalModel(self)
+
+        self.setFont(fonts.get_font())
+        self.setItemDelegate(ScheduleItemDelegate(self))
+        checkbox_delegate = CheckboxDelegate(self)
+        for col_indx in [*LANGUAGE_COLUMNS, *range(ZONE_FIRST_COLUMN, ZONE_FIRST_COLUMN+len(self.zones))]:
+            self.setItemDelegateForColumn(col_indx, checkbox_delegate)
+        self.setItemDelegateForColumn(TERMINAL_COLUMN, TerminalDelegate(self))
+        self.setItemDelegateForColumn(BOARDING_GATE_COLUMN, BoardingGateDelegate(self))
+        self.setItemDelegateForColumn(EVENT_TIME_COLUMN, EventTimeDelegate(self))
 
         self.setAlternatingRowColors(True)
         self.setMinimumWidth(500)
+        self.setWordWrap(True)
         self.verticalHeader().setHidden(True)
-        
-        self.setHorizontalHeaderLabels(self.header)
+        self.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        self.verticalHeader().setDefaultSectionSize(40)
+        self.horizontalHeader().setResizeContentsPrecision(0)
+
         self.setColumnHidden(0, True)
         self.setColumnHidden(len(self.header)-1, True)
         self.horizontalHeader().setSectionResizeMode(1, QHeaderView.ResizeMode.Fixed)
@@ -83,8 +88,8 @@ class ScheduleTable(QTableWidget):
         self.horizontalHeader().setSectionResizeMode(8, QHeaderView.ResizeMode.Fixed)
         self.horizontalHeader().setSectionResizeMode(9, QHeaderView.ResizeMode.Fixed)
         self.horizontalHeader().setSectionResizeMode(10, QHeaderView.ResizeMode.Fixed)
-        self.horizontalHeader().setSectionResizeMode(11, QHeaderView.ResizeMode.ResizeToContents)
-        self.horizontalHeader().setSectionResizeMode(12, QHeaderView.ResizeMode.ResizeToContents)
+        self.horizontalHeader().setSectionResizeMode(11, QHeaderView.ResizeMode.Fixed)
+        self.horizontalHeader().setSectionResizeMode(12, QHeaderView.ResizeMode.Fixed)
         self.setColumnWidth(1, 50)
         self.setColumnWidth(4, 72)
         self.setColumnWidth(5, 90)
@@ -92,316 +97,241 @@ class ScheduleTable(QTableWidget):
         self.setColumnWidth(8, 32)
         self.setColumnWidth(9, 32)
         self.setColumnWidth(10, 32)
+        self.setColumnWidth(11, 70)
+        self.setColumnWidth(12, 70)
         for i in range(0, len(self.zones)):
             self.horizontalHeader().setSectionResizeMode(13+i, QHeaderView.ResizeMode.Fixed)
             self.setColumnWidth(13+i, 32)
         self.horizontalHeader().setSectionResizeMode(13+len(self.zones), QHeaderView.ResizeMode.ResizeToContents)
         self.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
         self.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
-        self.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
-    
+        # Редактор открывается только явно: при переходе по ячейкам стрелками всплывающий список мешал бы навигации
+        self.setEditTriggers(
+            QAbstractItemView.EditTrigger.DoubleClicked |
+            QAbstractItemView.EditTrigger.SelectedClicked |
+            QAbstractItemView.EditTrigger.EditKeyPressed
+        )
+
         self.timer = QTimer()
         self.timer.setInterval(settings.schedule_update_time*1000)
-        self.timer.timeout.connect(lambda: asyncio.run(self.get_scheduler_data_from_API()))
+        self.timer.timeout.connect(lambda: asyncio.ensure_future(self.get_scheduler_data_from_API()))
 
         self.autoplay_timer = QTimer()
-        self.autoplay_timer.setInterval(10000)
+        self.autoplay_timer.setSingleShot(True)
+        self.autoplay_timer.setTimerType(Qt.TimerType.PreciseTimer)
         self.autoplay_timer.timeout.connect(self.start_autoplay)
 
+        self.conditional_fetch = ConditionalFetch(bool(settings.schedule_delta_fetch))
+        self.autoplay_files = {}
+        self.autoplay_queue = AutoplayQueue()
+        # Строки из локального снимка ставятся на автозапуск только после сверки с API
+        self.is_autoplay_reconciled: bool = True
+        self.prefetcher = AudioPrefetcher(self, settings.autoplay_prefetch_minutes)
+        self.write_back = EditWriteBack(self.send_schedule_update, settings.edit_write_delay_ms, self, lambda row_id: mutation_journal.is_sending(f"schedule:{row_id}"))
+        mutation_journal.retry_signal.connect(self.write_back.flush)
+
         from UI.SpeakerStatusBar import speaker_status_bar
         self.speaker_status_bar = speaker_status_bar
     
     async def get_scheduler_data_from_API(self, flight_id: int = None, audio_text_id: int = None, flight_number: str = None) -> None:
         self.timer.stop()
         self.autoplay_timer.stop()
-        url_file = QUrl(settings.api_url+'get_scheduler')
         query = QUrlQuery()
         if flight_id and audio_text_id:
             query.addQueryItem('flight_id', str(flight_id))
             query.addQueryItem('audio_text_id', str(audio_text_id))
         elif flight_number:
             query.addQueryItem('flight_number', flight_number)
-        url_file.setQuery(query.query())
 
-        request = QtNetwork.QNetworkRequest(url_file)
-        self.API_manager = QtNetwork.QNetworkAccessManager()
-        self.API_manager.get(request)
-        self.API_manager.finished.connect(lambda reply: self.refresh_schedule_table(reply, flight_id, audio_text_id))
+        if query.isEmpty():
+            request = self.conditional_fetch.create_request(QUrl(settings.api_url+'get_scheduler'))
+        else:
+            request = api_client.create_request('get_scheduler', query)
+        try:
+            received: Optional[tuple[bytes, ReplyValidators]] = await api_client.fetch(request, lambda reply: self.refresh_schedule_table(reply, flight_id, audio_text_id))
+            if received is not None:
+                await self.apply_schedule_payload(*received, is_polling=query.isEmpty())
+        finally:
+            self.timer.start()
+            self.start_autoplay_timer()
+
+    @property
+    def data_origin(self) -> ScheduleStore:
+        return self.table_model.rows
+
+    def currentRow(self) -> int:
+        return self.currentIndex().row()
+
+    def rowCount(self) -> int:
+        return self.table_model.rowCount()
+
+    def refresh_schedule_table(self, result: QtNetwork.QNetworkReply, flight_id: int = None, audio_text_id: int = None) -> Optional[tuple[bytes, ReplyValidators]]:
+        request_query = QUrlQuery(result.request().url())
+        is_polling: bool = not request_query.hasQueryItem('flight_id') and not request_query.hasQueryItem('flight_number')
+        if is_polling and self.conditional_fetch.is_delta_rejected(result):
+            # Сервер не смог выдать изменения с указанной версии, запрашиваем расписание полностью
+            logger.warning(f"Не удалось получить изменения расписания ({result.errorString()}), выполняется полная загрузка")
+            self.conditional_fetch.reset()
+            asyncio.ensure_future(self.get_scheduler_data_from_API())
+            return None
+
+        match result.error():
+            case QtNetwork.QNetworkReply.NetworkError.NoError:
+                if is_polling and self.conditional_fetch.is_not_modified(result):
+                    self.speaker_status_bar.setStatusBarText(text="Данные актуальны")
+                    return None
+                bytes_string = result.readAll()
+                if not (flight_id and audio_text_id):
+                    # Список строк разбирается и сравнивается с таблицей в фоновом потоке, ответ к тому времени будет удалён
+                    return bytes_string.data(), ReplyValidators(result)
+                self.blockSignals(True)
+                self.setUpdatesEnabled(False)
+                try:
+                    if len(bytes_string) > 0:
+                        received_data: dict = json.loads(str(bytes_string, 'utf-8'))[0]
+                        row_indx: Optional[int] = self.find_row(flight_id, audio_text_id)
+                        if row_indx is None:
+                            row_indx = bisect_right(self.data_origin, schedule_sort_key(received_data), key=schedule_sort_key)
+                            self.table_model.insert_row(row_indx, received_data)
+                        else:
+                            self.data_origin[row_indx]['event_time'] = received_data.get('event_time')
+                            self.table_model.update_row(row_indx)
+                        self.add_to_autoplay(self.data_origin[row_indx])
+                        self.selectRow(row_indx)
+                    self.finish_refresh()
+                finally:
+                    self.setUpdatesEnabled(True)
+                    self.blockSignals(False)
 
-    def refresh_schedule_table(self, result: QtNetwork.QNetworkReply, flight_id: int = None, audio_text_id: int = None) -> None:
+            case QtNetwork.QNetworkReply.NetworkError.ConnectionRefusedError:
+                error_message = f"Данные не обновлены. Ошибка подключения к API: {result.errorString()}"
+                self.speaker_status_bar.setStatusBarText(text=error_message, is_error=True)
+        return None
+
+    async def apply_schedule_payload(self, payload: bytes, validators: ReplyValidators, is_polling: bool) -> None:
+        # Правки, не сохранённые к приходу ответа, остаются защищёнными, даже если сохранятся, пока он готовится
+        protected_fields: dict[str, set[str]] = self.table_model.get_protected_fields(self.get_editing_fields())
+        # В цикле событий остаётся только применение готовой разницы к модели
+        for _ in range(REFRESH_PREPARE_ATTEMPTS):
+            prepared: PreparedRefresh = await asyncio.get_running_loop().run_in_executor(
+                None, prepare_refresh, payload, list(self.data_origin), self.table_model.revision, schedule_sort_key)
+            if prepared.revision == self.table_model.revision:
+                break
+            logger.debug("Строки расписания изменились, пока готовилось обновление, сравнение повторяется")
+        else:
+            prepared = prepare_refresh(payload, list(self.data_origin), self.table_model.revision, schedule_sort_key)
         self.blockSignals(True)
         self.setUpdatesEnabled(False)
         try:
-            match result.error():
-                case QtNetwork.QNetworkReply.NetworkError.NoError:
-                    self.schedule_data: list = []
-                    bytes_string = result.readAll()
-                    if len(str(bytes_string, 'utf-8')) == 0:
-                        self.setRowCount(0)
-                    else:
-                        if flight_id and audio_text_id:
-                            received_data: dict = json.loads(str(bytes_string, 'utf-8'))[0]
-                            is_has_row_in_table: bool = len(list(filter(lambda d: d.get('flight_id') == flight_id and d.get('audio_text_id') == audio_text_id, self.data_origin))) != 0                       
-                            row_indx: int = 0
-                            if is_has_row_in_table is not True:
-                                self.data_origin.append(received_data)
-                                self.data_origin = list(sorted(self.data_origin, key=lambda d: (d.get('flight_datetime'), d.get('flight_id'), (d.get('queue') is None, d.get('queue') or 0) , d.get('schedule_id'))))
-                            for indx, data in enumerate(self.data_origin):
-                                if data.get('flight_id') == flight_id and data.get('audio_text_id') == audio_text_id:
-                                    current_schedule: list = [data]
-                                    row_indx = indx
-                                    break
-                            self.data_origin[row_indx]['event_time'] = received_data.get('event_time')
-                            received_data: list[dict] = [self.data_origin[row_indx]]
-                        else:
-                            self.autoplay_files = {}
-                            self.data_origin: list[dict] = json.loads(str(bytes_string, 'utf-8'))
-                            received_data: list[dict] = self.data_origin
-                        for data in received_data:
-                            if data.get('audio_text_description'):
-                                audio_text = f"{data.get('audio_text')} ({data.get('audio_text_description')})"
-                            else:
-                                audio_text = f"{data.get('audio_text')}"
-                            if data.get('event_time'):
-                                public_flight_time = (True, data.get('event_time'))
-                            else:
-                                public_flight_time = (False, data.get('public_flight_time'))
-                            self.schedule_data.append((
-                                data.get('schedule_id'), 
-                                (data.get('is_played'), data.get('job_time'), data.get('job_is_fact')), 
-                                data.get('flight_number_full'), 
-                                data.get('direction'), 
-                                data.get('plan_flight_time'), 
-                                public_flight_time, 
-                                audio_text, 
-                                data.get('path'),
-                                data.get('languages').get('RUS').get('display'), 
-                                data.get('languages').get('TAT').get('display'),
-                                data.get('languages').get('ENG').get('display'), 
-                                data.get('terminal'), data.get('boarding_gates'),
-                                *list(map(lambda i: True if i[0]+1 in data.get('zones_list') else False, enumerate(self.zones))),
-                                (data.get('direction_id'), data.get('status_id'))
-                            ))
-                            if data.get('job_time'):
-                                self.autoplay_files[data.get('schedule_id')] = self.autoplay_files.get(data.get('schedule_id'), {
-                                    'job_id': data.get('job_id'),
-                                    'job_time': data.get('job_time'),
-                                    'job_datetime': data.get('job_datetime'),
-                                    'job_is_fact': data.get('job_is_fact'),
-                                    'is_played': data.get('is_played'),
-                                    'autoplay_is_canceled': data.get('autoplay_is_canceled')
-                                })
-                        self.autoplay_files = dict(sorted(self.autoplay_files.items(), key=lambda value: list(value[1].values())[2]))
-                        if flight_id and audio_text_id:
-                            if is_has_row_in_table is not True:
-                                self.insertRow(row_indx)
-                            self.set_row_data(row_indx, self.schedule_data[0], received_data[0].get('languages_list'))
-                            self.resizeRowToContents(row_indx)
-                            self.selectRow(row_indx)
-                        else:
-                            if (len(self.schedule_data) == 0):
-                                self.schedule_data = [(None,) * len(self.header)]
-                                self.setRowCount(0)
-                            else:
-                                self.setRowCount(len(self.schedule_data))
-                                for row_indx, data in enumerate(self.schedule_data):
-                                    current_schedule: list = list(filter(lambda d: data[0] == d.get('schedule_id'), self.data_origin))
-                                    if len(current_schedule) > 0:
-                                        current_schedule: dict = current_schedule[0]
-                                        self.set_row_data(row_indx, data, current_schedule.get('languages_list'))
-                                    else:
-                                        self.removeRow(0)
-                                    self.resizeRowToContents(row_indx)
-                    info_message = "Данные обновлены"
-                    self.speaker_status_bar.setStatusBarText(text=info_message)
-                    self.set_active_row()
-
-                case QtNetwork.QNetworkReply.NetworkError.ConnectionRefusedError:
-                    error_message = f"Данные не обновлены. Ошибка подключения к API: {result.errorString()}"
-                    self.speaker_status_bar.setStatusBarText(text=error_message, is_error=True)
+            editing_fields: dict[str, set[str]] = self.get_editing_fields()
+            if is_polling and not editing_fields:
+                # Пока ячейка редактируется, версию не запоминаем, чтобы изменения этой строки пришли повторно
+                self.conditional_fetch.remember(validators, prepared.version)
+            for key, fields in editing_fields.items():
+                protected_fields.setdefault(key, set()).update(fields)
+            diff: ScheduleDiff = self.table_model.apply_prepared(prepared, protected_fields)
+            for schedule_id in diff.removed:
+                self.remove_from_autoplay(schedule_id, is_deleted=True)
+                audio_cache.invalidate(schedule_id)
+            for schedule_id, changes in diff.updated.items():
+                if SOUND_FIELDS.intersection(changes) or 'languages_list' in changes:
+                    audio_cache.invalidate(schedule_id)
+            # Строка переставляется только при изменении времени или признаков автозапуска, иначе уже прозвучавшее объявление запустилось бы снова
+            rescheduled: list[str] = [schedule_id for schedule_id, changes in diff.updated.items() if AUTOPLAY_FIELDS.intersection(changes)]
+            for schedule_id in [*diff.inserted, *rescheduled]:
+                self.remove_from_autoplay(schedule_id)
+                self.add_to_autoplay(self.get_current_row_data(schedule_id))
+            if is_polling and not self.is_autoplay_reconciled:
+                # Первый ответ API сверил строки снимка, теперь на автозапуск ставятся и не изменившиеся
+                self.is_autoplay_reconciled = True
+                for data in self.data_origin:
+                    self.add_to_autoplay(data)
+            self.finish_refresh()
         finally:
             self.setUpdatesEnabled(True)
             self.blockSignals(False)
-        
-        self.timer.start()
-        if settings.autoplay == 1:
-            self.autoplay_timer.start()
-
-    def set_row_data(self, row_indx: int, data: dict, languages: list) -> None:
-        for col_indx, item in enumerate(data):
-            if col_indx in [1]: # Время выполнения задачи (регистрация, посадка и тд)
-                is_played, job_time, job_is_fact = item
-                element = QLabel(job_time)
-                element.setFont(self.font.get_font())
-                element.setAlignment(Qt.AlignmentFlag.AlignCenter)
-                self.setCellWidget(row_indx, col_indx, element)
-                cell = self.cellWidget(row_indx, col_indx)
-                job_fact_style: str = ('color: rgb(88, 176, 64); font-weight: 600;', 'color: rgb(0, 0, 0);')[job_is_fact is None or is_played is True]
-                cell.setStyleSheet((
-                    'QWidget { border-top: 1px 0px solid white; text-align: center; border-radius: 0px; background-color: rgb(92, 184, 92); '+job_fact_style+' }  QWidget::disabled { color: rgb(174, 175, 178) }', 
-                    'QWidget { border-top: 1px 0px solid white; text-align: center; border-radius: 0px; background-color: rgb(250, 250, 250); '+job_fact_style+' }  QWidget::disabled { color: rgb(174, 175, 178) }'
-                )[is_played is None])
-            elif col_indx in [2]:   # Номер рейса
-                element = QLabel(item)
-                element.setFont(self.font.get_font())
-                self.setCellWidget(row_indx, col_indx, element)
-                if data[-1][1] == 10:
-                    cell = self.cellWidget(row_indx, col_indx)
-                    cell.setStyleSheet('QWidget { color: rgb(255, 25, 25); } QWidget::disabled { color: rgb(174, 175, 178) }')
-            elif col_indx in [3,4]: # Направление, Вр рейса (план)
-                element = QLabel(item)
-                element.setFont(self.font.get_font())
-                element.setAlignment(Qt.AlignmentFlag.AlignCenter)
-                self.setCellWidget(row_indx, col_indx, element)
-            elif col_indx in [5]: # Направление, Вр рейса (план)
-                is_delayed, event_time = item
-                if is_delayed:
-                    event_time = list(map(int, event_time.split(':')))
-                    event_time = QTime(event_time[0], event_time[1])
-                    widget = QWidget()
-                    layoutH = QHBoxLayout(widget)
-                    layoutH.setAlignment(Qt.AlignmentFlag.AlignCenter)
-                    event_time_edit = TimeEdit()
-                    event_time_edit.setObjectName(f'{row_indx}_{col_indx}')
-                    event_time_edit.setFont(self.font.get_font(12))
-                    event_time_edit.setTime(event_time)
-                    event_time_edit.enter_pressed_signal.connect(self.on_widget_state_change)
-                    event_time_edit.timeChanged.connect(self.select_current_row)
-                    layoutH.addWidget(event_time_edit)
-                    self.setCellWidget(row_indx, col_indx, widget)
-                else:
-                    element = QLabel(event_time)
-                    element.setFont(self.font.get_font())
-                    element.setWordWrap(True)
-                    element.setAlignment(Qt.AlignmentFlag.AlignCenter)
-                    element.setStyleSheet('QWidget { color: rgb(255, 25, 25) } QWidget::disabled { color: rgb(174, 175, 178) } ')
-                    self.setCellWidget(row_indx, col_indx, element)
-            elif col_indx in [8,9,10]:  # Языки
-                widget = QWidget()
-                layoutH = QHBoxLayout(widget)
-                layoutH.setAlignment(Qt.AlignmentFlag.AlignCenter)
-                if item:
-                    checkbox = TableCheckbox(row_indx, col_indx)
-                    checkbox.setChecked(col_indx-7 in languages)
-                    checkbox.checkStateChanged.connect(self.on_widget_state_change)
-                    layoutH.addWidget(checkbox)
-                self.setCellWidget(row_indx, col_indx, widget)
-            elif col_indx in [11]:  # Терминал
-                widget = QWidget()
-                layoutH = QHBoxLayout(widget)
-                layoutH.setAlignment(Qt.AlignmentFlag.AlignCenter)
-                model = QStandardItemModel()
-                combobox = ComboBox()
-                combobox.setObjectName(f'{row_indx}_{col_indx}')
-                combobox.setFont(self.font.get_font(10))
-                combobox.setFixedSize(50, 26)
-                combobox.setFocusPolicy(Qt.FocusPolicy.ClickFocus)
-                combobox.setCursor(Qt.CursorShape.PointingHandCursor)
-                combobox.setModel(model)
-                curr_cmbbx_indx: int = -1
-                for terminal in self.terminals:
-                    combobox_item = QStandardItem(terminal.get('name'))
-                    combobox_item.setData(terminal)
-                    model.appendRow(combobox_item)
-                    if item == terminal.get('name'):
-                        curr_cmbbx_indx = model.rowCount()-1
-                combobox.setCurrentIndex(curr_cmbbx_indx)
-                combobox.currentIndexChanged[int].connect(self.on_widget_state_change)
-                layoutH.addWidget(combobox)
-                self.setCellWidget(row_indx, col_indx, widget)
-            elif col_indx in [12]:  # Номер выхода
-                widget = QWidget()
-                if data[-1][0] == 1:
-                    layoutH = QHBoxLayout(widget)
-                    layoutH.setAlignment(Qt.AlignmentFlag.AlignCenter)
-                    text_edit = TextEdit(self)
-                    text_edit.setStyleSheet('QWidget { color: rgb(255, 0, 0); text-align: center; } QWidget::disabled { color: rgb(174, 175, 178) }')
-                    text_edit.setObjectName(f'{row_indx}_{col_indx}')
-                    text_edit.setText(item)
-                    text_edit.setFont(self.font.get_font(10))
-                    text_edit.setFixedSize(50, 30)
-                    text_edit.enter_pressed_signal.connect(self.on_widget_state_change)
-                    text_edit.selectionChanged.connect(self.select_current_row)
-                    layoutH.addWidget(text_edit)
-                self.setCellWidget(row_indx, col_indx, widget)
-            elif col_indx in [i for i in range(13, 12+len(self.zones)+1)]:  # Зоны
-                widget = QWidget()
-                checkbox = TableCheckbox(row_indx, col_indx)
-                checkbox.setChecked(item)
-                checkbox.checkStateChanged.connect(self.on_widget_state_change)
-                layoutH = QHBoxLayout(widget)
-                layoutH.addWidget(checkbox)
-                layoutH.setAlignment(Qt.AlignmentFlag.AlignCenter)
-                self.setCellWidget(row_indx, col_indx, widget)
-            elif col_indx >= len(self.header)-1:
-                ...
-            else:   # Остальные колонки
-                element = QLabel(item)
-                element.setFont(self.font.get_font())
-                element.setWordWrap(True)
-                if col_indx in [5]:
-                    element.setStyleSheet('QWidget { color: rgb(255, 25, 25) } QWidget::disabled { color: rgb(174, 175, 178) } ')
-                if col_indx in [6] and data[-1][0] == 2:
-                    element.setStyleSheet('QWidget { color: rgb(50, 100, 255) } QWidget::disabled { color: rgb(174, 175, 178) } ')
-                self.setCellWidget(row_indx, col_indx, element)
-    
+
+    def finish_refresh(self) -> None:
+        self.prefetcher.update()
+        info_message = "Данные обновлены"
+        self.speaker_status_bar.setStatusBarText(text=info_message)
+        if not self.currentIndex().isValid():
+            self.set_active_row()
+
+    def load_snapshot(self, rows: list[dict]) -> None:
+        # Снимок мог устареть на дни: он только показывается, иначе прошедшие и отменённые объявления запустились бы из кэша
+        self.is_autoplay_reconciled = False
+        self.table_model.set_rows(rows)
+        self.set_active_row()
+
+    def get_editing_fields(self) -> dict[str, set[str]]:
+        if self.state() != QAbstractItemView.State.EditingState:
+            return {}
+        index = self.currentIndex()
+        data: Optional[dict] = self.table_model.row_data(index.row())
+        if data is None or index.column() not in EDITABLE_FIELDS:
+            return {}
+        return {data.get('schedule_id'): {EDITABLE_FIELDS[index.column()]}}
+
+    def add_to_autoplay(self, data: dict) -> None:
+        if data.get('job_time'):
+            value: dict = self.autoplay_files.setdefault(data.get('schedule_id'), {
+                'job_id': data.get('job_id'),
+                'job_time': data.get('job_time'),
+                'job_datetime': data.get('job_datetime'),
+                'job_is_fact': data.get('job_is_fact'),
+                'is_played': data.get('is_played'),
+                'autoplay_is_canceled': data.get('autoplay_is_canceled')
+            })
+            if value.get('autoplay_is_canceled') is not True and value.get('is_played') is not True and value.get('job_is_fact') is True:
+                self.autoplay_queue.add(data.get('schedule_id'), datetime.strptime(value.get('job_datetime'), '%Y-%m-%d %H:%M'))
+
+    def find_row(self, flight_id: int, audio_text_id: int) -> Optional[int]:
+        if data := self.data_origin.find(flight_id, audio_text_id):
+            return self.data_origin.position(data.get('schedule_id'))
+        return None
+
     def set_mark_in_cell(self, row_indx: int, col_indx: int):
-        self.cellWidget(row_indx, col_indx).setStyleSheet('QWidget { background-color: rgb(92, 184, 92); border-radius: 0px; }')
+        self.table_model.mark_played(row_indx)
+
+    def get_current_data(self) -> dict:
+        return self.table_model.row_data(self.currentRow()) or {}
 
     def get_current_row_id(self) -> str:
-        try:
-            cell: QLabel = self.cellWidget(self.currentRow(), 0)
-            row_id = cell.text()
-        except AttributeError as err:
-            return None
-        return row_id
+        if data := self.table_model.row_data(self.currentRow()):
+            return data.get('schedule_id')
+        return None
     
-    def get_current_languages(self) -> list[int]:
-        current_languages: list[int] = []
-        row: int = self.currentRow()
-        for i in range(8, 11):
-            cell = self.cellWidget(row,i)
-            if cell.findChild(QCheckBox) and cell.findChild(QCheckBox).checkState() == Qt.CheckState.Checked:
-                current_languages.append(i-7)
-        return current_languages
+    def get_current_languages(self, data: Optional[dict] = None) -> list[int]:
+        data = data or self.get_current_data()
+        return [col_indx-7 for col_indx in LANGUAGE_COLUMNS if self.table_model.is_language_displayed(data, col_indx) and col_indx-7 in (data.get('languages_list') or [])]
     
-    def get_current_zones(self) -> list[int]:
-        current_zones: list[int] = []
-        row: int = self.currentRow()
-        for i in range(self.col_count - len(self.zones)-1, self.col_count-1):
-            checkbox: QCheckBox = self.cellWidget(row,i).findChild(QCheckBox)
-            if checkbox.checkState() == Qt.CheckState.Checked:
-                current_zones.append(i-12)
-        return current_zones
-
-    def get_current_event_time(self) -> Optional[str]:
-        row: int = self.currentRow()
-        if time_edit := self.cellWidget(row,5).findChild(TimeEdit):
-            return time_edit.time().toString("HH:mm")
-
-    def get_current_terminal(self) -> str:
-        row: int = self.currentRow()
-        combobox: ComboBox = self.cellWidget(row,11).findChild(ComboBox)
-        return combobox.currentText()
-
-    def get_current_boarding_gates(self) -> Optional[list[int]]:
-        row: int = self.currentRow()
-        if self.cellWidget(row,12):
-            if text_edit := self.cellWidget(row,12).findChild(TextEdit):
-                if len(text_edit.toPlainText()) > 0:
-                    return list(map(int, text_edit.toPlainText().split(',')))
+    def get_current_zones(self, data: Optional[dict] = None) -> list[int]:
+        data = data or self.get_current_data()
+        return [zone_indx+1 for zone_indx in range(len(self.zones)) if zone_indx+1 in (data.get('zones_list') or [])]
+
+    def get_current_event_time(self, data: Optional[dict] = None) -> Optional[str]:
+        data = data or self.get_current_data()
+        if self.table_model.is_delayed(data):
+            return data.get('event_time')
+
+    def get_current_terminal(self, data: Optional[dict] = None) -> str:
+        return (data or self.get_current_data()).get('terminal') or ''
+
+    def get_current_boarding_gates(self, data: Optional[dict] = None) -> Optional[list[int]]:
+        data = data or self.get_current_data()
+        if data.get('direction_id') == 1:
+            if boarding_gates := self.table_model.display_value(data, BOARDING_GATE_COLUMN):
+                return list(map(int, boarding_gates.split(',')))
     
     def get_current_row_data(self, row_id: str) -> dict:
-        current_data = list(filter(lambda d: d.get('schedule_id') == row_id, self.data_origin))
-        if current_data:
-            return current_data[0]
+        if current_data := self.data_origin.get(row_id):
+            return current_data
         elif self.data_origin:
             return self.data_origin[0]
     
     def get_current_autoplay_file(self, row_id: str) -> dict:
-        for key, value in self.autoplay_files.items():
-            if row_id == key:
-                return value
+        return self.autoplay_files.get(row_id)
     
     def set_active_schedule_id(self) -> None:
         self.current_data = self.get_current_row_data(self.get_current_row_id())
@@ -414,120 +344,151 @@ class ScheduleTable(QTableWidget):
                 self.set_active_schedule_id()
                 self.selectRow(0)
             else:
-                for row in range(self.model().rowCount()):
-                    index = self.model().index(row, 0)
-                    if index.data() == self.current_schedule_id:
-                        self.setCurrentIndex(index)
-                        return
+                row: Optional[int] = self.data_origin.position(self.current_schedule_id)
+                if row is not None:
+                    self.selectRow(row)
         else:
             if self.data_origin:
                 self.current_data = self.data_origin[0]
             self.selectRow(0)
     
-    def sound_data_check(self) -> Optional[str]:
-        if self.current_data.get('is_has_terminal') and not self.current_data.get('terminal'):
+    def sound_data_check(self, data: Optional[dict] = None) -> Optional[str]:
+        data = data or self.current_data
+        if data.get('is_has_terminal') and not data.get('terminal'):
             return 'Терминал'
-        if self.current_data.get('is_has_boarding_gate') and int(self.current_data.get('direction_id')) == 1 and not self.current_data.get('boarding_gates'):
+        if data.get('is_has_boarding_gate') and int(data.get('direction_id')) == 1 and not data.get('boarding_gates'):
             return 'Номер выхода'
         return False
 
-    async def get_audio_file(self):
-        row_id = self.get_current_row_id()
-        if row_id is None:
-            self.current_sound_file = None
+    def make_sound_key(self, data: dict) -> str:
+        return audio_cache.make_key('get_scheduler_sound', {
+            **{field: data.get(field) for field in SOUND_FIELDS},
+            'languages': self.get_current_languages(data),
+            'terminal': self.get_current_terminal(data),
+            'boarding_gates': self.get_current_boarding_gates(data)
+        })
+
+    def create_sound_request(self, data: dict, is_autoplay: bool) -> tuple[QtNetwork.QNetworkRequest, QJsonDocument]:
+        query = QUrlQuery()
+        query.addQueryItem('flight_id', str(data.get('flight_id')))
+        query.addQueryItem('audio_text_id', str(data.get('audio_text_id')))
+        request = api_client.create_request('get_scheduler_sound', query, is_json=True)
+        body = QJsonDocument({
+            'languages': self.get_current_languages(data), 
+            'zones': self.get_current_zones(data),
+            'terminal': self.get_current_terminal(data),
+            'boarding_gates': self.get_current_boarding_gates(data),
+            'autoplay_is_canceled': (None, True)[is_autoplay is not True]
+        })
+        return request, body
+
+    async def get_audio_file(self, job: PlaybackJob) -> None:
+        if (data := self.data_origin.get(job.row_id)) is None:
             error_message: str = f"Ошибка воспроизведения: Необходимо выбрать объявление"
-            self.error_signal.emit(error_message)
+            self.error_signal.emit(job, error_message)
             return
         
-        self.current_data = self.get_current_row_data(row_id)
-        self.current_sound_file = root_directory+'/'+settings.file_name
-        self.current_schedule_id = self.current_data.get('schedule_id')
+        job.data = self.current_data = data
+        self.current_schedule_id = data.get('schedule_id')
 
-        check = self.sound_data_check()
+        check = self.sound_data_check(data)
         if check:
             error_message: str = f"Ошибка воспроизведения: Отсутствуют данные, необходимые для воспроизведения ({check})"
-            self.error_signal.emit(error_message)
+            self.error_signal.emit(job, error_message)
             return
 
-        if len(self.get_current_languages()) == 0:
+        job.languages = self.get_current_languages(data)
+        if len(job.languages) == 0:
             error_message: str = "Ошибка воспроизведения: Необходимо выбрать хотя бы один язык для воспроизведения"
-            self.error_signal.emit(error_message)
+            self.error_signal.emit(job, error_message)
             return
 
         self.timer.stop()
 
-        url_file = QUrl(settings.api_url+'get_scheduler_sound')
-        query = QUrlQuery()
-        query.addQueryItem('flight_id', str(self.current_data.get('flight_id')))
-        query.addQueryItem('audio_text_id', str(self.current_data.get('audio_text_id')))
-        url_file.setQuery(query.query())
-        
-        request = QtNetwork.QNetworkRequest(url_file)
-        self.API_manager = QtNetwork.QNetworkAccessManager()
-        request.setHeader(QtNetwork.QNetworkRequest.KnownHeaders.ContentTypeHeader, "application/json")
-        body = QJsonDocument({
-            'languages': self.get_current_languages(), 
-            'zones': self.get_current_zones(),
-            'terminal': self.get_current_terminal(),
-            'boarding_gates': self.get_current_boarding_gates(),
-            'autoplay_is_canceled': (None, True)[self.is_autoplay is not True]
-        })
-        
-        reply = self.API_manager.post(request, body.toJson())
-        self.API_manager.finished.connect(lambda: self.play_signal.emit(reply))
+        sound_key: str = self.make_sound_key(data)
+        job.prepared_sound = self.prefetcher.take(job.row_id, sound_key)
+        sound: Optional[bytes] = job.prepared_sound.data if job.prepared_sound else audio_cache.get(sound_key)
+        if sound is not None:
+            self.speaker_status_bar.setAudioCacheText(audio_cache.get_statistics_text())
+            # Запрос звука с сервера сам отменял автовоспроизведение при ручном запуске
+            if job.is_autoplay is not True:
+                self.set_schedule_autoplay_is_canceled(data)
+            self.play_signal.emit(job, sound)
+            return
 
-    def update_schedule(self, is_deleted: bool = None) -> None:
-        self.current_data = self.get_current_row_data(self.get_current_row_id())
-        url_file = QUrl(settings.api_url+'update_schedule')
-        request = QtNetwork.QNetworkRequest(url_file)
-        request.setHeader(QtNetwork.QNetworkRequest.KnownHeaders.ContentTypeHeader, "application/json")
-        self.API_post = QtNetwork.QNetworkAccessManager()
+        request, body = self.create_sound_request(data, job.is_autoplay)
+        if settings.audio_streaming == 1:
+            stream = AudioStream(settings.audio_stream_preroll_ms)
+            reply = api_client.send(request, lambda reply: self.on_audio_stream(reply, stream, sound_key, job.row_id), body.toJson())
+            stream.attach(reply)
+            self.stream_signal.emit(job, stream)
+            return
+        await api_client.fetch(request, lambda reply: self.on_audio_file(reply, job, sound_key), body.toJson())
+
+    def on_audio_file(self, reply: QtNetwork.QNetworkReply, job: PlaybackJob, sound_key: str) -> None:
+        sound: bytes = reply.readAll().data()
+        if reply.error() == QtNetwork.QNetworkReply.NetworkError.NoError:
+            audio_cache.put(sound_key, sound, job.row_id)
+        self.speaker_status_bar.setAudioCacheText(audio_cache.get_statistics_text())
+        self.play_signal.emit(job, sound)
+
+    def on_audio_stream(self, reply: QtNetwork.QNetworkReply, stream: AudioStream, sound_key: str, schedule_id: str) -> None:
+        if (sound := stream.on_reply_finished(reply)) is not None:
+            audio_cache.put(sound_key, sound, schedule_id)
+        self.speaker_status_bar.setAudioCacheText(audio_cache.get_statistics_text())
+
+    def update_schedule(self, data: Optional[dict] = None) -> None:
+        data = data or self.get_current_row_data(self.get_current_row_id())
+        self.write_back.mark(data.get('schedule_id'))
+
+    def send_schedule_update(self, schedule_id: str) -> None:
+        # Строка собирается в момент отправки и несёт все правки, накопленные за окно
+        if (data := self.data_origin.get(schedule_id)) is None:
+            self.write_back.finish(schedule_id)
+            return
         body = QJsonDocument({
-            'id': self.current_data.get('id'),
-            'flight_id': self.current_data.get('flight_id'),
-            'audio_text_id': self.current_data.get('audio_text_id'),
-            'languages': self.get_current_languages(), 
-            'zones': self.get_current_zones(),
-            'terminal': self.get_current_terminal(),
-            'boarding_gates': self.get_current_boarding_gates(),
-            'event_time': self.get_current_event_time(),
-            'is_deleted': is_deleted
+            'id': data.get('id'),
+            'flight_id': data.get('flight_id'),
+            'audio_text_id': data.get('audio_text_id'),
+            'languages': self.get_current_languages(data),
+            'zones': self.get_current_zones(data),
+            'terminal': self.get_current_terminal(data),
+            'boarding_gates': self.get_current_boarding_gates(data),
+            'event_time': self.get_current_event_time(data),
+            'is_deleted': None
         })
-        self.API_post.post(request, body.toJson())
-        self.API_post.finished.connect(self.after_update_schedule)
-
-    def set_schedule_is_played(self) -> None:
-        self.current_data = self.get_current_row_data(self.get_current_row_id())
-        self.remove_from_autoplay(self.current_data.get('schedule_id'))
-        url_file = QUrl(settings.api_url+'set_schedule_is_played')
-        request = QtNetwork.QNetworkRequest(url_file)
-        request.setHeader(QtNetwork.QNetworkRequest.KnownHeaders.ContentTypeHeader, "application/json")
-        self.API_post = QtNetwork.QNetworkAccessManager()
+        # Изменение сначала записывается в журнал, отправку и повторы при недоступности API берёт на себя журнал
+        mutation_journal.record('update_schedule', body.toJson().data(), f"schedule:{schedule_id}", lambda result: self.after_update_schedule(result, schedule_id))
+
+    def set_schedule_is_played(self, data: Optional[dict] = None) -> None:
+        data = data or self.get_current_row_data(self.get_current_row_id())
+        self.remove_from_autoplay(data.get('schedule_id'))
+        if (row_indx := self.data_origin.position(data.get('schedule_id'))) is not None:
+            self.set_mark_in_cell(row_indx, 1)
         body = QJsonDocument({
-            'flight_id': self.current_data.get('flight_id'),
-            'audio_text_id': self.current_data.get('audio_text_id')
+            'flight_id': data.get('flight_id'),
+            'audio_text_id': data.get('audio_text_id')
         })
-        self.API_post.post(request, body.toJson())
-        self.API_post.finished.connect(self.after_update_schedule)
+        mutation_journal.record('set_schedule_is_played', body.toJson().data(), callback=self.after_update_schedule)
 
-    def set_schedule_autoplay_is_canceled(self) -> None:
-        self.current_data = self.get_current_row_data(self.get_current_row_id())
-        self.remove_from_autoplay(self.current_data.get('schedule_id'))
-        url_file = QUrl(settings.api_url+'set_schedule_autoplay_is_canceled')
-        request = QtNetwork.QNetworkRequest(url_file)
-        request.setHeader(QtNetwork.QNetworkRequest.KnownHeaders.ContentTypeHeader, "application/json")
-        self.API_post = QtNetwork.QNetworkAccessManager()
+    def set_schedule_autoplay_is_canceled(self, data: Optional[dict] = None) -> None:
+        data = data or self.get_current_row_data(self.get_current_row_id())
+        self.remove_from_autoplay(data.get('schedule_id'))
         body = QJsonDocument({
-            'flight_id': self.current_data.get('flight_id'),
-            'audio_text_id': self.current_data.get('audio_text_id')
+            'flight_id': data.get('flight_id'),
+            'audio_text_id': data.get('audio_text_id')
         })
-        self.API_post.post(request, body.toJson())
+        mutation_journal.record('set_schedule_autoplay_is_canceled', body.toJson().data())
 
-    def after_update_schedule(self, result: QtNetwork.QNetworkReply) -> None:
+    def after_update_schedule(self, result: QtNetwork.QNetworkReply, schedule_id: str = None) -> None:
+        if schedule_id:
+            # Правки строки, накопленные пока запрос был в пути, уходят следующим запросом
+            self.write_back.finish(schedule_id)
         match result.error():
             case QtNetwork.QNetworkReply.NetworkError.NoError:
-                self.current_data['terminal'] = self.get_current_terminal()
-                self.current_data['boarding_gates'] = self.get_current_boarding_gates()
+                # Правки, сделанные пока запрос был в пути, остаются защищёнными до своей отправки
+                if schedule_id and not self.write_back.is_pending(schedule_id) and not mutation_journal.is_pending(f"schedule:{schedule_id}"):
+                    self.table_model.mark_clean(schedule_id)
                 logger.info(f"Данные сохранены")
 
             case QtNetwork.QNetworkReply.NetworkError.ConnectionRefusedError:
@@ -538,43 +499,72 @@ class ScheduleTable(QTableWidget):
         flight_id: int = self.current_data.get('flight_id')
         audio_text_id: int = self.current_data.get('audio_text_id')
         current_row_number = self.currentRow()
-        for row in reversed(range(self.model().rowCount())):
-            if schedule_id := self.indexWidget(self.model().index(row, 0)).text():
-                row_flight_id, row_audio_text_id = map(int, schedule_id.split('_'))
-                if (row_flight_id == flight_id and delete_all_audio is True) or (row_flight_id == flight_id and row_audio_text_id == audio_text_id):
-                    self.data_origin.pop(row)
-                    self.removeRow(row)
-                self.selectRow(current_row_number)
-            else:
-                break
-
-    def select_current_row(self) -> None:
-        row, column = map(int, self.sender().objectName().split('_'))
-        self.selectRow(row)
-
-    def on_widget_state_change(self) -> None:
-        row, column = map(int, self.sender().objectName().split('_'))
+        if delete_all_audio is True:
+            deleted_rows: list[dict] = self.data_origin.flight_rows(flight_id)
+        else:
+            deleted_rows: list[dict] = [data] if (data := self.data_origin.find(flight_id, audio_text_id)) else []
+        for data in deleted_rows:
+            self.remove_from_autoplay(data.get('schedule_id'), is_deleted=True)
+        for row in sorted((self.data_origin.position(data.get('schedule_id')) for data in deleted_rows), reverse=True):
+            self.table_model.remove_row(row)
+        self.selectRow(min(current_row_number, self.rowCount()-1))
+
+    def on_row_edited(self, row: int, field: str) -> None:
         self.selectRow(row)
-        self.update_schedule()
+        data: dict = self.table_model.row_data(row)
+        # Зоны на звук не влияют, озвучка остаётся в кэше
+        if field in SOUND_FIELDS or field == 'languages_list':
+            audio_cache.invalidate(data.get('schedule_id'))
+        self.update_schedule(data)
     
+    def start_autoplay_timer(self) -> None:
+        self.autoplay_timer.stop()
+        if settings.autoplay != 1 or (due := self.autoplay_queue.next_due()) is None:
+            return
+        self.autoplay_timer.start(min(max(ceil((due - datetime.now()).total_seconds() * 1000), 0), AUTOPLAY_TIMER_MAX_MS))
+
     def start_autoplay(self):
-        for key, value in self.autoplay_files.items(): 
-            if value.get('autoplay_is_canceled') is not True and value.get('is_played') is not True and value.get('job_is_fact') is True and datetime.now() >= datetime.strptime(value.get('job_datetime'), '%Y-%m-%d %H:%M'):
-                row_indx = self.flight_searching_autoplay(key)
-                if row_indx is not None:
-                    self.autoplay_timer.stop()
-                    self.is_autoplay = True
-                    self.autoplay_signal.emit()
-                    return
+        self.prefetcher.update()
+        # Все наступившие объявления ставятся в очередь воспроизведения, повторная постановка отбрасывается очередью
+        for schedule_id, job_datetime in self.autoplay_queue.pop_due(datetime.now()):
+            if self.data_origin.position(schedule_id) is not None:
+                self.autoplay_signal.emit(schedule_id, job_datetime)
+        self.start_autoplay_timer()
+
+    def select_row_id(self, schedule_id: str) -> bool:
+        if self.get_current_row_id() == schedule_id:
+            return True
+        return self.flight_searching_autoplay(schedule_id) is not None
 
     def flight_searching_autoplay(self, schedule_id: str) -> int:
-        for row_indx in range(self.rowCount()):
-            schedule = self.cellWidget(row_indx, 0)
-            if schedule.text() == schedule_id:
-                current_index = self.model().index(row_indx, 2)
-                self.selectRow(row_indx)
-                self.scrollTo(current_index, QAbstractItemView.ScrollHint.PositionAtTop)
-                return row_indx
+        row_indx: Optional[int] = self.data_origin.position(schedule_id)
+        if row_indx is not None:
+            self.show_row(row_indx)
+            return row_indx
+
+    def show_row(self, row_indx: int, is_selected: bool = True) -> None:
+        current_index = self.model().index(row_indx, 2)
+        if is_selected:
+            self.selectRow(row_indx)
+        self.scrollTo(current_index, QAbstractItemView.ScrollHint.PositionAtTop)
+
+    def search_flight_number(self, flight_number: str) -> int:
+        # Совпадения подсвечиваются по мере ввода, выделенная строка не меняется
+        match_count: int = self.search_model.set_search_text(flight_number)
+        if match_count:
+            self.show_row(self.search_model.next_match(self.currentRow()-1), is_selected=False)
+        return match_count
+
+    def select_flight_match(self, is_backward: bool = False) -> Optional[int]:
+        row_indx: int = self.currentRow()
+        match_row: Optional[int] = self.search_model.previous_match(row_indx) if is_backward else self.search_model.next_match(row_indx)
+        if match_row is not None:
+            self.show_row(match_row)
+        return match_row
     
-    def remove_from_autoplay(self, schedule_id: str):
+    def remove_from_autoplay(self, schedule_id: str, is_deleted: bool = False):
         self.autoplay_files.pop(schedule_id, None)
+        if is_deleted:
+            self.autoplay_queue.forget(schedule_id)
+        else:
+            self.autoplay_queue.remove(schedule_id)
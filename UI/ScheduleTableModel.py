@@ -0,0 +1,315 @@
+from typing import Any, Optional
+
+from PySide6.QtCore import Qt, QAbstractTableModel, QModelIndex, Signal
+from PySide6.QtGui import QColor, QFont
+
+from Schedule.Diff import ScheduleDiff, diff_schedule, stable_keys
+from Schedule.Refresh import PreparedRefresh
+from Schedule.Store import ScheduleStore
+
+EVENT_TIME_COLUMN: int = 5
+LANGUAGE_COLUMNS: tuple[int] = (8, 9, 10)
+LANGUAGE_CODES: tuple[str] = ('RUS', 'TAT', 'ENG')
+TERMINAL_COLUMN: int = 11
+BOARDING_GATE_COLUMN: int = 12
+ZONE_FIRST_COLUMN: int = 13
+CENTERED_COLUMNS: tuple[int] = (1, 3, 4, 5, 11, 12)
+EDITABLE_FIELDS: dict[int, str] = {EVENT_TIME_COLUMN: 'event_time', TERMINAL_COLUMN: 'terminal', BOARDING_GATE_COLUMN: 'boarding_gates'}
+FIELD_COLUMNS: dict[str, tuple[int]] = {
+    'schedule_id': (0,),
+    'is_played': (1,), 'job_time': (1,), 'job_is_fact': (1,),
+    'flight_number_full': (2,), 'status_id': (2,),
+    'direction': (3,),
+    'plan_flight_time': (4,),
+    'event_time': (5,), 'public_flight_time': (5,),
+    'audio_text': (6,), 'audio_text_description': (6,), 'direction_id': (6, 12),
+    'path': (7,),
+    'languages': LANGUAGE_COLUMNS, 'languages_list': LANGUAGE_COLUMNS,
+    'terminal': (TERMINAL_COLUMN,),
+    'boarding_gates': (BOARDING_GATE_COLUMN,),
+}
+
+def schedule_sort_key(data: dict) -> tuple:
+    return (data.get('flight_datetime'), data.get('flight_id'), (data.get('queue') is None, data.get('queue') or 0), data.get('schedule_id'))
+
+def boarding_gates_to_text(boarding_gates) -> str:
+    if boarding_gates is None:
+        return ''
+    if isinstance(boarding_gates, (list, tuple)):
+        return ','.join(map(str, boarding_gates))
+    return str(boarding_gates)
+
+class ScheduleTableModel(QAbstractTableModel):
+    row_edited_signal: Signal = Signal(int, str)
+
+    def __init__(self, header: tuple[str], zones: list[dict], parent=None) -> None:
+        super().__init__(parent)
+        self.header: tuple[str] = header
+        self.zones: list[dict] = zones
+        self.rows: ScheduleStore = ScheduleStore()
+        self.dirty_fields: dict[str, set[str]] = {}
+        # Растёт при каждом изменении строк; по ней видно, что подготовленное в фоне обновление устарело
+        self.revision: int = 0
+
+        self.played_color = QColor(92, 184, 92)
+        self.not_played_color = QColor(250, 250, 250)
+        self.job_fact_color = QColor(88, 176, 64)
+        self.alert_color = QColor(255, 25, 25)
+        self.arrival_color = QColor(50, 100, 255)
+        self.boarding_gate_color = QColor(255, 0, 0)
+        self.bold_font = QFont()
+        self.bold_font.setWeight(QFont.Weight.DemiBold)
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        if parent.isValid():
+            return 0
+        return len(self.rows)
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        if parent.isValid():
+            return 0
+        return len(self.header)
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.ItemDataRole.DisplayRole) -> Any:
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return self.header[section]
+        return None
+
+    def is_zone_column(self, col_indx: int) -> bool:
+        return ZONE_FIRST_COLUMN <= col_indx < ZONE_FIRST_COLUMN + len(self.zones)
+
+    def is_language_displayed(self, data: dict, col_indx: int) -> bool:
+        languages: dict = data.get('languages') or {}
+        return bool((languages.get(LANGUAGE_CODES[col_indx - LANGUAGE_COLUMNS[0]]) or {}).get('display'))
+
+    def is_delayed(self, data: dict) -> bool:
+        return bool(data.get('event_time'))
+
+    def is_job_fact(self, data: dict) -> bool:
+        return data.get('job_is_fact') is not None and data.get('is_played') is not True
+
+    def flags(self, index: QModelIndex) -> Qt.ItemFlag:
+        if not index.isValid():
+            return Qt.ItemFlag.NoItemFlags
+        flags = Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable
+        data: dict = self.rows[index.row()]
+        col_indx: int = index.column()
+        if col_indx in LANGUAGE_COLUMNS and self.is_language_displayed(data, col_indx):
+            flags |= Qt.ItemFlag.ItemIsUserCheckable
+        elif self.is_zone_column(col_indx):
+            flags |= Qt.ItemFlag.ItemIsUserCheckable
+        elif col_indx == TERMINAL_COLUMN:
+            flags |= Qt.ItemFlag.ItemIsEditable
+        elif col_indx == BOARDING_GATE_COLUMN and data.get('direction_id') == 1:
+            flags |= Qt.ItemFlag.ItemIsEditable
+        elif col_indx == EVENT_TIME_COLUMN and self.is_delayed(data):
+            flags |= Qt.ItemFlag.ItemIsEditable
+        return flags
+
+    def display_value(self, data: dict, col_indx: int) -> Optional[str]:
+        match col_indx:
+            case 0:
+                return data.get('schedule_id')
+            case 1:     # Время выполнения задачи (регистрация, посадка и тд)
+                return data.get('job_time')
+            case 2:     # Номер рейса
+                return data.get('flight_number_full')
+            case 3:     # Направление
+                return data.get('direction')
+            case 4:     # Вр рейса (план)
+                return data.get('plan_flight_time')
+            case 5:     # Вр рейса (расч.)
+                return data.get('event_time') if self.is_delayed(data) else data.get('public_flight_time')
+            case 6:     # Текст объявления
+                if data.get('audio_text_description'):
+                    return f"{data.get('audio_text')} ({data.get('audio_text_description')})"
+                return f"{data.get('audio_text')}"
+            case 7:     # Маршрут
+                return data.get('path')
+            case 11:    # Терминал
+                return data.get('terminal')
+            case 12:    # Номер выхода
+                if data.get('direction_id') == 1:
+                    return boarding_gates_to_text(data.get('boarding_gates'))
+        return None
+
+    def check_state(self, data: dict, col_indx: int) -> Optional[Qt.CheckState]:
+        if col_indx in LANGUAGE_COLUMNS:
+            if not self.is_language_displayed(data, col_indx):
+                return None
+            is_checked: bool = col_indx - LANGUAGE_COLUMNS[0] + 1 in (data.get('languages_list') or [])
+        elif self.is_zone_column(col_indx):
+            is_checked: bool = col_indx - ZONE_FIRST_COLUMN + 1 in (data.get('zones_list') or [])
+        else:
+            return None
+        return (Qt.CheckState.Unchecked, Qt.CheckState.Checked)[is_checked]
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole) -> Any:
+        if not index.isValid():
+            return None
+        data: dict = self.rows[index.row()]
+        col_indx: int = index.column()
+        match role:
+            case Qt.ItemDataRole.DisplayRole | Qt.ItemDataRole.EditRole:
+                return self.display_value(data, col_indx)
+            case Qt.ItemDataRole.CheckStateRole:
+                return self.check_state(data, col_indx)
+            case Qt.ItemDataRole.ToolTipRole:
+                if col_indx in (6, 7):
+                    return self.display_value(data, col_indx)
+            case Qt.ItemDataRole.TextAlignmentRole:
+                if col_indx in CENTERED_COLUMNS:
+                    return Qt.AlignmentFlag.AlignCenter
+                return Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter
+            case Qt.ItemDataRole.BackgroundRole:
+                if col_indx == 1:
+                    return (self.played_color, self.not_played_color)[data.get('is_played') is None]
+            case Qt.ItemDataRole.FontRole:
+                if col_indx == 1 and self.is_job_fact(data):
+                    return self.bold_font
+            case Qt.ItemDataRole.ForegroundRole:
+                if col_indx == 1 and self.is_job_fact(data):
+                    return self.job_fact_color
+                if col_indx == 2 and data.get('status_id') == 10:
+                    return self.alert_color
+                if col_indx == 5 and not self.is_delayed(data):
+                    return self.alert_color
+                if col_indx == 6 and data.get('direction_id') == 2:
+                    return self.arrival_color
+                if col_indx == 12:
+                    return self.boarding_gate_color
+        return None
+
+    def setData(self, index: QModelIndex, value: Any, role: int = Qt.ItemDataRole.EditRole) -> bool:
+        if not index.isValid() or not (self.flags(index) & (Qt.ItemFlag.ItemIsUserCheckable | Qt.ItemFlag.ItemIsEditable)):
+            return False
+        data: dict = self.rows[index.row()]
+        col_indx: int = index.column()
+        if role == Qt.ItemDataRole.CheckStateRole:
+            is_checked: bool = value in (Qt.CheckState.Checked, Qt.CheckState.Checked.value)
+            if col_indx in LANGUAGE_COLUMNS:
+                field, code = 'languages_list', col_indx - LANGUAGE_COLUMNS[0] + 1
+            else:
+                field, code = 'zones_list', col_indx - ZONE_FIRST_COLUMN + 1
+            values: set[int] = set(data.get(field) or [])
+            if (code in values) == is_checked:
+                return False
+            if is_checked:
+                values.add(code)
+            else:
+                values.discard(code)
+            data[field] = sorted(values)
+        elif role == Qt.ItemDataRole.EditRole:
+            field: str = EDITABLE_FIELDS[col_indx]
+            if col_indx == BOARDING_GATE_COLUMN:
+                value = value or None
+            if data.get(field) == value:
+                return False
+            data[field] = value
+        else:
+            return False
+        self.dirty_fields.setdefault(data.get('schedule_id'), set()).add(field)
+        self.revision += 1
+        self.dataChanged.emit(index, index, [role])
+        self.row_edited_signal.emit(index.row(), field)
+        return True
+
+    def row_data(self, row_indx: int) -> Optional[dict]:
+        if 0 <= row_indx < len(self.rows):
+            return self.rows[row_indx]
+        return None
+
+    def set_rows(self, rows: list[dict]) -> None:
+        self.beginResetModel()
+        self.rows.reset(rows)
+        self.dirty_fields = {}
+        self.revision += 1
+        self.endResetModel()
+
+    def columns_for_fields(self, fields) -> list[int]:
+        columns: set[int] = set()
+        for field in fields:
+            if field == 'zones_list':
+                columns.update(range(ZONE_FIRST_COLUMN, ZONE_FIRST_COLUMN+len(self.zones)))
+            else:
+                columns.update(FIELD_COLUMNS.get(field, ()))
+        return sorted(columns)
+
+    def get_protected_fields(self, protected_fields: Optional[dict[str, set[str]]] = None) -> dict[str, set[str]]:
+        protected: dict[str, set[str]] = {key: set(fields) for key, fields in self.dirty_fields.items()}
+        for key, fields in (protected_fields or {}).items():
+            protected.setdefault(key, set()).update(fields)
+        return protected
+
+    def apply_rows(self, new_rows: list[dict], protected_fields: Optional[dict[str, set[str]]] = None) -> ScheduleDiff:
+        diff: ScheduleDiff = diff_schedule(self.rows, new_rows, self.get_protected_fields(protected_fields))
+        return self.apply_diff(diff, [data.get('schedule_id') for data in new_rows] if diff.inserted or diff.is_reordered else None)
+
+    def apply_prepared(self, prepared: PreparedRefresh, protected_fields: Optional[dict[str, set[str]]] = None) -> ScheduleDiff:
+        # Разница подготовлена для той же ревизии строк, здесь из неё только исключаются защищённые поля
+        diff: ScheduleDiff = prepared.diff
+        for key, fields in self.get_protected_fields(protected_fields).items():
+            if (changes := diff.updated.get(key)) is not None:
+                for field in fields:
+                    changes.pop(field, None)
+                if not changes:
+                    del diff.updated[key]
+        return self.apply_diff(diff, prepared.order, prepared.stable)
+
+    def apply_diff(self, diff: ScheduleDiff, new_keys: Optional[list[str]] = None, stable: Optional[set[str]] = None) -> ScheduleDiff:
+        if diff.is_empty():
+            return diff
+        self.revision += 1
+
+        for row_indx in sorted(map(self.rows.position, diff.removed), reverse=True):
+            self.remove_row(row_indx)
+
+        if diff.inserted or diff.is_reordered:
+            if stable is None:
+                stable = stable_keys([data.get('schedule_id') for data in self.rows], new_keys)
+            previous_indx: int = -1
+            for key in new_keys:
+                if key not in stable:
+                    if key in diff.inserted:
+                        self.insert_row(previous_indx+1, diff.inserted[key])
+                    else:
+                        source_indx: int = self.rows.position(key)
+                        if source_indx != previous_indx+1:
+                            self.beginMoveRows(QModelIndex(), source_indx, source_indx, QModelIndex(), previous_indx+1)
+                            self.rows.move(source_indx, previous_indx+1 if source_indx > previous_indx else previous_indx)
+                            self.endMoveRows()
+                previous_indx = self.rows.position(key)
+
+        if diff.updated:
+            for key, changes in diff.updated.items():
+                row_indx: int = self.rows.position(key)
+                self.rows.update(key, changes)
+                if columns := self.columns_for_fields(changes):
+                    self.dataChanged.emit(self.index(row_indx, columns[0]), self.index(row_indx, columns[-1]))
+        return diff
+
+    def mark_clean(self, schedule_id: str) -> None:
+        self.dirty_fields.pop(schedule_id, None)
+
+    def insert_row(self, row_indx: int, data: dict) -> None:
+        self.beginInsertRows(QModelIndex(), row_indx, row_indx)
+        self.revision += 1
+        self.rows.insert(row_indx, data)
+        self.endInsertRows()
+
+    def remove_row(self, row_indx: int) -> None:
+        self.beginRemoveRows(QModelIndex(), row_indx, row_indx)
+        self.revision += 1
+        data: dict = self.rows.pop(row_indx)
+        self.dirty_fields.pop(data.get('schedule_id'), None)
+        self.endRemoveRows()
+
+    def update_row(self, row_indx: int) -> None:
+        self.revision += 1
+        self.dataChanged.emit(self.index(row_indx, 0), self.index(row_indx, self.columnCount() - 1))
+
+    def mark_played(self, row_indx: int) -> None:
+        if data := self.row_data(row_indx):
+            data['is_played'] = True
+            self.revision += 1
+            self.dataChanged.emit(self.index(row_indx, 1), self.index(row_indx, 1))
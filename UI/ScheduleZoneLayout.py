@@ -1,7 +1,7 @@
 from PySide6.QtWidgets import QGridLayout, QLabel
 from PySide6.QtCore import Qt
 
-from .Font import RobotoFont
+from .Font import fonts
 
 class ScheduleZoneLayout(QGridLayout):
     def __init__(self, zones: dict, parent=None) -> None:
@@ -13,9 +13,16 @@ class ScheduleZoneLayout(QGridLayout):
         self.setAlignment(Qt.AlignmentFlag.AlignRight)
         self.add_zones_to_layout()
     
+    def set_zones(self, zones: list[dict]) -> None:
+        while (item := self.takeAt(0)) is not None:
+            if item.widget():
+                item.widget().deleteLater()
+        self.zones = zones
+        self.add_zones_to_layout()
+
     def add_zones_to_layout(self) -> None:
         for zone in self.zones:
             zone_label = QLabel(f"{zone.get('id')}. {zone.get('name')}")
-            zone_label.setFont(RobotoFont().get_font(9))
+            zone_label.setFont(fonts.get_font(9))
             zone_label.setWordWrap(True)
             self.addWidget(zone_label, (zone.get('id')-1) % 2, (zone.get('id')-1) // 2)
@@ -6,6 +6,5 @@ class SpeakerButton(QPushButton):
         super().__init__()
         self.setFixedWidth(width)
         self.setFixedHeight(height)
-        self.setStyleSheet('border:1px solid silver; padding:6px; font-weight:600; font-size:14px;')
         self.setText(text)
         self.setCursor(Qt.CursorShape.PointingHandCursor)
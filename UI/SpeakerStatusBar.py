@@ -1,13 +1,18 @@
 from datetime import datetime
 
-from PySide6.QtWidgets import QStatusBar
+from PySide6.QtWidgets import QStatusBar, QLabel
 
 from globals import logger
 
 class SpeakerStatusBar(QStatusBar):
     def __init__(self) -> None:
         super().__init__()
-        
+        self.audio_cache_label = QLabel()
+        self.addPermanentWidget(self.audio_cache_label)
+
+    def setAudioCacheText(self, text: str) -> None:
+        self.audio_cache_label.setText(text)
+
     def setStatusBarText(self, text: str, is_error: bool = None) -> None:
         if is_error:
             timeout = 30000
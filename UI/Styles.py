@@ -0,0 +1,12 @@
+from functools import cache
+
+# Стили, которые раньше задавались каждому экземпляру виджета через setStyleSheet
+STYLES: dict[str, str] = {
+    'speaker_button': 'SpeakerButton { border: 1px solid silver; padding: 6px; font-weight: 600; font-size: 14px; }',
+    'table_checkbox': 'TableCheckbox::indicator { width: 20px; height: 20px; }',
+    'boarding_gate_editor': 'QLineEdit#boarding_gate_editor { color: rgb(255, 0, 0); }',
+}
+
+@cache
+def application_stylesheet() -> str:
+    return ' '.join(STYLES.values())
@@ -0,0 +1,43 @@
+from typing import Optional
+from PySide6.QtCore import Qt, QAbstractListModel, QModelIndex, QPersistentModelIndex
+
+class TerminalModel(QAbstractListModel):
+    """
+    Read-only list of terminals shared by every terminal combo box of the schedule.
+    It is rebuilt only when get_terminals returns a different list.
+    """
+
+    def __init__(self, parent=None) -> None:
+        super().__init__(parent)
+        self.terminals: list[dict] = []
+        self.name_indexes: dict[str, int] = {}
+
+    def rowCount(self, parent: QModelIndex | QPersistentModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.terminals)
+
+    def data(self, index: QModelIndex | QPersistentModelIndex, role: int = Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        match role:
+            case Qt.ItemDataRole.DisplayRole | Qt.ItemDataRole.EditRole:
+                return self.terminals[index.row()].get('name')
+            case Qt.ItemDataRole.UserRole:
+                return self.terminals[index.row()]
+        return None
+
+    def flags(self, index: QModelIndex | QPersistentModelIndex) -> Qt.ItemFlag:
+        if not index.isValid():
+            return Qt.ItemFlag.NoItemFlags
+        return Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable
+
+    def set_terminals(self, terminals: list[dict]) -> bool:
+        if terminals == self.terminals:
+            return False
+        self.beginResetModel()
+        self.terminals = list(terminals)
+        self.name_indexes = {terminal.get('name'): row_indx for row_indx, terminal in enumerate(self.terminals)}
+        self.endResetModel()
+        return True
+
+    def index_of(self, name: Optional[str]) -> int:
+        return self.name_indexes.get(name, -1)
@@ -1,13 +1,12 @@
-import json
 import os
 import sys
 
 import logging
 
-import requests
 from settings import SpeakerSetting
 from loggers import init_logger
 from WinAPI.Device import AudioInterface
+from API.Snapshot import Snapshot, SNAPSHOT_FILE_NAME
 
 from PySide6.QtWidgets import QCheckBox
 from PySide6.QtCore import Qt, QUrl
@@ -27,13 +26,12 @@ class TableCheckbox(QCheckBox):
     def __init__(self, row_indx, col_indx):
         super().__init__()
         self.setObjectName(f'{row_indx}_{col_indx}')
-        self.setStyleSheet("QCheckBox::indicator" "{" "width :20px;" "height : 20px;" "}")
         self.setFixedWidth(22)
         self.setFixedHeight(22)
         self.setCursor(Qt.CursorShape.PointingHandCursor)
 
-response = requests.get(settings.api_url+'get_terminals')
-terminals: list[dict] = json.loads(str(response.content, 'utf-8'))
-
-response = requests.get(settings.api_url+'get_zones')
-zones: list[dict] = json.loads(str(response.content, 'utf-8'))
+# Зоны и терминалы берутся из последнего сохранённого снимка, актуальные данные загружаются после запуска
+snapshot: Snapshot = Snapshot(os.path.join(root_directory, SNAPSHOT_FILE_NAME), [{'id': int(zone_id), 'name': name} for zone_id, name in settings.device.get('outputs', {}).items()])
+snapshot.load()
+terminals: list[dict] = snapshot.terminals
+zones: list[dict] = snapshot.zones
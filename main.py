@@ -4,10 +4,11 @@ import time
 
 from PySide6.QtWidgets import QApplication, QProxyStyle
 from PySide6.QtCore import QRect
-from PySide6 import QtAsyncio
+from qasync import QEventLoop
 
 # from UI.Application import SpeakerApplication
 from UI.MainWindow import SpeakerApplication
+from UI.Styles import application_stylesheet
 from globals import settings
 
 class ProxyStyle(QProxyStyle):
@@ -20,20 +21,20 @@ class ProxyStyle(QProxyStyle):
 
 def main() -> None:
     app = QApplication(sys.argv)
-    settings.apply_theme(settings.theme)
+    # Один цикл asyncio на всё приложение, работающий поверх цикла событий Qt
+    loop = QEventLoop(app)
+    asyncio.set_event_loop(loop)
+    settings.apply_theme(settings.theme, application_stylesheet())
     # app.setStyle(ProxyStyle())
 
     speaker = SpeakerApplication()
     speaker.showMaximized()
     speaker.show()
 
-    # asyncio.run(speaker.schedule_table.get_table_data_from_API(settings.api_url+'get_scheduler'))
-    # asyncio.run(speaker.background_table.get_table_data_from_API(settings.api_url+'get_audio_background_text'))
-    # QtAsyncio.run()
-
-    asyncio.run(speaker.get_terminal_data_from_API())
-    asyncio.run(speaker.background_table.get_background_data_from_API())
-    sys.exit(app.exec())
+    with loop:
+        asyncio.ensure_future(speaker.bootstrap())
+        asyncio.ensure_future(speaker.background_table.get_background_data_from_API())
+        loop.run_forever()
 
 if __name__ == "__main__":
     main()
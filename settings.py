@@ -1,6 +1,7 @@
 import os
 import json
 import qdarktheme
+from PySide6.QtWidgets import QApplication
 
 SETTINGS_FILE_NAME = 'settings.json'
 DEFAULT_SETTINGS_FILE_NAME = 'settings-default.json'
@@ -16,17 +17,33 @@ class SpeakerSetting():
         self.device: dict
         self.listen_channel: int
         self.log_file_path: str
-        self.file_name: str
         self.file_format: str
         self.autoplay: int
-        
+        self.schedule_delta_fetch: int
+        self.audio_cache_size_mb: int
+        self.audio_cache_max_age_hours: int
+        self.autoplay_prefetch_minutes: int
+        self.audio_streaming: int
+        self.audio_stream_preroll_ms: int
+        self.playback_stale_policy: str
+        self.playback_stale_seconds: int
+        self.playback_parallel_zones: int
+        self.background_duck_mode: str
+        self.background_duck_db: int
+        self.background_duck_ramp_ms: int
+        self.audio_blocksize: int
+        self.audio_latency: str | float
+        self.edit_write_delay_ms: int
+        self.action_history_flush_ms: int
+
+        with open(DEFAULT_SETTINGS_FILE_NAME, 'r', encoding='utf-8') as default_file:
+            DEFAULT_SETTINGS = json.load(default_file)
+        for setting in DEFAULT_SETTINGS:
+            setattr(self, setting, DEFAULT_SETTINGS[setting])
+        # Настройки пользователя накладываются поверх значений по умолчанию, чтобы новые ключи не ломали старые файлы
         if os.path.isfile(SETTINGS_FILE_NAME):
             self.load_from_json()
         else:
-            with open(DEFAULT_SETTINGS_FILE_NAME, 'r', encoding='utf-8') as default_file:
-                DEFAULT_SETTINGS = json.load(default_file)
-            for setting in DEFAULT_SETTINGS:
-                setattr(self, setting, DEFAULT_SETTINGS[setting])
             self.save_to_json()
         self.set_working_dir(os.path.join(os.getcwd(), self.working_dir))
 
@@ -47,9 +64,24 @@ class SpeakerSetting():
                 'listen_channel': self.listen_channel,
                 'api_url': self.api_url,
                 'log_file_path': self.log_file_path,
-                'file_name': self.file_name,
                 'file_format': self.file_format,
-                'autoplay': self.autoplay
+                'autoplay': self.autoplay,
+                'schedule_delta_fetch': self.schedule_delta_fetch,
+                'audio_cache_size_mb': self.audio_cache_size_mb,
+                'audio_cache_max_age_hours': self.audio_cache_max_age_hours,
+                'autoplay_prefetch_minutes': self.autoplay_prefetch_minutes,
+                'audio_streaming': self.audio_streaming,
+                'audio_stream_preroll_ms': self.audio_stream_preroll_ms,
+                'playback_stale_policy': self.playback_stale_policy,
+                'playback_stale_seconds': self.playback_stale_seconds,
+                'playback_parallel_zones': self.playback_parallel_zones,
+                'background_duck_mode': self.background_duck_mode,
+                'background_duck_db': self.background_duck_db,
+                'background_duck_ramp_ms': self.background_duck_ramp_ms,
+                'audio_blocksize': self.audio_blocksize,
+                'audio_latency': self.audio_latency,
+                'edit_write_delay_ms': self.edit_write_delay_ms,
+                'action_history_flush_ms': self.action_history_flush_ms
             }
             json.dump(data, json_file, ensure_ascii=False, indent=4)
 
@@ -61,10 +93,13 @@ class SpeakerSetting():
         finally:
             os.chdir(directory)
 
-    def apply_theme(self, theme=None):
+    def apply_theme(self, theme=None, additional_qss: str = ''):
         theme = (theme, self.theme)[theme is None]
-        if parameter := theme_parameters.get(self.theme):
-            qdarktheme.setup_theme(theme=parameter.get('theme'), additional_qss=parameter.get('qss'), custom_colors=parameter.get('custom'))
+        if parameter := theme_parameters.get(theme):
+            qss: str = ' '.join(filter(None, (parameter.get('qss'), additional_qss)))
+            qdarktheme.setup_theme(theme=parameter.get('theme'), additional_qss=qss or None, custom_colors=parameter.get('custom'))
+        elif additional_qss:
+            QApplication.instance().setStyleSheet(additional_qss)
 
 
 theme_parameters = {
@@ -0,0 +1,97 @@
+"""
+Сравнение пути от полученного ответа API до готового к воспроизведению массива.
+
+    python tools/bench_click_to_sound.py --duration 15 --format MP3 --repeat 20
+
+Старый путь: запись .temp через QSaveFile, sf.info и sf.read в потоке интерфейса, удаление файла.
+Новый путь: декодирование из памяти в отдельном потоке (Audio.Decoder.decode_sound).
+Для каждого пути выводится время до готового звука и максимальная задержка цикла событий,
+то есть насколько интерфейс был заблокирован. Время от нажатия до звука в приложении
+пишется в лог строкой "От запуска до начала воспроизведения".
+"""
+import io
+import os
+import sys
+import time
+import asyncio
+import argparse
+import tempfile
+import statistics
+
+import numpy as np
+import soundfile as sf
+from PySide6.QtCore import QSaveFile, QIODevice
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Audio.Decoder import decode_sound
+
+def make_sound(duration: float, file_format: str, samplerate: int = 44100) -> bytes:
+    # Тон с шумом, чтобы размер сжатого файла был ближе к синтезированной речи
+    times: np.ndarray = np.arange(int(duration * samplerate)) / samplerate
+    noise: np.ndarray = np.random.default_rng(0).uniform(-0.1, 0.1, len(times))
+    frames: np.ndarray = (0.3 * np.sin(2 * np.pi * 440 * times) + noise).astype('float32')
+    buffer = io.BytesIO()
+    sf.write(buffer, frames, samplerate, format=file_format)
+    return buffer.getvalue()
+
+def file_round_trip(data: bytes, file_path: str) -> np.ndarray:
+    sound_file = QSaveFile(file_path)
+    sound_file.open(QIODevice.OpenModeFlag.WriteOnly)
+    sound_file.write(data)
+    sound_file.commit()
+    sf.info(file_path)
+    frames, _ = sf.read(file_path)
+    os.unlink(file_path)
+    return frames
+
+async def measure(path, repeat: int) -> tuple[list[float], list[float]]:
+    latencies: list[float] = []
+    stalls: list[float] = []
+    for _ in range(repeat):
+        stall: float = 0.
+        is_running: bool = True
+
+        async def ticker() -> None:
+            nonlocal stall
+            previous: float = time.perf_counter()
+            while is_running:
+                await asyncio.sleep(0.001)
+                now: float = time.perf_counter()
+                stall = max(stall, now - previous)
+                previous = now
+
+        tick = asyncio.ensure_future(ticker())
+        await asyncio.sleep(0.005)
+        start: float = time.perf_counter()
+        await path()
+        latencies.append(time.perf_counter() - start)
+        is_running = False
+        await tick
+        stalls.append(stall)
+    return latencies, stalls
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description='Время от ответа API до готового звука')
+    parser.add_argument('--duration', type=float, default=15, help='длительность объявления в секундах')
+    parser.add_argument('--format', default='MP3', help='формат звука: MP3, WAV, OGG')
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    data: bytes = make_sound(args.duration, args.format)
+    file_path: str = os.path.join(tempfile.gettempdir(), '.temp')
+    loop = asyncio.get_running_loop()
+
+    async def old_path() -> None:
+        file_round_trip(data, file_path)
+
+    async def new_path() -> None:
+        await loop.run_in_executor(None, decode_sound, data)
+
+    print(f"{args.format}, {args.duration} с, {len(data) / 1024:.0f} КБ, повторов {args.repeat}")
+    for name, path in (('файл .temp', old_path), ('память, поток', new_path)):
+        latencies, stalls = await measure(path, args.repeat)
+        print(f"{name:>14}: до готового звука {statistics.median(latencies) * 1000:7.1f} мс (медиана), "
+              f"блокировка интерфейса до {max(stalls) * 1000:7.1f} мс")
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,74 @@
+"""
+Время поиска рейса по мере ввода на большом расписании.
+
+    python tools/bench_flight_search.py --rows 1000 5000 10000 --repeat 200
+
+Старый путь: перебор всех строк расписания с проверкой вхождения в flight_number_full.
+Новый путь: индекс n-грамм номеров рейсов в ScheduleStore и подсветка совпадений
+через ScheduleSearchModel. Запрос вводится посимвольно, как оператор набирает номер;
+для каждого префикса выводится медианное время и число совпадений.
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import statistics
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+from PySide6.QtCore import QCoreApplication
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from UI.ScheduleTableModel import ScheduleTableModel
+from UI.ScheduleSearchModel import ScheduleSearchModel
+
+AIRLINES: tuple[str] = ('SU', 'U6', 'S7', 'UT', 'DP', 'FV', 'N4', 'ЮТ', 'A4', '5N')
+
+def make_rows(count: int) -> list[dict]:
+    generator = random.Random(0)
+    return [{
+        'schedule_id': str(row_indx),
+        'flight_id': row_indx // 3,
+        'audio_text_id': row_indx % 3,
+        'flight_number_full': f"{generator.choice(AIRLINES)} {generator.randint(1, 9999)}",
+    } for row_indx in range(count)]
+
+def scan(rows, flight_number: str) -> list[int]:
+    return [row_indx for row_indx, data in enumerate(rows) if flight_number in (data.get('flight_number_full') or '')]
+
+def measure(function, repeat: int) -> float:
+    timings: list[float] = []
+    for _ in range(repeat):
+        start: float = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Время поиска рейса по мере ввода')
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 5000, 10000], help='число строк расписания')
+    parser.add_argument('--query', default='SU 12', help='набираемый номер рейса')
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    app = QCoreApplication([])
+    for count in args.rows:
+        rows: list[dict] = make_rows(count)
+        model = ScheduleTableModel(('',) * 14, [])
+        model.set_rows(rows)
+        search_model = ScheduleSearchModel(model)
+        print(f"Строк {count}")
+        for length in range(1, len(args.query)+1):
+            query: str = args.query[:length]
+
+            def type_query() -> None:
+                # Сброс, чтобы каждый повтор пересчитывал совпадения
+                search_model.set_search_text('')
+                search_model.set_search_text(query)
+
+            old: float = measure(lambda: scan(model.rows, query), args.repeat)
+            new: float = measure(type_query, args.repeat) / 2
+            print(f"  {query!r:>9}: перебор {old * 1000:7.3f} мс, индекс {new * 1000:7.3f} мс, совпадений {search_model.match_count}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""
+Время и качество приведения объявлений к формату вывода.
+
+    python tools/bench_resample.py --durations 30 60 90 --rates 22050 24000 44100 --output 48000 --repeat 5
+
+Для каждой длительности, исходной частоты и числа каналов измеряется Audio.Resample.convert_frames
+(сведение в моно и передискретизация целиком), потоковый вариант блоками по BLOCK_FRAMES, как при
+декодировании по мере загрузки, и повторное получение уже приведённого звука из PreparedSound.
+Качество оценивается отношением сигнал/шум для тона 1 кГц относительно точного тона на частоте вывода.
+"""
+import io
+import os
+import sys
+import time
+import argparse
+import statistics
+
+import numpy as np
+import soundfile as sf
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Audio.Decoder import decode_sound
+from Audio.Resample import Resampler, convert_frames
+from Audio.Stream import BLOCK_FRAMES
+
+TONE_HZ: float = 1000.
+
+def make_tone(duration: float, samplerate: int, channels: int) -> np.ndarray:
+    times: np.ndarray = np.arange(int(duration * samplerate)) / samplerate
+    tone: np.ndarray = (0.5 * np.sin(2 * np.pi * TONE_HZ * times)).astype('float32')
+    return np.repeat(tone[:, np.newaxis], channels, axis=1) if channels > 1 else tone
+
+def get_snr(frames: np.ndarray, samplerate: int) -> float:
+    # Края отбрасываются: там фильтр видит тишину до начала сигнала
+    margin: int = samplerate // 10
+    times: np.ndarray = np.arange(len(frames)) / samplerate
+    expected: np.ndarray = 0.5 * np.sin(2 * np.pi * TONE_HZ * times)
+    error: np.ndarray = frames[margin:-margin] - expected[margin:-margin]
+    return 10 * np.log10(np.mean(expected[margin:-margin] ** 2) / np.mean(error ** 2))
+
+def convert_by_blocks(frames: np.ndarray, source_rate: int, target_rate: int) -> np.ndarray:
+    resampler = Resampler(source_rate, target_rate)
+    blocks: list[np.ndarray] = [resampler.process(frames[start:start+BLOCK_FRAMES]) for start in range(0, len(frames), BLOCK_FRAMES)]
+    return np.concatenate((*blocks, resampler.flush()))
+
+def measure(function, repeat: int) -> float:
+    timings: list[float] = []
+    for _ in range(repeat):
+        start: float = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Время и качество приведения звука к формату вывода')
+    parser.add_argument('--durations', type=float, nargs='+', default=[30, 60, 90], help='длительности объявлений в секундах')
+    parser.add_argument('--rates', type=int, nargs='+', default=[22050, 24000, 44100], help='исходные частоты')
+    parser.add_argument('--output', type=int, default=48000, help='частота вывода')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"Вывод {args.output} Гц, моно, повторов {args.repeat}")
+    print(f"{'длит.':>6} {'частота':>8} {'кан.':>4} {'целиком, мс':>12} {'x реального':>12} {'блоками, мс':>12} {'из кэша, мс':>12} {'SNR, дБ':>8}")
+    for duration in args.durations:
+        for samplerate in args.rates:
+            for channels in (1, 2):
+                frames: np.ndarray = make_tone(duration, samplerate, channels)
+                buffer = io.BytesIO()
+                sf.write(buffer, frames, samplerate, format='WAV', subtype='FLOAT')
+                prepared = decode_sound(buffer.getvalue(), args.output)
+                whole: float = measure(lambda: convert_frames(frames, samplerate, args.output), args.repeat)
+                by_blocks: float = measure(lambda: convert_by_blocks(frames, samplerate, args.output), args.repeat)
+                cached: float = measure(lambda: prepared.get_frames(args.output), args.repeat)
+                snr: float = get_snr(prepared.get_frames(args.output), args.output)
+                print(f"{duration:>6.0f} {samplerate:>8} {channels:>4} {whole * 1000:>12.1f} {duration / whole:>12.0f} "
+                      f"{by_blocks * 1000:>12.1f} {cached * 1000:>12.4f} {snr:>8.1f}")
+
+if __name__ == '__main__':
+    main()
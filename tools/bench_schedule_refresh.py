@@ -0,0 +1,112 @@
+"""
+Блокировка цикла событий при обновлении расписания из ответа API.
+
+    python tools/bench_schedule_refresh.py --rows 1000 10000 --repeat 10
+
+Данные и изменения между опросами берутся из заглушки API (tools/stub_api.py).
+Старый путь: json.loads, слияние изменений и сравнение со строками таблицы в потоке интерфейса.
+Новый путь: разбор и сравнение в фоновом потоке (Schedule.Refresh.prepare_refresh),
+в потоке интерфейса только применение готовой разницы к модели.
+Для полного ответа и для ответа с изменениями с версии (delta) выводится время до обновлённой
+таблицы и задержка цикла событий (наибольшая и медиана по повторам), то есть насколько
+интерфейс был заблокирован. Перерисовка представления таблицы в замер не входит.
+"""
+import gc
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import statistics
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+from PySide6.QtCore import QCoreApplication
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Schedule.Diff import merge_delta
+from Schedule.Refresh import prepare_refresh
+from UI.ScheduleTableModel import ScheduleTableModel, schedule_sort_key
+from stub_api import StubData
+
+def make_payloads(count: int, mutations: int) -> tuple[list[dict], bytes, bytes]:
+    random.seed(0)
+    data = StubData(count)
+    rows: list[dict] = json.loads(json.dumps(data.rows()))
+    since: int = data.version
+    for _ in range(mutations):
+        data.mutate()
+    full: bytes = json.dumps(data.rows(), ensure_ascii=False).encode('utf-8')
+    delta: bytes = json.dumps({
+        'version': data.version,
+        'changed': [data.schedule[key] for key, version in data.changes.items() if version > since and key in data.schedule],
+        'deleted': [key for key, version in data.deletions.items() if version > since],
+    }, ensure_ascii=False).encode('utf-8')
+    return rows, full, delta
+
+async def measure(setup, path, repeat: int) -> tuple[list[float], list[float]]:
+    latencies: list[float] = []
+    stalls: list[float] = []
+    for _ in range(repeat):
+        setup()
+        stall: float = 0.
+        is_running: bool = True
+
+        async def ticker() -> None:
+            nonlocal stall
+            previous: float = time.perf_counter()
+            while is_running:
+                await asyncio.sleep(0.001)
+                now: float = time.perf_counter()
+                stall = max(stall, now - previous)
+                previous = now
+
+        tick = asyncio.ensure_future(ticker())
+        await asyncio.sleep(0.005)
+        start: float = time.perf_counter()
+        await path()
+        latencies.append(time.perf_counter() - start)
+        is_running = False
+        await tick
+        stalls.append(stall)
+    return latencies, stalls
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description='Блокировка интерфейса при обновлении расписания')
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000], help='число строк расписания')
+    parser.add_argument('--mutations', type=int, default=5, help='число изменений расписания между опросами')
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    app = QCoreApplication([])
+    loop = asyncio.get_running_loop()
+    model = ScheduleTableModel(('',) * 14, [])
+    for count in args.rows:
+        rows, full, delta = make_payloads(count, args.mutations)
+
+        def setup() -> None:
+            model.set_rows([dict(data) for data in rows])
+            # Мусор предыдущего повтора собирается до замера, иначе его сборка попадёт в чужой путь
+            gc.collect()
+
+        for kind, payload in (('полный', full), ('delta', delta)):
+
+            async def old_path() -> None:
+                received: list[dict] | dict = json.loads(str(payload, 'utf-8'))
+                if isinstance(received, dict):
+                    received = merge_delta(model.rows, received.get('changed', []), received.get('deleted', []), schedule_sort_key)
+                model.apply_rows(received)
+
+            async def new_path() -> None:
+                prepared = await loop.run_in_executor(None, prepare_refresh, payload, list(model.rows), model.revision, schedule_sort_key)
+                model.apply_prepared(prepared)
+
+            print(f"Строк {count}, ответ {kind}, {len(payload) / 1024:.0f} КБ, повторов {args.repeat}")
+            for name, path in (('в потоке интерфейса', old_path), ('в фоновом потоке', new_path)):
+                latencies, stalls = await measure(setup, path, args.repeat)
+                print(f"  {name:>19}: до обновлённой таблицы {statistics.median(latencies) * 1000:7.1f} мс (медиана), "
+                      f"блокировка интерфейса до {max(stalls) * 1000:7.1f} мс (медиана {statistics.median(stalls) * 1000:5.1f} мс)")
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,274 @@
+"""
+Локальная заглушка API для проверки клиента без рабочего сервера.
+
+    python tools/stub_api.py --port 8000 --rows 300 --mutate 15
+
+В settings.json указать "api_url": "http://127.0.0.1:8000/speaker/".
+get_scheduler и get_audio_background_text отдают ETag/Last-Modified и отвечают 304 на
+If-None-Match/If-Modified-Since; get_scheduler?since=<version> возвращает только изменения
+{"version", "changed", "deleted"} или 410, если версия слишком старая.
+get_scheduler_sound и get_scheduler_background_sound возвращают WAV с тоном длительностью --sound секунд
+через --synthesis секунд, имитируя синтез речи; с --transfer тело отдаётся частями в течение указанного времени.
+Изменения с уже полученным заголовком Idempotency-Key повторно не применяются;
+get_stub_statistics возвращает число принятых изменений по методам и число повторов.
+save_action_history_batch принимает список записей истории; с --no-history-batch отвечает 404.
+"""
+import io
+import json
+import math
+import wave
+import time
+import random
+import struct
+import argparse
+import threading
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+
+ZONES: list[dict] = [{'id': indx, 'name': f'Зона {indx}'} for indx in range(1, 9)]
+TERMINALS: list[dict] = [{'id': indx, 'name': name} for indx, name in enumerate(('A', 'B', 'C'), 1)]
+AUDIO_TEXTS: tuple[str] = ('Начало регистрации', 'Окончание регистрации', 'Начало посадки', 'Окончание посадки', 'Задержка рейса')
+CHANGE_LOG_SIZE: int = 1000
+UPDATE_FIELDS: dict[str, str] = {'languages': 'languages_list', 'zones': 'zones_list', 'terminal': 'terminal', 'boarding_gates': 'boarding_gates', 'event_time': 'event_time'}
+
+class StubData():
+    def __init__(self, row_count: int) -> None:
+        self.lock = threading.Lock()
+        self.version: int = 1
+        self.modified: datetime = datetime.now(timezone.utc).replace(microsecond=0)
+        self.changes: dict[str, int] = {}
+        self.deletions: dict[str, int] = {}
+        self.oldest_version: int = 1
+        self.next_flight_id: int = 1
+        self.schedule: dict[str, dict] = {}
+        self.idempotency_keys: set[str] = set()
+        self.mutation_counts: dict[str, int] = {}
+        self.duplicate_count: int = 0
+        for _ in range(row_count // len(AUDIO_TEXTS)):
+            self.add_flight()
+        self.background: list[dict] = [self.background_row(indx) for indx in range(1, 6)]
+
+    def add_flight(self) -> list[str]:
+        flight_id: int = self.next_flight_id
+        self.next_flight_id += 1
+        flight_datetime: datetime = datetime.now().replace(second=0, microsecond=0) + timedelta(minutes=5*flight_id)
+        direction_id: int = random.choice((1, 2))
+        added: list[str] = []
+        for audio_text_id, audio_text in enumerate(AUDIO_TEXTS, 1):
+            job_datetime: datetime = flight_datetime - timedelta(minutes=10*(len(AUDIO_TEXTS)-audio_text_id+1))
+            schedule_id: str = f'{flight_id}_{audio_text_id}'
+            self.schedule[schedule_id] = {
+                'schedule_id': schedule_id, 'id': schedule_id, 'flight_id': flight_id, 'audio_text_id': audio_text_id,
+                'flight_datetime': flight_datetime.strftime('%Y-%m-%d %H:%M'), 'queue': None, 'is_played': None,
+                'job_id': audio_text_id, 'job_time': job_datetime.strftime('%H:%M'), 'job_is_fact': True,
+                'job_datetime': job_datetime.strftime('%Y-%m-%d %H:%M'), 'autoplay_is_canceled': None,
+                'flight_number_full': f'SU {1000+flight_id}', 'direction': ('Вылет', 'Прилёт')[direction_id-1], 'direction_id': direction_id,
+                'status_id': 1, 'plan_flight_time': flight_datetime.strftime('%H:%M'), 'public_flight_time': flight_datetime.strftime('%H:%M'),
+                'event_time': None, 'audio_text': audio_text, 'audio_text_description': None, 'path': 'Москва',
+                'languages': {'RUS': {'display': True}, 'TAT': {'display': True}, 'ENG': {'display': True}}, 'languages_list': [1, 3],
+                'is_has_terminal': direction_id == 1, 'terminal': 'A' if direction_id == 1 else None,
+                'is_has_boarding_gate': direction_id == 1, 'boarding_gates': [audio_text_id] if direction_id == 1 else None,
+                'is_has_event_time': audio_text_id == 5, 'zones_list': [1, 2, 3],
+            }
+            added.append(schedule_id)
+        return added
+
+    def background_row(self, audio_text_id: int) -> dict:
+        return {'audio_text_id': audio_text_id, 'name': f'Фоновое объявление {audio_text_id}',
+            'languages': {'RUS': {'display': True}, 'TAT': {'display': True}, 'ENG': {'display': audio_text_id % 2 == 0}},
+            'languages_list': [1, 2], 'zones_list': [1, 2, 3, 4]}
+
+    def touch(self, changed: list[str] = (), deleted: list[str] = ()) -> None:
+        self.version += 1
+        self.modified = datetime.now(timezone.utc).replace(microsecond=0)
+        for schedule_id in changed:
+            self.changes[schedule_id] = self.version
+            self.deletions.pop(schedule_id, None)
+        for schedule_id in deleted:
+            self.deletions[schedule_id] = self.version
+            self.changes.pop(schedule_id, None)
+        # Журнал изменений ограничен, клиент со слишком старой версией получит 410
+        while len(self.changes) + len(self.deletions) > CHANGE_LOG_SIZE:
+            log = self.changes if self.changes else self.deletions
+            schedule_id = min(log, key=log.get)
+            self.oldest_version = log.pop(schedule_id)
+
+    def mutate(self) -> None:
+        with self.lock:
+            rows: list[dict] = list(self.schedule.values())
+            changed: list[str] = []
+            deleted: list[str] = []
+            for data in random.sample(rows, min(3, len(rows))):
+                data['event_time'] = f'{random.randint(0, 23):02d}:{random.choice((0, 15, 30, 45)):02d}'
+                changed.append(data.get('schedule_id'))
+            if rows and random.random() < 0.3:
+                flight_id: int = rows[0].get('flight_id')
+                for schedule_id in [key for key, data in self.schedule.items() if data.get('flight_id') == flight_id]:
+                    del self.schedule[schedule_id]
+                    deleted.append(schedule_id)
+                changed.extend(self.add_flight())
+            self.touch(changed, deleted)
+
+    def rows(self) -> list[dict]:
+        return sorted(self.schedule.values(), key=lambda data: (data.get('flight_datetime'), data.get('flight_id'), True, 0, data.get('schedule_id')))
+
+def make_sound(duration: float, frequency: int = 440, sample_rate: int = 22050) -> bytes:
+    frames: bytes = b''.join(struct.pack('<h', int(8000 * math.sin(2 * math.pi * frequency * indx / sample_rate))) for indx in range(int(duration * sample_rate)))
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as wave_file:
+        wave_file.setnchannels(1)
+        wave_file.setsampwidth(2)
+        wave_file.setframerate(sample_rate)
+        wave_file.writeframes(frames)
+    return buffer.getvalue()
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version: str = 'HTTP/1.1'
+    data: StubData
+    sound: bytes = b''
+    synthesis_time: float = 0
+    transfer_time: float = 0
+    is_history_batch: bool = True
+
+    def log_message(self, format: str, *args) -> None:
+        print(f"{self.address_string()} {format % args}")
+
+    def send_json(self, payload, status: int = 200, headers: dict = {}) -> None:
+        body: bytes = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def is_not_modified(self, etag: str, modified: datetime) -> bool:
+        if if_none_match := self.headers.get('If-None-Match'):
+            return etag in [tag.strip() for tag in if_none_match.split(',')]
+        if if_modified_since := self.headers.get('If-Modified-Since'):
+            try:
+                return modified <= parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def send_conditional(self, etag: str, payload, extra_headers: dict = {}) -> None:
+        headers: dict = {'ETag': etag, 'Last-Modified': format_datetime(self.data.modified, usegmt=True), **extra_headers}
+        if self.is_not_modified(etag, self.data.modified):
+            self.send_response(304)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            return
+        self.send_json(payload, headers=headers)
+
+    def do_GET(self) -> None:
+        url = urlsplit(self.path)
+        query: dict[str, list[str]] = parse_qs(url.query)
+        endpoint: str = url.path.rstrip('/').rsplit('/', 1)[-1]
+        with self.data.lock:
+            match endpoint:
+                case 'get_zones':
+                    self.send_json(ZONES)
+                case 'get_terminals':
+                    self.send_json(TERMINALS)
+                case 'get_stub_statistics':
+                    self.send_json({'mutations': self.data.mutation_counts, 'duplicates': self.data.duplicate_count})
+                case 'get_audio_background_text':
+                    self.send_conditional(f'"bg-{self.data.version}"', self.data.background)
+                case 'get_scheduler' if 'flight_id' in query:
+                    schedule_id: str = f"{query['flight_id'][0]}_{query.get('audio_text_id', ['0'])[0]}"
+                    self.send_json([self.data.schedule[schedule_id]] if schedule_id in self.data.schedule else [])
+                case 'get_scheduler' if 'flight_number' in query:
+                    self.send_json([data for data in self.data.rows() if data.get('flight_number_full') == query['flight_number'][0]])
+                case 'get_scheduler' if 'since' in query:
+                    since: int = int(query['since'][0])
+                    if since < self.data.oldest_version:
+                        self.send_json({'detail': 'version is too old'}, status=410)
+                        return
+                    payload: dict = {
+                        'version': self.data.version,
+                        'changed': [self.data.schedule[key] for key, version in self.data.changes.items() if version > since and key in self.data.schedule],
+                        'deleted': [key for key, version in self.data.deletions.items() if version > since],
+                    }
+                    self.send_conditional(f'"schedule-{self.data.version}"', payload, {'X-Schedule-Version': str(self.data.version)})
+                case 'get_scheduler':
+                    self.send_conditional(f'"schedule-{self.data.version}"', self.data.rows(), {'X-Schedule-Version': str(self.data.version)})
+                case _:
+                    self.send_json({'detail': 'not found'}, status=404)
+
+    def do_POST(self) -> None:
+        length: int = int(self.headers.get('Content-Length') or 0)
+        body: dict | list = json.loads(self.rfile.read(length) or b'{}')
+        endpoint: str = urlsplit(self.path).path.rstrip('/').rsplit('/', 1)[-1]
+        if endpoint == 'save_action_history_batch' and not self.is_history_batch:
+            self.send_json({'detail': 'Not Found'}, 404)
+            return
+        if endpoint in ('get_scheduler_sound', 'get_scheduler_background_sound'):
+            time.sleep(self.synthesis_time)
+            self.send_response(200)
+            self.send_header('Content-Type', 'audio/wav')
+            self.send_header('Content-Length', str(len(self.sound)))
+            self.end_headers()
+            chunk_size: int = max(len(self.sound) // 20, 1)
+            for offset in range(0, len(self.sound), chunk_size):
+                self.wfile.write(self.sound[offset:offset+chunk_size])
+                self.wfile.flush()
+                time.sleep(self.transfer_time / 20)
+            return
+        with self.data.lock:
+            if idempotency_key := self.headers.get('Idempotency-Key'):
+                if idempotency_key in self.data.idempotency_keys:
+                    self.data.duplicate_count += 1
+                    self.send_json({})
+                    return
+                self.data.idempotency_keys.add(idempotency_key)
+            self.data.mutation_counts[endpoint] = self.data.mutation_counts.get(endpoint, 0) + 1
+            if isinstance(body, list):
+                self.data.mutation_counts[endpoint+'_records'] = self.data.mutation_counts.get(endpoint+'_records', 0) + len(body)
+                self.send_json({})
+                return
+            schedule_id: str = f"{body.get('flight_id')}_{body.get('audio_text_id')}"
+            if endpoint == 'update_schedule' and (data := self.data.schedule.get(schedule_id)):
+                for field, row_field in UPDATE_FIELDS.items():
+                    if field in body:
+                        data[row_field] = body[field]
+                self.data.touch(changed=[schedule_id])
+        self.send_json({})
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Заглушка API Speaker')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--rows', type=int, default=300)
+    parser.add_argument('--mutate', type=float, default=15, help='интервал изменения расписания в секундах, 0 - не изменять')
+    parser.add_argument('--sound', type=float, default=3, help='длительность звука объявления в секундах')
+    parser.add_argument('--synthesis', type=float, default=0, help='время синтеза звука в секундах')
+    parser.add_argument('--transfer', type=float, default=0, help='время передачи звука в секундах')
+    parser.add_argument('--no-history-batch', action='store_true', help='отвечать 404 на save_action_history_batch')
+    args = parser.parse_args()
+
+    StubHandler.data = StubData(args.rows)
+    StubHandler.sound = make_sound(args.sound)
+    StubHandler.synthesis_time = args.synthesis
+    StubHandler.transfer_time = args.transfer
+    StubHandler.is_history_batch = not args.no_history_batch
+    if args.mutate > 0:
+        def mutate_loop() -> None:
+            while not stop_event.wait(args.mutate):
+                StubHandler.data.mutate()
+        stop_event = threading.Event()
+        threading.Thread(target=mutate_loop, daemon=True).start()
+
+    server = ThreadingHTTPServer((args.host, args.port), StubHandler)
+    print(f"Заглушка API: http://{args.host}:{args.port}/speaker/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == '__main__':
+    main()